@@ -32,6 +32,9 @@ class PeriodicWorkerThread(object):
         self._thread = threading.Thread(target=self._target, name=name)
         self._thread.daemon = daemon
         self._stop = threading.Event()
+        # Notified when the worker is stopped or woken up
+        self._wakeup = threading.Condition()
+        self._wakeup_requested = False
         self.started = False
         self.interval = interval
         self.exit_timeout = exit_timeout
@@ -57,6 +60,14 @@ class PeriodicWorkerThread(object):
         """Stop the worker."""
         _LOG.debug('Stopping %s thread', self._thread.name)
         self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def wakeup(self):
+        """Wake the worker up so it runs `run_periodic` without waiting for the end of the interval."""
+        with self._wakeup:
+            self._wakeup_requested = True
+            self._wakeup.notify()
 
     def is_alive(self):
         return self._thread.is_alive()
@@ -64,8 +75,19 @@ class PeriodicWorkerThread(object):
     def join(self, timeout=None):
         return self._thread.join(timeout)
 
+    def _wait(self):
+        """Wait for the interval to elapse or for the worker to be woken up or stopped.
+
+        :return: Whether the worker has been stopped.
+        """
+        with self._wakeup:
+            if not self._stop.is_set() and not self._wakeup_requested:
+                self._wakeup.wait(self.interval)
+            self._wakeup_requested = False
+        return self._stop.is_set()
+
     def _target(self):
-        while not self._stop.wait(self.interval):
+        while not self._wait():
             self.run_periodic()
         self._on_shutdown()
 
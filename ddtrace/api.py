@@ -1,15 +1,18 @@
 # stdlib
 import ddtrace
 from json import loads
+import os
 import socket
+import threading
 
 # project
 from .encoding import Encoder, JSONEncoder
-from .compat import httplib, PYTHON_VERSION, PYTHON_INTERPRETER, get_connection_response
+from .compat import httplib, PYTHON_VERSION, PYTHON_INTERPRETER, Queue, get_connection_response
 from .internal.logger import get_logger
 from .internal.runtime import container
 from .payload import Payload, PayloadFull
 from .utils.deprecation import deprecated
+from .utils.formats import get_env
 from .utils import time
 
 
@@ -115,6 +118,60 @@ class UDSHTTPConnection(httplib.HTTPConnection):
         self.sock = sock
 
 
+class _StaleConnection(Exception):
+    """Raised when a pooled connection was closed by the agent before it could be used."""
+
+
+class _UploadPool(object):
+    """Persistent pool of daemon threads calling the functions submitted to it.
+
+    The threads are started on the first submission, and again after a fork as they do not survive it.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._queue = None
+        self._pid = None
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args):
+        with self._lock:
+            pid = os.getpid()
+            if self._pid != pid:
+                self._queue = Queue()
+                self._pid = pid
+                self._threads = []
+                for _ in range(self.size):
+                    t = threading.Thread(target=self._run, args=(self._queue,), name='%s-upload' % __name__)
+                    t.daemon = True
+                    t.start()
+                    self._threads.append(t)
+        self._queue.put((func, args))
+
+    def stop(self):
+        """Stop the threads once they are done with the functions already submitted."""
+        with self._lock:
+            if self._pid == os.getpid():
+                for _ in range(self.size):
+                    self._queue.put(None)
+            self._queue = None
+            self._pid = None
+            self._threads = []
+
+    @staticmethod
+    def _run(queue):
+        while True:
+            task = queue.get()
+            if task is None:
+                return
+            func, args = task
+            try:
+                func(*args)
+            except Exception:
+                log.debug('error running upload task', exc_info=True)
+
+
 class API(object):
     """
     Send data to the trace agent using the HTTP protocol and JSON format
@@ -126,7 +183,20 @@ class API(object):
     # This ought to be enough as the agent is local
     TIMEOUT = 2
 
-    def __init__(self, hostname, port, uds_path=None, https=False, headers=None, encoder=None, priority_sampling=False):
+    # Maximum number of idle keep-alive connections to the agent kept for reuse
+    MAX_IDLE_CONNECTIONS = 4
+
+    def __init__(
+        self,
+        hostname,
+        port,
+        uds_path=None,
+        https=False,
+        headers=None,
+        encoder=None,
+        priority_sampling=False,
+        max_concurrent_uploads=None,
+    ):
         """Create a new connection to the Tracer API.
 
         :param hostname: The hostname.
@@ -135,14 +205,29 @@ class API(object):
         :param headers: The headers to pass along the request.
         :param encoder: The encoder to use to serialize data.
         :param priority_sampling: Whether to use priority sampling.
+        :param max_concurrent_uploads: Maximum number of payloads uploaded at the same time by ``send_traces``.
+            With more than one, payloads are uploaded in background threads while the next ones are encoded.
+            Defaults to ``DD_TRACE_WRITER_MAX_CONCURRENT_UPLOADS``, or 1.
         """
         self.hostname = hostname
         self.port = int(port)
         self.uds_path = uds_path
         self.https = https
 
+        if max_concurrent_uploads is None:
+            max_concurrent_uploads = int(get_env('trace', 'writer_max_concurrent_uploads', default=1))
+        self.max_concurrent_uploads = max_concurrent_uploads
+        self._upload_pool = None
+
         self._headers = headers or {}
         self._version = None
+        # Taken to change the API version, which the upload threads read
+        self._version_lock = threading.Lock()
+
+        # Pool of idle keep-alive connections to the agent, reused across `_put` calls
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._connections_pid = os.getpid()
 
         if priority_sampling:
             self._set_version('v0.4', encoder=encoder)
@@ -196,7 +281,8 @@ class API(object):
         ensures that the compatibility mode is activated so that the downgrade will be
         executed only once.
         """
-        self._set_version(self._fallback)
+        with self._version_lock:
+            self._set_version(self._fallback)
 
     def send_traces(self, traces):
         """Send traces to the API.
@@ -208,72 +294,208 @@ class API(object):
             return []
 
         with time.StopWatch() as sw:
-            responses = []
-            payload = Payload(encoder=self._encoder)
-            for trace in traces:
-                try:
-                    payload.add_trace(trace)
-                except PayloadFull:
-                    # Is payload full or is the trace too big?
-                    # If payload is not empty, then using a new Payload might allow us to fit the trace.
-                    # Let's flush the Payload and try to put the trace in a new empty Payload.
-                    if not payload.empty:
-                        responses.append(self._flush(payload))
-                        # Create a new payload
-                        payload = Payload(encoder=self._encoder)
-                        try:
-                            # Add the trace that we were unable to add in that iteration
-                            payload.add_trace(trace)
-                        except PayloadFull:
-                            # If the trace does not fit in a payload on its own, that's bad. Drop it.
-                            log.warning('Trace %r is too big to fit in a payload, dropping it', trace)
-
-            # Check that the Payload is not empty:
-            # it could be empty if the last trace was too big to fit.
-            if not payload.empty:
-                responses.append(self._flush(payload))
+            if self.max_concurrent_uploads > 1:
+                responses = self._send_payloads_pipelined(self._iter_payloads(traces))
+            else:
+                responses = [self._flush(payload) for payload in self._iter_payloads(traces)]
 
         log.debug('reported %d traces in %.5fs', len(traces), sw.elapsed())
 
         return responses
 
+    def _iter_payloads(self, traces):
+        """Encode traces into payloads, yielding each payload once it is full.
+
+        :param traces: A list of traces.
+        """
+        payload = Payload(encoder=self._encoder)
+        for trace in traces:
+            try:
+                payload.add_trace(trace)
+            except PayloadFull:
+                # Is payload full or is the trace too big?
+                # If payload is not empty, then using a new Payload might allow us to fit the trace.
+                # Let's flush the Payload and try to put the trace in a new empty Payload.
+                if not payload.empty:
+                    yield payload
+                    # Create a new payload
+                    payload = Payload(encoder=self._encoder)
+                    try:
+                        # Add the trace that we were unable to add in that iteration
+                        payload.add_trace(trace)
+                    except PayloadFull:
+                        # If the trace does not fit in a payload on its own, that's bad. Drop it.
+                        log.warning('Trace %r is too big to fit in a payload, dropping it', trace)
+
+        # Check that the Payload is not empty:
+        # it could be empty if the last trace was too big to fit.
+        if not payload.empty:
+            yield payload
+
+    def _send_payloads_pipelined(self, payloads):
+        """Upload payloads in the background threads of the upload pool while the next ones are being encoded.
+
+        At most ``max_concurrent_uploads`` payloads are uploaded at the same time, each one over its
+        own pooled connection. The payloads sent to an unavailable endpoint are sent again from the
+        calling thread once the API has been downgraded.
+
+        :param payloads: An iterable of payloads, encoded lazily.
+        :return: The list of API HTTP responses, in the same order as the payloads.
+        """
+        if self._upload_pool is None:
+            self._upload_pool = _UploadPool(self.max_concurrent_uploads)
+        slots = threading.BoundedSemaphore(self.max_concurrent_uploads)
+        results = Queue()
+
+        def upload(payload, index):
+            try:
+                response = self._upload(payload)
+            except Exception as e:
+                # Report unexpected errors like the ones from the agent instead of losing them with the thread
+                response = e
+            finally:
+                slots.release()
+            # DEV: Only keep the payloads that have to be sent again
+            results.put((index, response, payload if self._should_downgrade(response) else None))
+
+        count = 0
+        for payload in payloads:
+            # DEV: The next payload is only encoded once this one has been handed to an upload thread,
+            #      so at most `max_concurrent_uploads + 1` payloads are held in memory.
+            slots.acquire()
+            self._upload_pool.submit(upload, payload, count)
+            count += 1
+
+        responses = [None] * count
+        retries = []
+        for _ in range(count):
+            index, response, payload = results.get()
+            responses[index] = response
+            if payload is not None:
+                retries.append((index, payload))
+
+        if retries:
+            status = responses[retries[0][0]].status
+            log.debug("calling endpoint '%s' but received %s; downgrading API", self._traces, status)
+            self._downgrade()
+            for index, payload in sorted(retries, key=lambda retry: retry[0]):
+                responses[index] = self._flush(payload)
+
+        return responses
+
     def _flush(self, payload):
-        try:
-            response = self._put(self._traces, payload.get_payload(), payload.length)
-        except (httplib.HTTPException, OSError, IOError) as e:
-            return e
+        response = self._upload(payload)
 
         # the API endpoint is not available so we should downgrade the connection and re-try the call
-        if response.status in [404, 415] and self._fallback:
+        if self._should_downgrade(response):
             log.debug("calling endpoint '%s' but received %s; downgrading API", self._traces, response.status)
             self._downgrade()
             return self._flush(payload)
 
         return response
 
+    def _upload(self, payload):
+        """Send a payload to the current endpoint, without downgrading the API.
+
+        :return: The API HTTP response, or the exception raised while sending the payload.
+        """
+        try:
+            return self._put(self._traces, payload.get_payload(), payload.length)
+        except (httplib.HTTPException, OSError, IOError) as e:
+            return e
+
+    def _should_downgrade(self, response):
+        """Whether the API has to be downgraded as the endpoint a payload was sent to is not available."""
+        return getattr(response, 'status', None) in (404, 415) and bool(self._fallback)
+
     @deprecated(message='Sending services to the API is no longer necessary', version='1.0.0')
     def send_services(self, *args, **kwargs):
         return
 
+    def _new_connection(self):
+        if self.uds_path is None:
+            if self.https:
+                return httplib.HTTPSConnection(self.hostname, self.port, timeout=self.TIMEOUT)
+            return httplib.HTTPConnection(self.hostname, self.port, timeout=self.TIMEOUT)
+        return UDSHTTPConnection(self.uds_path, self.https, self.hostname, self.port, timeout=self.TIMEOUT)
+
+    def _get_connection(self):
+        """Get an idle connection from the pool or create a new one.
+
+        :returns: A tuple of the connection and whether it is being reused
+        """
+        with self._connections_lock:
+            pid = os.getpid()
+            if self._connections_pid != pid:
+                # DEV: The pooled sockets are shared with the parent process after a fork, so do not use them
+                self._connections = []
+                self._connections_pid = pid
+            if self._connections:
+                return self._connections.pop(), True
+        return self._new_connection(), False
+
+    def _release_connection(self, conn):
+        """Give back a connection to the pool so it can be reused by the next request."""
+        with self._connections_lock:
+            if self._connections_pid == os.getpid() and len(self._connections) < self.MAX_IDLE_CONNECTIONS:
+                self._connections.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close all the idle connections to the agent, and stop the upload threads."""
+        if self._upload_pool is not None:
+            self._upload_pool.stop()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
     def _put(self, endpoint, data, count):
         headers = self._headers.copy()
         headers[self.TRACE_COUNT_HEADER] = str(count)
 
-        if self.uds_path is None:
-            if self.https:
-                conn = httplib.HTTPSConnection(self.hostname, self.port, timeout=self.TIMEOUT)
-            else:
-                conn = httplib.HTTPConnection(self.hostname, self.port, timeout=self.TIMEOUT)
-        else:
-            conn = UDSHTTPConnection(self.uds_path, self.https, self.hostname, self.port, timeout=self.TIMEOUT)
-
+        conn, reused = self._get_connection()
+        if reused:
+            try:
+                return self._request(conn, endpoint, data, headers, reused=True)
+            except _StaleConnection:
+                # The agent closed the keep-alive connection while it was idle in the pool:
+                # retry once with a brand new connection.
+                conn = self._new_connection()
+        return self._request(conn, endpoint, data, headers)
+
+    def _request(self, conn, endpoint, data, headers, reused=False):
+        """Send a request over a connection, giving it back to the pool if it can be reused.
+
+        :raises _StaleConnection: If the connection is ``reused`` and the agent closed it before the request could
+            be sent, or without answering it, so that the request can safely be sent again.
+        """
+        keep_alive = False
         try:
-            conn.request('PUT', endpoint, data, headers)
+            try:
+                conn.request('PUT', endpoint, data, headers)
+            except (httplib.HTTPException, OSError, IOError) as e:
+                if reused and not isinstance(e, socket.timeout):
+                    raise _StaleConnection(e)
+                raise
 
             # Parse the HTTPResponse into an API.Response
-            # DEV: This will call `resp.read()` which must happen before the `conn.close()` below,
+            # DEV: This will call `resp.read()` which must happen before the connection is reused or closed,
             #      if we call `.close()` then all future `.read()` calls will return `b''`
-            resp = get_connection_response(conn)
-            return Response.from_http_response(resp)
+            try:
+                resp = get_connection_response(conn)
+            except httplib.BadStatusLine as e:
+                # DEV: An empty status line means the connection was closed without reading any byte,
+                #      this is `RemoteDisconnected` with Python 3
+                if reused and e.line in ('', "''"):
+                    raise _StaleConnection(e)
+                raise
+            response = Response.from_http_response(resp)
+            keep_alive = not resp.will_close
+            return response
         finally:
-            conn.close()
+            if keep_alive:
+                self._release_connection(conn)
+            else:
+                conn.close()
@@ -4,6 +4,7 @@ import threading
 from .constants import HOSTNAME_KEY, SAMPLING_PRIORITY_KEY, ORIGIN_KEY
 from .internal.logger import get_logger
 from .internal import hostname
+from .internal.encoding_utils import estimate_size
 from .settings import config
 from .utils.formats import asbool, get_env
 
@@ -27,6 +28,8 @@ class Context(object):
     """
     _partial_flush_enabled = asbool(get_env('tracer', 'partial_flush_enabled', default=False))
     _partial_flush_min_spans = int(get_env('tracer', 'partial_flush_min_spans', default=500))
+    # Also flush once the finished spans reach this estimated size in bytes, 0 to only rely on their number
+    _partial_flush_min_size = int(get_env('tracer', 'partial_flush_min_size', default=0))
 
     def __init__(self, trace_id=None, span_id=None, sampling_priority=None, _dd_origin=None):
         """
@@ -37,6 +40,13 @@ class Context(object):
         """
         self._trace = []
         self._finished_spans = 0
+        # Finished spans not flushed yet, and their estimated size in bytes when partial flushes need it
+        self._pending_spans = []
+        self._finished_size = 0
+        # Number of spans of `_trace` already returned by a partial flush
+        self._flushed_spans = 0
+        # Partially flush this context every `_streaming_min_spans` finished spans, see `enable_streaming`
+        self._streaming_min_spans = None
         self._current_span = None
         self._lock = threading.Lock()
 
@@ -129,6 +139,9 @@ class Context(object):
         """
         with self._lock:
             self._finished_spans += 1
+            self._pending_spans.append(span)
+            if self._partial_flush_min_size > 0:
+                self._finished_size += estimate_size((span,))
             self._set_current_span(span._parent)
 
             # notify if the trace is not closed properly; this check is executed only
@@ -149,6 +162,54 @@ class Context(object):
     def _is_sampled(self):
         return any(span.sampled for span in self._trace)
 
+    def _should_partial_flush(self):
+        """
+        Whether the finished spans have to be flushed before the trace is finished.
+
+        Non-safe if not used with a lock. For internal Context usage only.
+        """
+        if self._streaming_min_spans is not None:
+            min_spans = self._streaming_min_spans
+        elif self._partial_flush_enabled:
+            min_spans = self._partial_flush_min_spans
+        else:
+            return False
+        return len(self._pending_spans) >= min_spans or 0 < self._partial_flush_min_size <= self._finished_size
+
+    def _set_root_tags(self, span, sampled):
+        """
+        Attach the tags of the trace to a span: sampling priority, origin and hostname.
+
+        Non-safe if not used with a lock. For internal Context usage only.
+        """
+        sampling_priority = self._sampling_priority
+        # attach the sampling priority to the context root span
+        if sampled and sampling_priority is not None:
+            span.set_metric(SAMPLING_PRIORITY_KEY, sampling_priority)
+        origin = self._dd_origin
+        # attach the origin to the root span tag
+        if sampled and origin is not None:
+            span.set_tag(ORIGIN_KEY, origin)
+
+        # Set hostname tag if they requested it
+        if config.report_hostname:
+            # DEV: `get_hostname()` value is cached
+            span.set_tag(HOSTNAME_KEY, hostname.get_hostname())
+
+    def enable_streaming(self, min_spans=1):
+        """
+        Send the spans of the current trace as soon as they are finished instead of
+        waiting for the whole trace to be finished, like partial flushing does for all
+        contexts. This bounds the memory used by traces with a long-lived root span.
+
+        The sampling priority, origin and hostname tags are set on each chunk of spans.
+        Streaming stops once the trace is finished.
+
+        :param int min_spans: number of finished spans to send at once
+        """
+        with self._lock:
+            self._streaming_min_spans = min_spans
+
     def get(self):
         """
         Returns a tuple containing the trace list generated in the current context and
@@ -156,61 +217,63 @@ class Context(object):
         not finished. If a trace is returned, the ``Context`` will be reset so that it
         can be re-used immediately.
 
+        When the trace is partially flushed, the finished spans are returned before the
+        trace is finished, in the order they finished in rather than the order they were
+        started in. The remaining spans are returned in the order they were started in.
+
         This operation is thread-safe.
         """
         with self._lock:
             # All spans are finished?
             if self._finished_spans == len(self._trace):
                 # get the trace
-                trace = self._trace
+                if self._flushed_spans:
+                    # Skip the spans already returned by partial flushes, keeping the order of the trace
+                    pending = set(map(id, self._pending_spans))
+                    trace = [t for t in self._trace if id(t) in pending]
+                else:
+                    trace = self._trace
                 sampled = self._is_sampled()
-                sampling_priority = self._sampling_priority
-                # attach the sampling priority to the context root span
-                if sampled and sampling_priority is not None and trace:
-                    trace[0].set_metric(SAMPLING_PRIORITY_KEY, sampling_priority)
-                origin = self._dd_origin
-                # attach the origin to the root span tag
-                if sampled and origin is not None and trace:
-                    trace[0].set_tag(ORIGIN_KEY, origin)
-
-                # Set hostname tag if they requested it
-                if config.report_hostname:
-                    # DEV: `get_hostname()` value is cached
-                    trace[0].set_tag(HOSTNAME_KEY, hostname.get_hostname())
+                if trace:
+                    self._set_root_tags(trace[0], sampled)
 
                 # clean the current state
                 self._trace = []
                 self._finished_spans = 0
+                self._pending_spans = []
+                self._finished_size = 0
+                self._flushed_spans = 0
+                self._streaming_min_spans = None
                 self._parent_trace_id = None
                 self._parent_span_id = None
                 self._sampling_priority = None
                 return trace, sampled
 
-            elif self._partial_flush_enabled:
-                finished_spans = [t for t in self._trace if t.finished]
-                if len(finished_spans) >= self._partial_flush_min_spans:
-                    # partial flush when enabled and we have more than the minimal required spans
-                    trace = self._trace
-                    sampled = self._is_sampled()
-                    sampling_priority = self._sampling_priority
-                    # attach the sampling priority to the context root span
-                    if sampled and sampling_priority is not None and trace:
-                        trace[0].set_metric(SAMPLING_PRIORITY_KEY, sampling_priority)
-                    origin = self._dd_origin
-                    # attach the origin to the root span tag
-                    if sampled and origin is not None and trace:
-                        trace[0].set_tag(ORIGIN_KEY, origin)
-
-                    # Set hostname tag if they requested it
-                    if config.report_hostname:
-                        # DEV: `get_hostname()` value is cached
-                        trace[0].set_tag(HOSTNAME_KEY, hostname.get_hostname())
-
-                    self._finished_spans = 0
-
-                    # Any open spans will remain as `self._trace`
-                    # Any finished spans will get returned to be flushed
+            elif self._should_partial_flush():
+                # partial flush when enabled and we have more than the minimal required spans
+                trace = self._trace
+                sampled = self._is_sampled()
+                self._set_root_tags(trace[0], sampled)
+
+                # Any finished spans will get returned to be flushed
+                finished_spans = self._pending_spans
+                # DEV: The root span is not part of the flushed spans, replicate its tags on the top-level
+                #      spans of the chunk so that it can be processed on its own
+                chunk_ids = set(map(id, finished_spans))
+                for span in finished_spans:
+                    if span._parent is None or id(span._parent) not in chunk_ids:
+                        self._set_root_tags(span, sampled)
+                self._pending_spans = []
+                self._finished_size = 0
+                self._flushed_spans += len(finished_spans)
+
+                # Any open spans will remain as `self._trace`
+                # DEV: The flushed spans are only removed from `self._trace` once they are a quarter of it,
+                #      so that flushing costs O(finished spans) even when many spans are still open
+                if self._flushed_spans * 4 >= len(self._trace):
                     self._trace = [t for t in self._trace if not t.finished]
+                    self._finished_spans = 0
+                    self._flushed_spans = 0
 
-                    return finished_spans, sampled
+                return finished_spans, sampled
             return None, None
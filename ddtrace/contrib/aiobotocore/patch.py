@@ -94,7 +94,7 @@ def _wrapped_api_call(original_func, instance, args, kwargs):
             operation = None
             span.resource = endpoint_name
 
-        aws.add_span_arg_tags(span, endpoint_name, args, ARGS_NAME, TRACED_ARGS)
+        aws.defer_span_arg_tags(span, endpoint_name, args, ARGS_NAME, TRACED_ARGS)
 
         region_name = deep_getattr(instance, 'meta.region_name')
 
@@ -3,6 +3,7 @@ import ddtrace
 from .compat import asyncio_current_task
 from .provider import CONTEXT_ATTR
 from ...context import Context
+from ...internal.context_manager import ContextVarContextManager
 
 
 def wrapped_create_task(wrapped, instance, args, kwargs):
@@ -39,6 +40,15 @@ def wrapped_create_task_contextvars(wrapped, instance, args, kwargs):
     ``Context`` to the new ``Task``. This function is useful to connect traces
     of detached executions. Uses contextvars for task-local storage.
     """
+    context_manager = getattr(ddtrace.tracer.context_provider, '_local', None)
+    if isinstance(context_manager, ContextVarContextManager):
+        # the new task gets a reference to the current span instead of a clone of the context
+        token = context_manager.fork()
+        try:
+            return wrapped(*args, **kwargs)
+        finally:
+            context_manager.unfork(token)
+
     current_task_ctx = ddtrace.tracer.get_call_context()
 
     if not current_task_ctx:
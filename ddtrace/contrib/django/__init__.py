@@ -87,6 +87,21 @@ Configuration
 
    Default: ``False``
 
+.. py:data:: ddtrace.config.django['middleware_span_threshold']
+
+   Duration in milliseconds under which calls to the ``process_*`` methods of middleware are not
+   traced in their own span. The duration of these calls is added to a
+   ``django.middleware.duration.<middleware>.<method>`` metric of the request span instead. Calls
+   that are slower or that raise an exception are still traced, but the spans started during them
+   are attached to the enclosing span.
+
+   Middleware handlers, i.e. function-based middleware and the ``__call__`` method of class-based
+   middleware, are always traced as they call the next middleware and the view.
+
+   Can also be configured via the ``DD_DJANGO_MIDDLEWARE_SPAN_THRESHOLD`` environment variable.
+
+   Default: ``None``, all middleware calls are traced
+
 
 Example::
 
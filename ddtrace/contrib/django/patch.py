@@ -16,6 +16,7 @@ from ddtrace.vendor import debtcollector, wrapt
 from ddtrace.compat import getattr_static
 from ddtrace.constants import ANALYTICS_SAMPLE_RATE_KEY
 from ddtrace.contrib import func_name, dbapi
+from ddtrace.contrib.trace_utils import trace_coalesced
 from ddtrace.ext import http, sql as sqlx, SpanTypes
 from ddtrace.internal.logger import get_logger
 from ddtrace.propagation.http import HTTPPropagator
@@ -41,6 +42,7 @@ config._add(
         analytics_enabled=None,  # None allows the value to be overridden by the global config
         analytics_sample_rate=None,
         trace_query_string=None,  # Default to global config
+        middleware_span_threshold=float(get_env("django", "middleware_span_threshold", default=0)) or None,
     ),
 )
 
@@ -239,6 +241,21 @@ def traced_func(django, name, resource=None):
     return with_traced_module(wrapped)(django)
 
 
+def traced_middleware(django, name, resource):
+    """Returns a function to trace Django middleware hooks, only in a span if it is slower than the threshold.
+
+    DEV: This must not be used for middleware handlers, like ``__call__``, as they call the next middleware
+         and the view: their duration would include the ones of the hooks and views they call.
+    """
+    metric = "django.middleware.duration.{0}".format(resource)
+
+    def wrapped(django, pin, func, instance, args, kwargs):
+        threshold = config.django.middleware_span_threshold
+        return trace_coalesced(pin.tracer, threshold, metric, name, func, args, kwargs, resource=resource)
+
+    return with_traced_module(wrapped)(django)
+
+
 def traced_process_exception(django, name, resource=None):
     def wrapped(django, pin, func, instance, args, kwargs):
         with pin.tracer.trace(name, resource=resource) as span:
@@ -296,7 +313,12 @@ def traced_load_middleware(django, pin, func, instance, args, kwargs):
                 "__call__",
             ]:
                 if hasattr(mw, hook) and not iswrapped(mw, hook):
-                    wrap(mw, hook, traced_func(django, "django.middleware", resource=mw_path + ".{0}".format(hook)))
+                    res = mw_path + ".{0}".format(hook)
+                    if hook == "__call__":
+                        # The handler of the middleware calls the next ones, it is always traced
+                        wrap(mw, hook, traced_func(django, "django.middleware", resource=res))
+                    else:
+                        wrap(mw, hook, traced_middleware(django, "django.middleware", res))
             # Do a little extra for `process_exception`
             if hasattr(mw, "process_exception") and not iswrapped(mw, "process_exception"):
                 res = mw_path + ".{0}".format("process_exception")
@@ -305,28 +327,17 @@ def traced_load_middleware(django, pin, func, instance, args, kwargs):
     return func(*args, **kwargs)
 
 
-@with_traced_module
-def traced_get_response(django, pin, func, instance, args, kwargs):
-    """Trace django.core.handlers.base.BaseHandler.get_response() (or other implementations).
+def _resolve_request(django, request):
+    """Return the resource name, route and ``ResolverMatch`` of a request.
 
-    This is the main entry point for requests.
-
-    Django requests are handled by a Handler.get_response method (inherited from base.BaseHandler).
-    This method invokes the middleware chain and returns the response generated by the chain.
+    The ``ResolverMatch`` set on the request by Django when dispatching it is used when available,
+    so the URL is only resolved again for requests that did not reach the URL dispatcher, like
+    404 requests or requests answered by a middleware.
     """
-
-    request = kwargs.get("request", args[0])
-    if request is None:
-        return func(*args, **kwargs)
-
+    route = None
+    resolver_match = None
+    resource = request.method
     try:
-        request_headers = request.META
-
-        if config.django.distributed_tracing_enabled:
-            context = propagator.extract(request_headers)
-            if context.trace_id:
-                pin.tracer.context_provider.activate(context)
-
         # Determine the resolver and resource name for this request
         resolver = get_resolver(getattr(request, "urlconf", None))
 
@@ -335,12 +346,11 @@ def traced_get_response(django, pin, func, instance, args, kwargs):
         else:
             error_type_404 = django.urls.exceptions.Resolver404
 
-        route = None
-        resolver_match = None
-        resource = request.method
         try:
-            # Resolve the requested url
-            resolver_match = resolver.resolve(request.path_info)
+            resolver_match = getattr(request, "resolver_match", None)
+            if resolver_match is None:
+                # Resolve the requested url
+                resolver_match = resolver.resolve(request.path_info)
 
             # Determine the resource name to use
             # In Django >= 2.2.0 we can access the original route or regex pattern
@@ -360,19 +370,46 @@ def traced_get_response(django, pin, func, instance, args, kwargs):
             # Normalize all 404 requests into a single resource name
             # DEV: This is for potential cardinality issues
             resource = "{0} 404".format(request.method)
-        except Exception:
-            log.debug(
-                "Failed to resolve request path %r with path info %r",
-                request,
-                getattr(request, "path_info", "not-set"),
-                exc_info=True,
-            )
+    except Exception:
+        log.debug(
+            "Failed to resolve request path %r with path info %r",
+            request,
+            getattr(request, "path_info", "not-set"),
+            exc_info=True,
+        )
+    return resource, route, resolver_match
+
+
+@with_traced_module
+def traced_get_response(django, pin, func, instance, args, kwargs):
+    """Trace django.core.handlers.base.BaseHandler.get_response() (or other implementations).
+
+    This is the main entry point for requests.
+
+    Django requests are handled by a Handler.get_response method (inherited from base.BaseHandler).
+    This method invokes the middleware chain and returns the response generated by the chain.
+
+    The resource name of the request span is computed once the response is generated, from the
+    URL resolution done by Django while dispatching the request.
+    """
+
+    request = kwargs.get("request", args[0])
+    if request is None:
+        return func(*args, **kwargs)
+
+    try:
+        request_headers = request.META
+
+        if config.django.distributed_tracing_enabled:
+            context = propagator.extract(request_headers)
+            if context.trace_id:
+                pin.tracer.context_provider.activate(context)
     except Exception:
         log.debug("Failed to trace django request %r", args, exc_info=True)
         return func(*args, **kwargs)
     else:
         with pin.tracer.trace(
-            "django.request", resource=resource, service=config.django["service_name"], span_type=SpanTypes.HTTP
+            "django.request", resource=request.method, service=config.django["service_name"], span_type=SpanTypes.HTTP
         ) as span:
             analytics_sr = config.django.get_analytics_sample_rate(use_global_config=True)
             if analytics_sr is not None:
@@ -381,22 +418,25 @@ def traced_get_response(django, pin, func, instance, args, kwargs):
             if config.django.http.trace_query_string:
                 span.set_tag(http.QUERY_STRING, request_headers["QUERY_STRING"])
 
-            # Not a 404 request
-            if resolver_match:
-                span.set_tag("django.view", resolver_match.view_name)
-                utils.set_tag_array(span, "django.namespace", resolver_match.namespaces)
+            # Set HTTP Request tags
+            span.set_tag(http.URL, utils.get_request_uri(request))
 
-                # Django >= 2.0.0
-                if hasattr(resolver_match, "app_names"):
-                    utils.set_tag_array(span, "django.app", resolver_match.app_names)
+            try:
+                response = func(*args, **kwargs)
+            finally:
+                span.resource, route, resolver_match = _resolve_request(django, request)
 
-            if route:
-                span.set_tag("http.route", route)
+                # Not a 404 request
+                if resolver_match:
+                    span.set_tag("django.view", resolver_match.view_name)
+                    utils.set_tag_array(span, "django.namespace", resolver_match.namespaces)
 
-            # Set HTTP Request tags
-            span.set_tag(http.URL, utils.get_request_uri(request))
+                    # Django >= 2.0.0
+                    if hasattr(resolver_match, "app_names"):
+                        utils.set_tag_array(span, "django.app", resolver_match.app_names)
 
-            response = func(*args, **kwargs)
+                if route:
+                    span.set_tag("http.route", route)
 
             # Note: this call must be done after the function call because
             # some attributes (like `user`) are added to the request through
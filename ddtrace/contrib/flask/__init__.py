@@ -71,6 +71,18 @@ Configuration
 
    Default: ``True``
 
+.. py:data:: ddtrace.config.flask['hook_span_threshold']
+
+   Duration in milliseconds under which hooks and signal receivers are not traced in their own span.
+   The duration of these calls is added to a ``flask.hook.duration.<hook>`` or
+   ``flask.signal.duration.<signal>.<receiver>`` metric of the request span instead. Calls that are
+   slower or that raise an exception are still traced, but the spans started during them are
+   attached to the enclosing span.
+
+   Can also be configured via the ``DD_FLASK_HOOK_SPAN_THRESHOLD`` environment variable.
+
+   Default: ``None``, all hooks and signal receivers are traced
+
 .. py:data:: ddtrace.config.flask['extra_error_codes']
 
    A list of response codes that should get marked as errors.
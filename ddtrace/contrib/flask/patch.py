@@ -11,9 +11,10 @@ from ...constants import ANALYTICS_SAMPLE_RATE_KEY, SPAN_MEASURED_KEY
 from ...ext import SpanTypes, http
 from ...internal.logger import get_logger
 from ...propagation.http import HTTPPropagator
+from ...utils.formats import get_env
 from ...utils.wrappers import unwrap as _u
 from .helpers import get_current_app, get_current_span, simple_tracer, with_instance_pin
-from .wrappers import wrap_function, wrap_signal
+from .wrappers import wrap_function, wrap_hook, wrap_signal
 
 log = get_logger(__name__)
 
@@ -33,6 +34,7 @@ config._add('flask', dict(
     distributed_tracing_enabled=True,
     template_default_name='<memory>',
     trace_signals=True,
+    hook_span_threshold=float(get_env('flask', 'hook_span_threshold', default=0)) or None,
 
     # We mark 5xx responses as errors, these codes are additional status codes to mark as errors
     # DEV: This is so that if a user wants to see `401` or `403` as an error, they can configure that
@@ -388,7 +390,7 @@ def traced_endpoint(wrapped, instance, args, kwargs):
 def traced_flask_hook(wrapped, instance, args, kwargs):
     """Wrapper for hook functions (before_request, after_request, etc) are properly traced"""
     func = kwargs.get('f', args[0])
-    return wrapped(wrap_function(instance, func))
+    return wrapped(wrap_hook(instance, func))
 
 
 def traced_render_template(wrapped, instance, args, kwargs):
@@ -1,6 +1,8 @@
 from ddtrace.vendor.wrapt import function_wrapper
 
 from ...pin import Pin
+from ...settings import config
+from ..trace_utils import trace_coalesced
 from ...utils.importlib import func_name
 from .helpers import get_current_app
 
@@ -25,13 +27,40 @@ def wrap_function(instance, func, name=None, resource=None):
     return trace_func(func)
 
 
+def wrap_hook(instance, func):
+    """
+    Helper function to wrap flask.app.Flask hooks
+
+    Hooks faster than ``config.flask['hook_span_threshold']`` are measured on the request span
+    instead of being traced
+    """
+    name = func_name(func)
+    metric = 'flask.hook.duration.{}'.format(name)
+
+    @function_wrapper
+    def trace_func(wrapped, _instance, args, kwargs):
+        pin = Pin._find(wrapped, _instance, instance, get_current_app())
+        if not pin or not pin.enabled():
+            return wrapped(*args, **kwargs)
+        return trace_coalesced(
+            pin.tracer, config.flask['hook_span_threshold'], metric, name, wrapped, args, kwargs, service=pin.service,
+        )
+
+    return trace_func(func)
+
+
 def wrap_signal(app, signal, func):
     """
     Helper used to wrap signal handlers
 
     We will attempt to find the pin attached to the flask.app.Flask app
+
+    Like hooks, signal handlers faster than ``config.flask['hook_span_threshold']`` are measured
+    on the request span instead of being traced
     """
     name = func_name(func)
+    metric = 'flask.signal.duration.{}.{}'.format(signal, name)
+    tags = {'flask.signal': signal}
 
     @function_wrapper
     def trace_func(wrapped, instance, args, kwargs):
@@ -39,8 +68,9 @@ def wrap_signal(app, signal, func):
         if not pin or not pin.enabled():
             return wrapped(*args, **kwargs)
 
-        with pin.tracer.trace(name, service=pin.service) as span:
-            span.set_tag('flask.signal', signal)
-            return wrapped(*args, **kwargs)
+        return trace_coalesced(
+            pin.tracer, config.flask['hook_span_threshold'], metric, name, wrapped, args, kwargs,
+            service=pin.service, tags=tags,
+        )
 
     return trace_func(func)
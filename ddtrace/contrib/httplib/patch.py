@@ -2,10 +2,10 @@
 from ddtrace.vendor import wrapt
 
 # Project
-from ...compat import PY2, httplib, parse
+from ...compat import PY2, httplib
 from ...constants import ANALYTICS_SAMPLE_RATE_KEY, SPAN_MEASURED_KEY
 from ...ext import SpanTypes, http as ext_http
-from ...http import store_request_headers, store_response_headers
+from ...http import defer_request_headers, defer_response_headers, defer_url
 from ...internal.logger import get_logger
 from ...pin import Pin
 from ...settings import config
@@ -39,7 +39,7 @@ def _wrap_getresponse(func, instance, args, kwargs):
                 if resp:
                     span.set_tag(ext_http.STATUS_CODE, resp.status)
                     span.error = int(500 <= resp.status)
-                    store_response_headers(dict(resp.getheaders()), span, config.httplib)
+                    defer_response_headers(resp.getheaders(), span, config.httplib)
 
                 span.finish()
                 delattr(instance, '_datadog_span')
@@ -67,21 +67,9 @@ def _wrap_putrequest(func, instance, args, kwargs):
             port = ''
         url = '{scheme}://{host}{port}{path}'.format(scheme=scheme, host=instance.host, port=port, path=path)
 
-        # sanitize url
-        parsed = parse.urlparse(url)
-        sanitized_url = parse.urlunparse((
-            parsed.scheme,
-            parsed.netloc,
-            parsed.path,
-            parsed.params,
-            None,  # drop query
-            parsed.fragment
-        ))
-
-        span.set_tag(ext_http.URL, sanitized_url)
+        # sanitize url, only for the traces that are sent
+        defer_url(url, span, config.httplib)
         span.set_tag(ext_http.METHOD, method)
-        if config.httplib.trace_query_string:
-            span.set_tag(ext_http.QUERY_STRING, parsed.query)
 
         # set analytics sample rate
         span.set_tag(
@@ -96,7 +84,7 @@ def _wrap_putrequest(func, instance, args, kwargs):
 def _wrap_putheader(func, instance, args, kwargs):
     span = getattr(instance, '_datadog_span', None)
     if span:
-        store_request_headers({args[0]: args[1]}, span, config.httplib)
+        defer_request_headers({args[0]: args[1]}, span, config.httplib)
 
     return func(*args, **kwargs)
 
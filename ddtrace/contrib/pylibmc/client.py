@@ -119,6 +119,13 @@ class TracedClient(ObjectProxy):
             if span and pre:
                 span.set_tag(memcached.QUERY, '%s %s' % (method_name, pre))
 
+            # summarize the keys instead of tagging each of them
+            if span and args:
+                try:
+                    span.set_metrics(memcached.get_multi_metrics(args[0]))
+                except Exception:
+                    log.debug('error summarizing keys', exc_info=True)
+
             return method(*args, **kwargs)
 
     @contextmanager
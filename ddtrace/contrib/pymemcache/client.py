@@ -22,6 +22,8 @@ from ...settings import config
 
 log = get_logger(__name__)
 
+QUERY_MAX_LEN = 1000
+QUERY_TOO_LONG_MARK = '...'
 
 # keep a reference to the original unpatched clients
 _Client = Client
@@ -157,6 +159,8 @@ class WrappedClient(wrapt.ObjectProxy):
                 vals = _get_query_string(args)
                 query = '{}{}{}'.format(method_name, ' ' if vals else '', vals)
                 span.set_tag(memcachedx.QUERY, query)
+                if args and type(args[0]) in (list, dict):
+                    span.set_metrics(memcachedx.get_multi_metrics(args[0]))
             except Exception:
                 log.debug('Error setting relevant pymemcache tags')
 
@@ -192,7 +196,7 @@ def _get_query_string(args):
     """Return the query values given the arguments to a pymemcache command.
 
     If there are multiple query values, they are joined together
-    space-separated.
+    space-separated until the query reaches ``QUERY_MAX_LEN``.
     """
     keys = ''
 
@@ -203,18 +207,29 @@ def _get_query_string(args):
     # pull out the first arg which will contain any key
     arg = args[0]
 
-    # if we get a dict, convert to list of keys
-    if type(arg) is dict:
-        arg = list(arg)
-
     if type(arg) is str:
         keys = arg
     elif type(arg) is bytes:
         keys = arg.decode()
-    elif type(arg) is list and len(arg):
-        if type(arg[0]) is str:
-            keys = ' '.join(arg)
-        elif type(arg[0]) is bytes:
-            keys = b' '.join(arg).decode()
+    elif type(arg) in (list, dict) and len(arg):
+        keys = _join_keys(arg)
 
     return keys
+
+
+def _join_keys(keys):
+    """Join the keys of a multi-key command, only decoding the ones that fit in ``QUERY_MAX_LEN``."""
+    out = []
+    length = 0
+    for key in keys:
+        if type(key) is bytes:
+            key = key.decode()
+        elif type(key) is not str:
+            return ''
+        if length + len(key) > QUERY_MAX_LEN:
+            out.append(key[:QUERY_MAX_LEN - length] + QUERY_TOO_LONG_MARK)
+            break
+        out.append(key)
+        # DEV: Count the space separating the keys
+        length += len(key) + 1
+    return ' '.join(out)
@@ -1,4 +1,3 @@
-import ctypes
 import struct
 
 # 3p
@@ -32,10 +31,35 @@ OP_CODES = {
     2013: 'msg',
 }
 
-# The maximum message length we'll try to parse
-MAX_MSG_PARSE_LEN = 1024 * 1024
-
 header_struct = struct.Struct('<iiii')
+int32_struct = struct.Struct('<i')
+
+# BSON types: http://bsonspec.org/spec.html
+BSON_STRING = 0x02
+BSON_DOCUMENT = 0x03
+BSON_ARRAY = 0x04
+BSON_BOOLEAN = 0x08
+
+# Size of the BSON values that don't start with their size
+BSON_FIXED_SIZES = {
+    0x01: 8,  # double
+    0x06: 0,  # undefined
+    0x07: 12,  # ObjectId
+    BSON_BOOLEAN: 1,
+    0x09: 8,  # UTC datetime
+    0x0A: 0,  # null
+    0x10: 4,  # int32
+    0x11: 8,  # timestamp
+    0x12: 8,  # int64
+    0x13: 16,  # decimal128
+    0x7F: 0,  # max key
+    0xFF: 0,  # min key
+}
+
+# OP_MSG flag telling the message ends with a checksum
+MSG_CHECKSUM_PRESENT = 1
+
+CODEC_OPTIONS = CodecOptions(SON)
 
 
 class Command(object):
@@ -88,7 +112,7 @@ def parse_msg(msg_bytes):
         # NOTE[matt] inserts, updates and queries can all use this opcode
 
         offset += 4  # skip flags
-        ns = _cstring(msg_bytes[offset:])
+        ns = _cstring(msg_bytes, offset)
         offset += len(ns) + 1  # include null terminator
 
         # note: here coll could be '$cmd' because it can be overridden in the
@@ -96,25 +120,15 @@ def parse_msg(msg_bytes):
         db, coll = _split_namespace(ns)
 
         offset += 8  # skip numberToSkip & numberToReturn
-        if msg_len <= MAX_MSG_PARSE_LEN:
-            # FIXME[matt] don't try to parse large messages for performance
-            # reasons. ideally we'd just peek at the first bytes to get
-            # the critical info (op type, collection, query, # of docs)
-            # rather than parse the whole thing. i suspect only massive
-            # inserts will be affected.
-            codec = CodecOptions(SON)
-            spec = next(bson.decode_iter(msg_bytes[offset:], codec_options=codec))
-            cmd = parse_spec(spec, db)
-        else:
-            # let's still note that a command happened.
-            cmd = Command('command', db, 'untraced_message_too_large')
+        cmd = parse_document(msg_bytes, offset, db)
 
         # If the command didn't contain namespace info, set it here.
-        if not cmd.coll:
+        if cmd and not cmd.coll:
             cmd.coll = coll
     elif op == 'msg':
-        # Skip header and flag bits
+        flags = int32_struct.unpack_from(msg_bytes, offset)[0]
         offset += 4
+        end = msg_len - 4 if flags & MSG_CHECKSUM_PRESENT else msg_len
 
         # Parse the msg kind
         kind = ord(msg_bytes[offset:offset + 1])
@@ -124,13 +138,13 @@ def parse_msg(msg_bytes):
         #   - 0: BSON Object
         #   - 1: Document Sequence
         if kind == 0:
-            if msg_len <= MAX_MSG_PARSE_LEN:
-                codec = CodecOptions(SON)
-                spec = next(bson.decode_iter(msg_bytes[offset:], codec_options=codec))
-                cmd = parse_spec(spec, db)
-            else:
-                # let's still note that a command happened.
-                cmd = Command('command', db, 'untraced_message_too_large')
+            cmd = parse_document(msg_bytes, offset, db)
+            offset += int32_struct.unpack_from(msg_bytes, offset)[0]
+            # The documents of bulk commands are sent in the sections following the command
+            if cmd and cmd.name == 'insert':
+                documents = _count_sequence_documents(msg_bytes, offset, end, b'documents')
+                if documents is not None:
+                    cmd.metrics['mongodb.documents'] = documents
         else:
             # let's still note that a command happened.
             cmd = Command('command', db, 'unsupported_msg_kind')
@@ -192,9 +206,113 @@ def parse_spec(spec, db=None):
     return cmd
 
 
-def _cstring(raw):
-    """ Return the first null terminated cstring from the bufffer. """
-    return ctypes.create_string_buffer(raw).value
+def parse_document(buf, offset, db=None):
+    """ Return a Command that has parsed the relevant detail of the BSON
+        command document at the given offset of the buffer.
+
+        This is equivalent to ``parse_spec`` but, rather than decoding the
+        whole document, only the values of the fields we need are decoded:
+        the other ones, like the documents of an insert, are skipped.
+    """
+    cmd = None
+    spec_db = None
+    for bson_type, key, start, value_start, end in _iter_elements(buf, offset):
+        if cmd is None:
+            # the first element is the command and collection
+            cmd = Command(to_unicode(key), db, _decode_value(buf, bson_type, start, value_start, end))
+        elif key == b'$db':
+            spec_db = _decode_value(buf, bson_type, start, value_start, end)
+        elif key == b'ordered':
+            cmd.tags['mongodb.ordered'] = _decode_value(buf, bson_type, start, value_start, end)
+        elif key == b'documents' and cmd.name == 'insert' and bson_type == BSON_ARRAY:
+            cmd.metrics['mongodb.documents'] = sum(1 for _ in _iter_elements(buf, value_start))
+        elif (
+            (key == b'updates' and cmd.name == 'update') or (key == b'deletes' and cmd.name == 'delete')
+        ) and bson_type == BSON_ARRAY:
+            # FIXME[matt] is there ever more than one here?
+            for item_type, _, _, item_start, item_end in _iter_elements(buf, value_start):
+                if item_type == BSON_DOCUMENT:
+                    item = bson.BSON(buf[item_start:item_end]).decode(codec_options=CODEC_OPTIONS)
+                    cmd.query = item.get('q')
+                break
+
+    if cmd is not None and not cmd.db:
+        cmd.db = spec_db
+    return cmd
+
+
+def _iter_elements(buf, offset):
+    """ Yield the type, key, start offset, value start offset and end offset of
+        the elements of the BSON document at the given offset of the buffer,
+        without decoding them.
+    """
+    # DEV: The document ends with a null byte
+    doc_end = offset + int32_struct.unpack_from(buf, offset)[0] - 1
+    offset += 4
+    while offset < doc_end:
+        bson_type = ord(buf[offset:offset + 1])
+        key_end = buf.index(b'\x00', offset + 1)
+        value_start = key_end + 1
+        end = value_start + _value_size(buf, bson_type, value_start)
+        yield bson_type, buf[offset + 1:key_end], offset, value_start, end
+        offset = end
+
+
+def _value_size(buf, bson_type, offset):
+    """ Return the size of the BSON value of the given type at the given offset of the buffer. """
+    size = BSON_FIXED_SIZES.get(bson_type)
+    if size is not None:
+        return size
+    if bson_type in (BSON_DOCUMENT, BSON_ARRAY, 0x0F):  # code with scope
+        return int32_struct.unpack_from(buf, offset)[0]
+    if bson_type in (BSON_STRING, 0x0D, 0x0E):  # JavaScript code, symbol
+        return 4 + int32_struct.unpack_from(buf, offset)[0]
+    if bson_type == 0x05:  # binary, with its subtype
+        return 5 + int32_struct.unpack_from(buf, offset)[0]
+    if bson_type == 0x0C:  # DBPointer
+        return 4 + int32_struct.unpack_from(buf, offset)[0] + 12
+    if bson_type == 0x0B:  # regular expression, with its options
+        return buf.index(b'\x00', buf.index(b'\x00', offset) + 1) + 1 - offset
+    raise ValueError('unknown BSON type: %s' % bson_type)
+
+
+def _decode_value(buf, bson_type, start, value_start, end):
+    """ Return the value of the BSON element between the given offsets of the buffer. """
+    # DEV: Strings and booleans, the most common values we need, are decoded directly
+    if bson_type == BSON_STRING:
+        return buf[value_start + 4:end - 1].decode('utf-8')
+    if bson_type == BSON_BOOLEAN:
+        return buf[value_start:end] != b'\x00'
+    # Wrap the element in a document of its own to decode it
+    doc = int32_struct.pack(end - start + 5) + buf[start:end] + b'\x00'
+    return next(iter(bson.BSON(doc).decode(codec_options=CODEC_OPTIONS).values()))
+
+
+def _count_sequence_documents(buf, offset, end, identifier):
+    """ Return the number of documents of the OP_MSG document sequence section
+        with the given identifier, ``None`` if there is none.
+    """
+    while offset < end:
+        kind = ord(buf[offset:offset + 1])
+        size = int32_struct.unpack_from(buf, offset + 1)[0]
+        section_end = offset + 1 + size
+        if kind == 1:
+            section_id = _cstring(buf, offset + 5)
+            if section_id == identifier:
+                count = 0
+                offset += 5 + len(section_id) + 1
+                unpack_from = int32_struct.unpack_from
+                while offset < section_end:
+                    offset += unpack_from(buf, offset)[0]
+                    count += 1
+                return count
+        offset = section_end
+    return None
+
+
+def _cstring(buf, offset=0):
+    """ Return the null terminated cstring at the given offset of the bufffer. """
+    return buf[offset:buf.index(b'\x00', offset)]
 
 
 def _split_namespace(ns):
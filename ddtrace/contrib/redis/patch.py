@@ -8,7 +8,7 @@ from ...constants import ANALYTICS_SAMPLE_RATE_KEY, SPAN_MEASURED_KEY
 from ...pin import Pin
 from ...ext import SpanTypes, redis as redisx
 from ...utils.wrappers import unwrap
-from .util import format_command_args, _extract_conn_tags
+from .util import format_command_args, format_pipeline, _extract_conn_tags
 
 
 def patch():
@@ -93,15 +93,14 @@ def traced_execute_pipeline(func, instance, args, kwargs):
     if not pin or not pin.enabled():
         return func(*args, **kwargs)
 
-    # FIXME[matt] done in the agent. worth it?
-    cmds = [format_command_args(c) for c, _ in instance.command_stack]
-    resource = '\n'.join(cmds)
+    resource, metrics = format_pipeline(c for c, _ in instance.command_stack)
     tracer = pin.tracer
     with tracer.trace(redisx.CMD, resource=resource, service=pin.service, span_type=SpanTypes.REDIS) as s:
         s.set_tag(SPAN_MEASURED_KEY)
         s.set_tag(redisx.RAWCMD, resource)
         s.set_tags(_get_tags(instance))
         s.set_metric(redisx.PIPELINE_LEN, len(instance.command_stack))
+        s.set_metrics(metrics)
 
         # set analytics sample rate if enabled
         s.set_tag(
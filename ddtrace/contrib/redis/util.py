@@ -3,7 +3,9 @@ Some utils used by the dogtrace redis integration
 """
 from ...compat import stringify
 from ...ext import redis as redisx, net
+from ...vendor import six
 
+STRING_TYPES = (six.binary_type, six.text_type)
 VALUE_PLACEHOLDER = '?'
 VALUE_MAX_LEN = 100
 VALUE_TOO_LONG_MARK = '...'
@@ -33,6 +35,9 @@ def format_command_args(args):
     out = []
     for arg in args:
         try:
+            # DEV: Only format what can be kept of long values
+            if isinstance(arg, STRING_TYPES) and len(arg) > VALUE_MAX_LEN:
+                arg = arg[:VALUE_MAX_LEN + 1]
             cmd = stringify(arg)
 
             if len(cmd) > VALUE_MAX_LEN:
@@ -50,3 +55,45 @@ def format_command_args(args):
             break
 
     return ' '.join(out)
+
+
+def format_pipeline(commands):
+    """Format the commands of a pipeline and compute its metrics
+
+    Commands are only formatted until the length of the formatted pipeline
+    reaches ``CMD_MAX_LEN``, the others are only counted.
+
+    :param commands: The arguments of each command of the pipeline
+    :return: The formatted commands and the pipeline metrics: the number of
+        commands by name, the total number of arguments and the total length of
+        the string arguments
+    """
+    length = 0
+    out = []
+    counts = {}
+    args_len = 0
+    args_size = 0
+    for args in commands:
+        if length <= CMD_MAX_LEN:
+            cmd = format_command_args(args)
+            if length + len(cmd) > CMD_MAX_LEN:
+                cmd = '%s%s' % (cmd[:CMD_MAX_LEN - length], VALUE_TOO_LONG_MARK)
+            out.append(cmd)
+            # DEV: Count the newline separating the commands
+            length += len(cmd) + 1
+
+        if args:
+            name = args[0]
+            counts[name] = counts.get(name, 0) + 1
+        args_len += len(args)
+        for arg in args:
+            if isinstance(arg, STRING_TYPES):
+                args_size += len(arg)
+
+    metrics = {
+        redisx.ARGS_LEN: args_len,
+        redisx.ARGS_SIZE: args_size,
+    }
+    for name, count in counts.items():
+        metrics['%s.%s' % (redisx.PIPELINE_COMMANDS, stringify(name))] = count
+    return '\n'.join(out), metrics
@@ -9,7 +9,7 @@ from ...pin import Pin
 from ...ext import SpanTypes, redis as redisx
 from ...utils.wrappers import unwrap
 from ..redis.patch import traced_execute_command, traced_pipeline
-from ..redis.util import format_command_args
+from ..redis.util import format_pipeline
 
 
 # DEV: In `2.0.0` `__version__` is a string and `VERSION` is a tuple,
@@ -60,13 +60,13 @@ def traced_execute_pipeline(func, instance, args, kwargs):
     if not pin or not pin.enabled():
         return func(*args, **kwargs)
 
-    cmds = [format_command_args(c.args) for c in instance.command_stack]
-    resource = '\n'.join(cmds)
+    resource, metrics = format_pipeline(c.args for c in instance.command_stack)
     tracer = pin.tracer
     with tracer.trace(redisx.CMD, resource=resource, service=pin.service, span_type=SpanTypes.REDIS) as s:
         s.set_tag(SPAN_MEASURED_KEY)
         s.set_tag(redisx.RAWCMD, resource)
         s.set_metric(redisx.PIPELINE_LEN, len(instance.command_stack))
+        s.set_metrics(metrics)
 
         # set analytics sample rate if enabled
         s.set_tag(
@@ -1,6 +1,6 @@
 import ddtrace
 from ddtrace import config
-from ddtrace.http import store_request_headers, store_response_headers
+from ddtrace.http import defer_request_headers, defer_response_headers, defer_url
 
 from ...compat import parse
 from ...constants import ANALYTICS_SAMPLE_RATE_KEY, SPAN_MEASURED_KEY
@@ -51,21 +51,13 @@ def _wrap_send(func, instance, args, kwargs):
     if not request:
         return func(*args, **kwargs)
 
-    # sanitize url of query
-    parsed_uri = parse.urlparse(request.url)
-    hostname = parsed_uri.hostname
-    if parsed_uri.port:
-        hostname = "{}:{}".format(hostname, parsed_uri.port)
-    sanitized_url = parse.urlunparse(
-        (
-            parsed_uri.scheme,
-            parsed_uri.netloc,
-            parsed_uri.path,
-            parsed_uri.params,
-            None,  # drop parsed_uri.query
-            parsed_uri.fragment,
-        )
-    )
+    # DEV: The hostname is only needed to name the service after it
+    hostname = None
+    if config.get_from(instance)["split_by_domain"]:
+        parsed_uri = parse.urlparse(request.url)
+        hostname = parsed_uri.hostname
+        if parsed_uri.port:
+            hostname = "{}:{}".format(hostname, parsed_uri.port)
 
     with tracer.trace("requests.request", span_type=SpanTypes.HTTP) as span:
         span.set_tag(SPAN_MEASURED_KEY)
@@ -85,31 +77,26 @@ def _wrap_send(func, instance, args, kwargs):
             propagator.inject(span.context, request.headers)
 
         # Storing request headers in the span
-        store_request_headers(request.headers, span, config.requests)
+        defer_request_headers(request.headers, span, config.requests)
 
         response = None
         try:
             response = func(*args, **kwargs)
-
-            # Storing response headers in the span. Note that response.headers is not a dict, but an iterable
-            # requests custom structure, that we convert to a dict
-            if hasattr(response, "headers"):
-                store_response_headers(dict(response.headers), span, config.requests)
             return response
         finally:
             try:
                 span.set_tag(http.METHOD, request.method.upper())
-                span.set_tag(http.URL, sanitized_url)
-                if config.requests.trace_query_string:
-                    span.set_tag(http.QUERY_STRING, parsed_uri.query)
+                # DEV: Parsing the URL and filtering the headers is only done for the traces that are sent
+                defer_url(request.url, span, config.requests)
                 if response is not None:
                     span.set_tag(http.STATUS_CODE, response.status_code)
                     # `span.error` must be an integer
                     span.error = int(500 <= response.status_code)
                     # Storing response headers in the span.
                     # Note that response.headers is not a dict, but an iterable
-                    # requests custom structure, that we convert to a dict
-                    response_headers = dict(getattr(response, "headers", {}))
-                    store_response_headers(response_headers, span, config.requests)
+                    # requests custom structure, converted to a dict when the tags are computed
+                    response_headers = getattr(response, "headers", None)
+                    if response_headers is not None:
+                        defer_response_headers(response_headers, span, config.requests)
             except Exception:
                 log.debug("requests: error adding tags", exc_info=True)
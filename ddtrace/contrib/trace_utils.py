@@ -0,0 +1,59 @@
+"""
+Helpers shared by the integrations to trace framework internals.
+"""
+import sys
+
+from ..compat import time_ns
+
+
+def trace_coalesced(tracer, threshold, metric, name, func, args, kwargs, service=None, resource=None, tags=None):
+    """Call a function and trace it only if it is slow.
+
+    Frameworks call a lot of short functions for each request, like middleware or hooks. Tracing
+    each of them in its own span is costly, so they can be measured instead: the duration of a
+    call faster than ``threshold`` milliseconds is added to the ``metric`` metric of the local root
+    span, e.g. the request span. Slower calls, and calls raising an exception, are traced in a span
+    created once they return.
+
+    As the span of a slow call is only created when it returns, the spans started during the call
+    are children of the enclosing span.
+
+    :param tracer: The tracer to use.
+    :param threshold: Duration in milliseconds above which a call is traced, ``None`` to always trace it.
+    :param metric: The metric to add the duration in seconds of fast calls to.
+    :param name: The name of the span of slow calls.
+    :param func: The function to call with ``args`` and ``kwargs``.
+    :param service: The service of the span of slow calls.
+    :param resource: The resource of the span of slow calls.
+    :param tags: The tags of the span of slow calls.
+    :return: What the function returned.
+    """
+    parent = tracer.current_span() if threshold is not None else None
+    if parent is None:
+        # DEV: Without an active span there is nothing to add the duration to
+        with tracer.trace(name, service=service, resource=resource) as span:
+            if tags:
+                span.set_tags(tags)
+            return func(*args, **kwargs)
+
+    exc_info = None
+    start_ns = time_ns()
+    try:
+        return func(*args, **kwargs)
+    except BaseException:
+        exc_info = sys.exc_info()
+        raise
+    finally:
+        duration_ns = time_ns() - start_ns
+        if exc_info is not None or duration_ns >= threshold * 1e6:
+            span = tracer.start_span(name, child_of=parent, service=service, resource=resource)
+            span.start_ns = start_ns
+            span.duration_ns = duration_ns
+            if tags:
+                span.set_tags(tags)
+            if exc_info is not None:
+                span.set_exc_info(*exc_info)
+            span.finish()
+        else:
+            root = parent.context.get_current_root_span() or parent
+            root.set_metric(metric, (root.get_metric(metric) or 0) + duration_ns / 1e9)
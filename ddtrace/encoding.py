@@ -93,14 +93,106 @@ class MsgpackEncoder(_EncoderBase):
         buf = b''.join(objs)
 
         # Prepend array header to buffer
+        return MsgpackEncoder.array_header(len(objs)) + buf
+
+    @staticmethod
+    def array_header(count):
+        """Get the msgpack array header for an array of ``count`` items"""
         # https://github.com/msgpack/msgpack-python/blob/f46523b1af7ff2d408da8500ea36a4f9f2abe915/msgpack/fallback.py#L948-L955
-        count = len(objs)
         if count <= 0xf:
-            return struct.pack('B', 0x90 + count) + buf
+            return struct.pack('B', 0x90 + count)
         elif count <= 0xffff:
-            return struct.pack('>BH', 0xdc, count) + buf
+            return struct.pack('>BH', 0xdc, count)
         else:
-            return struct.pack('>BI', 0xdd, count) + buf
+            return struct.pack('>BI', 0xdd, count)
+
 
+class StreamingMsgpackEncoder(MsgpackEncoder):
+    """
+    Msgpack encoder that writes spans straight into a ``msgpack.Packer`` buffer.
+
+    Unlike ``MsgpackEncoder`` it does not build an intermediate dictionary with
+    ``Span.to_dict()`` for every span: the span fields are packed in the same order and
+    with the same normalization, so the resulting bytes are identical.
+    """
 
-Encoder = MsgpackEncoder
+    def encode_traces(self, traces):
+        packer = msgpack.Packer(autoreset=False)
+        packer.pack_array_header(len(traces))
+        for trace in traces:
+            self._pack_trace(packer, trace)
+        return packer.bytes()
+
+    def encode_trace(self, trace):
+        packer = msgpack.Packer(autoreset=False)
+        self._pack_trace(packer, trace)
+        return packer.bytes()
+
+    @staticmethod
+    def _pack_trace(packer, trace):
+        pack = packer.pack
+        packer.pack_array_header(len(trace))
+        for span in trace:
+            # DEV: keep the fields, their order and their normalization in sync with `Span.to_dict()`
+            start_ns = span.start_ns
+            duration_ns = span.duration_ns
+            base_meta, meta = span._get_meta_layers()
+            meta_len = len(meta)
+            if base_meta:
+                meta_len += sum(1 for key in base_meta if key not in meta)
+            metrics = span.metrics
+            span_type = span.span_type
+            error = span.error
+            # a common mistake is to set the error field to a boolean instead of an int
+            if error is True:
+                error = 1
+
+            packer.pack_map_header(
+                7 + bool(start_ns) + bool(duration_ns) + bool(meta_len) + bool(metrics) + bool(span_type)
+            )
+            pack('trace_id')
+            # ensure 128 bit trace IDs are always trimmed
+            pack(span.trace_id & _TRACE_ID_MASK)
+            pack('parent_id')
+            pack(span.parent_id)
+            pack('span_id')
+            pack(span.span_id)
+            pack('service')
+            pack(span.service)
+            pack('resource')
+            pack(span.resource)
+            pack('name')
+            pack(span.name)
+            pack('error')
+            pack(error)
+            if start_ns:
+                pack('start')
+                pack(start_ns)
+            if duration_ns:
+                pack('duration')
+                pack(duration_ns)
+            if meta_len:
+                pack('meta')
+                if base_meta:
+                    # DEV: Pack the tags in the order of `dict(base_meta)` updated with `meta`, without building it
+                    packer.pack_map_header(meta_len)
+                    for key, value in base_meta.items():
+                        pack(key)
+                        pack(meta.get(key, value))
+                    for key, value in meta.items():
+                        if key not in base_meta:
+                            pack(key)
+                            pack(value)
+                else:
+                    pack(meta)
+            if metrics:
+                pack('metrics')
+                pack(metrics)
+            if span_type:
+                pack('type')
+                pack(span_type)
+
+
+_TRACE_ID_MASK = 0xffffffffffffffff
+
+Encoder = StreamingMsgpackEncoder
@@ -1,3 +1,4 @@
+from ..compat import iteritems
 from ..utils.formats import flatten_dict
 
 
@@ -19,19 +20,42 @@ def truncate_arg_value(value, max_len=1024):
 
 def add_span_arg_tags(span, endpoint_name, args, args_names, args_traced):
     if endpoint_name not in BLACKLIST_ENDPOINT:
-        blacklisted = BLACKLIST_ENDPOINT_TAGS.get(endpoint_name, [])
-        tags = dict(
-            (name, value)
-            for (name, value) in zip(args_names, args)
-            if name in args_traced
+        span.set_tags(_get_arg_tags(endpoint_name, _get_traced_args(args, args_names, args_traced)))
+
+
+def defer_span_arg_tags(span, endpoint_name, args, args_names, args_traced):
+    """Like `add_span_arg_tags`, but only flatten the arguments once the tags of the span are read."""
+    if endpoint_name not in BLACKLIST_ENDPOINT:
+        # DEV: Copy the parameters, which can be updated by the client while the call is made
+        traced_args = dict(
+            (name, dict(value) if isinstance(value, dict) else value)
+            for name, value in iteritems(_get_traced_args(args, args_names, args_traced))
         )
-        tags = flatten_dict(tags)
-        tags = {
-            k: truncate_arg_value(v)
-            for k, v in tags.items()
-            if k not in blacklisted
-        }
-        span.set_tags(tags)
+        # Don't keep the blacklisted values, like the body of S3 objects, until the tags are computed
+        for tag in BLACKLIST_ENDPOINT_TAGS.get(endpoint_name, []):
+            name, _, key = tag.partition('.')
+            value = traced_args.get(name)
+            if isinstance(value, dict):
+                value.pop(key, None)
+        span._defer_tags(_get_arg_tags, endpoint_name, traced_args)
+
+
+def _get_traced_args(args, args_names, args_traced):
+    return dict(
+        (name, value)
+        for (name, value) in zip(args_names, args)
+        if name in args_traced
+    )
+
+
+def _get_arg_tags(endpoint_name, traced_args):
+    blacklisted = BLACKLIST_ENDPOINT_TAGS.get(endpoint_name, [])
+    tags = flatten_dict(traced_args)
+    return {
+        k: truncate_arg_value(v)
+        for k, v in tags.items()
+        if k not in blacklisted
+    }
 
 
 REGION = 'aws.region'
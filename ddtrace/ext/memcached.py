@@ -1,4 +1,5 @@
 from . import SpanTypes
+from ..vendor import six
 
 # [TODO] Deprecated, remove when we remove AppTypes
 TYPE = SpanTypes.CACHE
@@ -6,3 +7,19 @@ TYPE = SpanTypes.CACHE
 CMD = 'memcached.command'
 SERVICE = 'memcached'
 QUERY = 'memcached.query'
+KEYS_LEN = 'memcached.keys_length'
+VALUES_SIZE = 'memcached.values_size'
+
+
+def get_multi_metrics(keys):
+    """Return the metrics summarizing the keys, and the values if any, of a multi-key command.
+
+    :param keys: The keys of the command, or a dictionary of the keys and values to store
+    :rtype: dict
+    """
+    metrics = {KEYS_LEN: len(keys)}
+    if isinstance(keys, dict):
+        metrics[VALUES_SIZE] = sum(
+            len(value) for value in keys.values() if isinstance(value, (six.binary_type, six.text_type))
+        )
+    return metrics
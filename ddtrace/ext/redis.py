@@ -17,3 +17,5 @@ CMD = 'redis.command'
 ARGS_LEN = 'redis.args_length'
 PIPELINE_LEN = 'redis.pipeline_length'
 PIPELINE_AGE = 'redis.pipeline_age'
+PIPELINE_COMMANDS = 'redis.pipeline_commands'
+ARGS_SIZE = 'redis.args_size'
@@ -31,7 +31,10 @@ def get_correlation_ids(tracer=None):
     if not tracer.enabled:
         return None, None
 
-    span = tracer.current_span()
+    # DEV: This is called for each log record when logs injection is enabled: read the current span of the
+    #      context without taking its lock, like ``Tracer.current_span`` would with ``Context.get_current_span``
+    ctx = tracer.get_call_context()
+    span = ctx._current_span if ctx else None
     if not span:
         return None, None
     return span.trace_id, span.span_id
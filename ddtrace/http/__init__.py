@@ -1,6 +1,11 @@
-from .headers import store_request_headers, store_response_headers
+from .headers import defer_request_headers, defer_response_headers, store_request_headers, store_response_headers
+from .url import defer_url, strip_query_string
 
 __all__ = [
+    'defer_request_headers',
+    'defer_response_headers',
+    'defer_url',
     'store_request_headers',
     'store_response_headers',
+    'strip_query_string',
 ]
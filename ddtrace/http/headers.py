@@ -40,6 +40,52 @@ def store_response_headers(headers, span, integration_config):
     _store_headers(headers, span, integration_config, RESPONSE)
 
 
+def defer_request_headers(headers, span, integration_config):
+    """
+    Store request headers as a span's tags once its tags are read, see :meth:`ddtrace.span.Span._defer_tags`
+    :param headers: All the request's http headers, will be filtered through the whitelist
+    :type headers: dict or list
+    :param span: The Span instance where tags will be stored
+    :type span: ddtrace.Span
+    :param integration_config: An integration specific config object.
+    :type integration_config: ddtrace.settings.IntegrationConfig
+    """
+    _defer_headers(headers, span, integration_config, REQUEST)
+
+
+def defer_response_headers(headers, span, integration_config):
+    """
+    Store response headers as a span's tags once its tags are read, see :meth:`ddtrace.span.Span._defer_tags`
+    :param headers: All the response's http headers, will be filtered through the whitelist
+    :type headers: dict or list
+    :param span: The Span instance where tags will be stored
+    :type span: ddtrace.Span
+    :param integration_config: An integration specific config object.
+    :type integration_config: ddtrace.settings.IntegrationConfig
+    """
+    _defer_headers(headers, span, integration_config, RESPONSE)
+
+
+def _defer_headers(headers, span, integration_config, request_or_response):
+    """
+    :param headers: A dict of http headers to be stored in the span
+    :type headers: dict or list
+    :param span: The Span instance where tags will be stored
+    :type span: ddtrace.span.Span
+    :param integration_config: An integration specific config object.
+    :type integration_config: ddtrace.settings.IntegrationConfig
+    """
+    if integration_config is None or not integration_config.is_header_tracing_configured:
+        return
+
+    try:
+        # DEV: Copy the headers as they can be modified before the tags are computed, e.g. when a request is retried
+        headers = dict(headers)
+    except Exception:
+        return
+    span._defer_tags(_get_header_tags, headers, integration_config, request_or_response)
+
+
 def _store_headers(headers, span, integration_config, request_or_response):
     """
     :param headers: A dict of http headers to be stored in the span
@@ -49,21 +95,35 @@ def _store_headers(headers, span, integration_config, request_or_response):
     :param integration_config: An integration specific config object.
     :type integration_config: ddtrace.settings.IntegrationConfig
     """
+    span.set_tags(_get_header_tags(headers, integration_config, request_or_response))
+
+
+def _get_header_tags(headers, integration_config, request_or_response):
+    """
+    :param headers: A dict of http headers to be stored in the span
+    :type headers: dict or list
+    :param integration_config: An integration specific config object.
+    :type integration_config: ddtrace.settings.IntegrationConfig
+    :return: The tags of the traced headers
+    :rtype: dict
+    """
+    tags = {}
     if not isinstance(headers, dict):
         try:
             headers = dict(headers)
         except Exception:
-            return
+            return tags
 
     if integration_config is None:
         log.debug('Skipping headers tracing as no integration config was provided')
-        return
+        return tags
 
     for header_name, header_value in headers.items():
         if not integration_config.header_is_traced(header_name):
             continue
         tag_name = _normalize_tag_name(request_or_response, header_name)
-        span.set_tag(tag_name, header_value)
+        tags[tag_name] = header_value
+    return tags
 
 
 def _normalize_tag_name(request_or_response, header_name):
@@ -0,0 +1,45 @@
+from ..compat import parse
+from ..ext import http
+
+
+def strip_query_string(url):
+    """
+    Split the query string from an URL
+    :param url: The URL
+    :type url: str
+    :return: The URL without its query string, and the query string
+    :rtype: tuple
+    """
+    parsed = parse.urlparse(url)
+    sanitized_url = parse.urlunparse((
+        parsed.scheme,
+        parsed.netloc,
+        parsed.path,
+        parsed.params,
+        None,  # drop query
+        parsed.fragment
+    ))
+    return sanitized_url, parsed.query
+
+
+def defer_url(url, span, integration_config):
+    """
+    Store the URL of a request, without its query string, as a span's tag once its tags are read,
+    see :meth:`ddtrace.span.Span._defer_tags`
+    :param url: The URL of the request
+    :type url: str
+    :param span: The Span instance where tags will be stored
+    :type span: ddtrace.Span
+    :param integration_config: An integration specific config object.
+    :type integration_config: ddtrace.settings.IntegrationConfig
+    """
+    # DEV: Whether the query string is traced is decided now, as the URL would be
+    span._defer_tags(_get_url_tags, url, bool(integration_config.trace_query_string))
+
+
+def _get_url_tags(url, trace_query_string):
+    sanitized_url, query = strip_query_string(url)
+    tags = {http.URL: sanitized_url}
+    if trace_query_string:
+        tags[http.QUERY_STRING] = query
+    return tags
@@ -1,4 +1,5 @@
 import abc
+import collections
 import threading
 from ddtrace.vendor import six
 
@@ -16,6 +17,11 @@ except ImportError:
     CONTEXTVARS_IS_AVAILABLE = False
 
 
+# Immutable reference to the active span of a ``Context`` when a task is created, from which the
+# ``Context`` of the task is created the first time it is needed
+_ContextParent = collections.namedtuple("_ContextParent", ["trace_id", "span_id", "sampling_priority", "span"])
+
+
 class BaseContextManager(six.with_metaclass(abc.ABCMeta)):
     def __init__(self, reset=True):
         if reset:
@@ -91,12 +97,47 @@ class ContextVarContextManager(BaseContextManager):
 
     def get(self):
         ctx = _DD_CONTEXTVAR.get()
-        if not ctx:
+        if ctx.__class__ is _ContextParent:
+            parent = ctx
+            ctx = Context(trace_id=parent.trace_id, span_id=parent.span_id, sampling_priority=parent.sampling_priority)
+            # DEV: Like with `Context.clone`, the span active when the task was created is the current span
+            ctx._current_span = parent.span
+            self.set(ctx)
+        elif not ctx:
             ctx = Context()
             self.set(ctx)
 
         return ctx
 
+    def fork(self):
+        """
+        Make the tasks created until ``unfork`` is called start from the span active in the
+        current ``Context``, without sharing or copying the ``Context`` itself. The tasks
+        inherit an immutable reference to the span, turned into their own ``Context`` the
+        first time they need one, so that tasks that do not trace anything cost nothing.
+
+        :returns: The token to give to ``unfork``, ``None`` if nothing has to be undone
+        """
+        ctx = _DD_CONTEXTVAR.get()
+        if ctx is None or ctx.__class__ is _ContextParent:
+            # The new tasks can share the same reference
+            return None
+
+        with ctx._lock:
+            parent = _ContextParent(
+                ctx._parent_trace_id, ctx._parent_span_id, ctx._sampling_priority, ctx._current_span
+            )
+        return _DD_CONTEXTVAR.set(parent)
+
+    def unfork(self, token):
+        """
+        Make the ``Context`` active before ``fork`` was called active again.
+
+        :param token: The token returned by ``fork``
+        """
+        if token is not None:
+            _DD_CONTEXTVAR.reset(token)
+
     def reset(self):
         _DD_CONTEXTVAR.set(None)
 
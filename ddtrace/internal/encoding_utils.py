@@ -0,0 +1,34 @@
+"""
+Helpers to reason about the encoded size of traces, shared by the context and the writer.
+"""
+
+# Rough encoded size of a span without its tags, and of a tag without its value
+SPAN_SIZE_ESTIMATE = 150
+TAG_SIZE_ESTIMATE = 30
+
+
+def estimate_size(trace):
+    """Cheaply estimate the number of bytes a trace takes once encoded.
+
+    :param trace: A list of :class:`ddtrace.span.Span`
+    :rtype: int
+    """
+    size = 0
+    try:
+        for span in trace:
+            # DEV: Don't compute the deferred tags, they are only computed for the traces that are sent,
+            #      and don't merge the tags shared with other spans
+            meta = span._meta
+            tags = len(meta) + len(span.metrics)
+            size += sum(map(len, meta.values()))
+            base_meta = span._base_meta
+            if base_meta:
+                for key, value in base_meta.items():
+                    if key not in meta:
+                        tags += 1
+                        size += len(value)
+            size += SPAN_SIZE_ESTIMATE + TAG_SIZE_ESTIMATE * tags
+    except (AttributeError, TypeError):
+        # Not a list of spans, or a span with non string tag values
+        pass
+    return size
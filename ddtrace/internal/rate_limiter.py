@@ -1,5 +1,6 @@
 from __future__ import division
 import threading
+import weakref
 
 from .. import compat
 
@@ -53,10 +54,12 @@ class RateLimiter(object):
         :returns: Whether the current request is allowed or not
         :rtype: :obj:`bool`
         """
-        # Determine if it is allowed
-        allowed = self._is_allowed()
-        # Update counts used to determine effective rate
-        self._update_rate_counts(allowed)
+        # Lock, we need this to be thread safe, the tokens and counters are shared by all threads
+        with self._lock:
+            # Determine if it is allowed
+            allowed = self._is_allowed()
+            # Update counts used to determine effective rate
+            self._update_rate_counts(allowed)
         return allowed
 
     def _update_rate_counts(self, allowed):
@@ -88,15 +91,14 @@ class RateLimiter(object):
         elif self.rate_limit < 0:
             return True
 
-        # Lock, we need this to be thread safe, it should be shared by all threads
-        with self._lock:
-            self._replenish()
+        # DEV: The lock is held by `is_allowed`
+        self._replenish()
 
-            if self.tokens >= 1:
-                self.tokens -= 1
-                return True
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
 
-            return False
+        return False
 
     def _replenish(self):
         # If we are at the max, we do not need to add any more
@@ -140,3 +142,222 @@ class RateLimiter(object):
         )
 
     __str__ = __repr__
+
+
+class _Shard(object):
+    """Token bucket and counters of a single thread of a :class:`ShardedRateLimiter`"""
+
+    __slots__ = (
+        "allowed",
+        "lease_time",
+        "prev_allowed",
+        "prev_total",
+        "prev_window",
+        "thread",
+        "tokens",
+        "total",
+        "window",
+    )
+
+    def __init__(self, thread):
+        self.thread = weakref.ref(thread)
+        # Tokens borrowed from the shared budget, only ever used by the owner thread
+        self.tokens = 0
+        self.lease_time = 0
+        # Counters of the current and previous windows, used to compute the effective rate
+        self.window = self.prev_window = None
+        self.allowed = self.total = 0
+        self.prev_allowed = self.prev_total = 0
+
+    def count(self, window, allowed):
+        if window != self.window:
+            self.prev_window, self.prev_allowed, self.prev_total = self.window, self.allowed, self.total
+            self.window = window
+            self.allowed = self.total = 0
+        if allowed:
+            self.allowed += 1
+        self.total += 1
+
+    def counts(self, window):
+        """Return the number of allowed and total requests of this shard in the given window"""
+        if self.window == window:
+            return self.allowed, self.total
+        if self.prev_window == window:
+            return self.prev_allowed, self.prev_total
+        return 0, 0
+
+    def is_alive(self):
+        thread = self.thread()
+        return thread is not None and thread.is_alive()
+
+
+class ShardedRateLimiter(object):
+    """
+    A token bucket rate limiter where each thread takes tokens from its own bucket
+
+    The budget of ``rate_limit`` tokens per second is replenished like for :class:`RateLimiter`, but threads borrow
+    batches of tokens from it and spend them without taking any lock. The lock is only taken once per batch, and a
+    thread denied a token does not take it again until the budget is expected to have a token available.
+
+    Tokens borrowed by a thread and not used within ``LEASE_DURATION`` seconds are discarded, so that a thread that
+    stopped sampling cannot spend an old batch later on. This means the limit is never exceeded, but up to one batch
+    per thread may be left unused: the number of requests allowed in any period is between the one of
+    :class:`RateLimiter` minus ``batch_size`` per thread, and the one of :class:`RateLimiter`.
+
+    The effective rate is computed from per-thread counters over windows of one second.
+
+    DEV: This relies on reading and writing attributes being atomic under the GIL.
+         With gevent, each greenlet gets its own bucket.
+    """
+
+    __slots__ = (
+        "_empty_until",
+        "_last_update",
+        "_local",
+        "_lock",
+        "_shards",
+        "_start",
+        "_tokens",
+        "batch_size",
+        "max_tokens",
+        "rate_limit",
+    )
+
+    # Number of seconds a thread can keep the tokens it borrowed
+    LEASE_DURATION = 0.1
+
+    # Fraction of the rate limit borrowed by a thread at once
+    BATCH_FRACTION = 0.01
+
+    def __init__(self, rate_limit):
+        """
+        Constructor for ShardedRateLimiter
+
+        :param rate_limit: The rate limit to apply for number of requests per second.
+            rate limit > 0 max number of requests to allow per second,
+            rate limit == 0 to disallow all requests,
+            rate limit < 0 to allow all requests
+        :type rate_limit: :obj:`int`
+        """
+        self.rate_limit = rate_limit
+        self.max_tokens = rate_limit
+        self.batch_size = max(1, int(rate_limit * self.BATCH_FRACTION))
+
+        self._start = self._last_update = compat.monotonic()
+        # Tokens of the shared budget, not borrowed by any thread yet
+        self._tokens = rate_limit
+        # Time before which the shared budget is known to have no token
+        self._empty_until = 0
+
+        self._local = threading.local()
+        self._shards = []
+        # Only taken to borrow tokens and to register shards
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        """The number of tokens left in the shared budget, not counting the ones borrowed by threads"""
+        return self._tokens
+
+    def _get_shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                # Forget about the threads that are gone
+                self._shards = [s for s in self._shards if s.is_alive()] + [shard]
+            return shard
+
+    def is_allowed(self):
+        """
+        Check whether the current request is allowed or not
+
+        This method will also reduce the number of available tokens by 1
+
+        :returns: Whether the current request is allowed or not
+        :rtype: :obj:`bool`
+        """
+        shard = self._get_shard()
+        now = compat.monotonic()
+
+        # Rate limit of 0 blocks everything
+        if self.rate_limit == 0:
+            allowed = False
+
+        # Negative rate limit disables rate limiting
+        elif self.rate_limit < 0:
+            allowed = True
+
+        elif shard.tokens >= 1 and now - shard.lease_time < self.LEASE_DURATION:
+            shard.tokens -= 1
+            allowed = True
+
+        elif now < self._empty_until:
+            allowed = False
+
+        else:
+            allowed = self._borrow(shard, now)
+
+        shard.count(int(now - self._start), allowed)
+        return allowed
+
+    def _borrow(self, shard, now):
+        """Borrow a batch of tokens from the shared budget and spend one of them"""
+        with self._lock:
+            # Add more available tokens based on how much time has passed
+            elapsed = now - self._last_update
+            if elapsed > 0:
+                self._last_update = now
+                self._tokens = min(self.max_tokens, self._tokens + (elapsed * self.rate_limit))
+
+            batch = min(self.batch_size, int(self._tokens))
+            if batch < 1:
+                # Do not take the lock again until a token is available
+                self._empty_until = now + (1 - self._tokens) / self.rate_limit
+                shard.tokens = 0
+                return False
+            self._tokens -= batch
+
+        # DEV: Any token left from the previous batch has expired
+        shard.tokens = batch - 1
+        shard.lease_time = now
+        return True
+
+    @property
+    def effective_rate(self):
+        """
+        Return the effective sample rate of this rate limiter
+
+        This is the average of the rates of the last two windows seen by any thread.
+
+        :returns: Effective sample rate value 0.0 <= rate <= 1.0
+        :rtype: :obj:`float``
+        """
+        shards = self._shards
+        windows = [s.window for s in shards if s.window is not None]
+        # No tokens have been seen, effectively 100% sample rate
+        if not windows:
+            return 1.0
+
+        window = max(windows)
+        allowed = total = prev_allowed = prev_total = 0
+        for s in shards:
+            a, t = s.counts(window)
+            allowed += a
+            total += t
+            a, t = s.counts(window - 1)
+            prev_allowed += a
+            prev_total += t
+
+        rate = allowed / total if total else 1.0
+        if not prev_total:
+            return rate
+        return (rate + prev_allowed / prev_total) / 2.0
+
+    def __repr__(self):
+        return "{}(rate_limit={!r}, tokens={!r}, last_update={!r}, effective_rate={!r})".format(
+            self.__class__.__name__, self.rate_limit, self._tokens, self._last_update, self.effective_rate,
+        )
+
+    __str__ = __repr__
@@ -0,0 +1,197 @@
+import random
+
+from .. import compat
+from ..constants import SAMPLING_PRIORITY_KEY
+from ..ext import priority
+from ..utils.formats import get_env
+from .encoding_utils import estimate_size
+
+
+# Reasons for which a trace is kept, used to tag the health metrics
+KEEP_ERROR = "error"
+KEEP_LATENCY = "latency"
+KEEP_PRIORITY = "priority"
+KEEP_INCOMPLETE = "incomplete"
+KEEP_SAMPLED = "sampled"
+
+
+class TailSampler(object):
+    """
+    Sample finished traces once their outcome is known.
+
+    Traces with an error, traces whose root span took longer than the latency threshold of its
+    resource and traces manually kept with ``USER_KEEP`` are always kept. Traces without a local
+    root span, flushed early by partial flushing, are kept too as their outcome is unknown.
+
+    The other traces are buffered for ``window`` seconds and a uniform sample of at most
+    ``rate_limit`` traces per second of them is kept once the window is over. The buffered traces
+    never take more than ``max_size_bytes``: when the budget is reached a random buffered trace
+    is dropped.
+
+    The sampling priority of the kept traces is raised to ``AUTO_KEEP`` so that the agent does not
+    drop the traces rejected by the head sampler.
+
+    DEV: This is only used by the writer thread, so it is not thread-safe.
+    """
+
+    DEFAULT_WINDOW = 5
+    DEFAULT_RATE_LIMIT = int(get_env("trace", "writer_tail_sampling_rate_limit", default=10))
+    DEFAULT_LATENCY_THRESHOLD = float(get_env("trace", "writer_tail_sampling_latency_threshold", default=1.0))
+    DEFAULT_MAX_SIZE_BYTES = 4 * 1000000
+
+    def __init__(
+        self,
+        window=DEFAULT_WINDOW,
+        rate_limit=DEFAULT_RATE_LIMIT,
+        latency_threshold=DEFAULT_LATENCY_THRESHOLD,
+        latency_thresholds=None,
+        max_size_bytes=DEFAULT_MAX_SIZE_BYTES,
+    ):
+        """
+        :param window: Number of seconds the traces that are not kept right away are buffered for.
+        :param rate_limit: Maximum number of traces per second kept among the buffered ones.
+        :param latency_threshold: Duration in seconds above which a trace is kept.
+        :param latency_thresholds: Duration in seconds above which a trace is kept, by resource of its root span.
+        :param max_size_bytes: Maximum estimated size in bytes of the buffered traces.
+        """
+        self.window = window
+        self.rate_limit = rate_limit
+        self.latency_threshold = latency_threshold
+        self.latency_thresholds = dict(latency_thresholds or {})
+        self.max_size_bytes = max_size_bytes
+
+        # Reservoir of buffered traces with their estimated size, and number of traces seen in the window
+        self._buffer = []
+        self._sizes = []
+        self._seen = 0
+        self.size_bytes = 0
+        self._window_start = None
+
+        self.kept = {}
+        self.dropped = 0
+
+    def __repr__(self):
+        return "{}(window={!r}, rate_limit={!r}, latency_threshold={!r}, max_size_bytes={!r})".format(
+            self.__class__.__name__, self.window, self.rate_limit, self.latency_threshold, self.max_size_bytes
+        )
+
+    def recreate(self):
+        """Create a new instance of :class:`TailSampler` using the same settings, without any buffered trace.
+
+        :rtype: :class:`TailSampler`
+        """
+        return self.__class__(
+            window=self.window,
+            rate_limit=self.rate_limit,
+            latency_threshold=self.latency_threshold,
+            latency_thresholds=self.latency_thresholds,
+            max_size_bytes=self.max_size_bytes,
+        )
+
+    def _keep_reason(self, trace):
+        """Return why a trace has to be kept right away, ``None`` if it can be sampled."""
+        for span in trace:
+            if span.error:
+                return KEEP_ERROR
+
+        # DEV: The local root span is the first span of a trace, unless the trace has been partially flushed
+        if not trace or trace[0]._parent is not None:
+            return KEEP_INCOMPLETE
+        root = trace[0]
+
+        if root.metrics.get(SAMPLING_PRIORITY_KEY) == priority.USER_KEEP:
+            return KEEP_PRIORITY
+
+        threshold = self.latency_thresholds.get(root.resource, self.latency_threshold)
+        if threshold is not None and root.duration is not None and root.duration > threshold:
+            return KEEP_LATENCY
+
+        return None
+
+    def _keep(self, reason, count=1):
+        self.kept[reason] = self.kept.get(reason, 0) + count
+
+    @staticmethod
+    def _set_keep_priority(trace):
+        """Make sure the agent keeps a trace rejected by priority sampling."""
+        # DEV: The sampling priority is set on the first span of a trace, see `Context._set_root_tags`
+        sampling_priority = trace[0].metrics.get(SAMPLING_PRIORITY_KEY) if trace else None
+        if sampling_priority is not None and sampling_priority < priority.AUTO_KEEP:
+            trace[0].set_metric(SAMPLING_PRIORITY_KEY, priority.AUTO_KEEP)
+
+    def _add(self, trace, size):
+        """Add a trace to the reservoir of the current window."""
+        self._seen += 1
+        capacity = int(self.rate_limit * self.window)
+        if len(self._buffer) < capacity:
+            self._buffer.append(trace)
+            self._sizes.append(size)
+        else:
+            # Each trace seen in the window has the same probability to be in the reservoir
+            idx = random.randrange(self._seen)
+            # Either the new trace or the one it replaces is dropped
+            self.dropped += 1
+            if idx >= capacity:
+                return
+            self.size_bytes -= self._sizes[idx]
+            self._buffer[idx] = trace
+            self._sizes[idx] = size
+        self.size_bytes += size
+
+        while self.size_bytes > self.max_size_bytes and self._buffer:
+            victim = random.randrange(len(self._buffer))
+            self.size_bytes -= self._sizes[victim]
+            # Swap the dropped trace with the last one so it can be removed in constant time
+            for items in (self._buffer, self._sizes):
+                items[victim] = items[-1]
+                items.pop()
+            self.dropped += 1
+
+    def _release(self):
+        """Empty the reservoir and return its traces."""
+        traces = self._buffer
+        self._keep(KEEP_SAMPLED, len(traces))
+        self._buffer = []
+        self._sizes = []
+        self._seen = 0
+        self.size_bytes = 0
+        return traces
+
+    def process(self, traces, flush=False):
+        """Sample finished traces.
+
+        :param traces: The finished traces to sample.
+        :param flush: Whether to return all the buffered traces, even if the window is not over.
+        :return: The traces to send.
+        """
+        now = compat.monotonic()
+        if self._window_start is None:
+            self._window_start = now
+
+        kept = []
+        for trace in traces:
+            reason = self._keep_reason(trace)
+            if reason is not None:
+                self._keep(reason)
+                kept.append(trace)
+            elif self.rate_limit > 0 and self.window > 0:
+                self._add(trace, estimate_size(trace))
+            else:
+                self.dropped += 1
+
+        if flush or now - self._window_start >= self.window:
+            kept.extend(self._release())
+            self._window_start = now
+
+        for trace in kept:
+            self._set_keep_priority(trace)
+        return kept
+
+    def reset_stats(self):
+        """Reset the stats to 0.
+
+        :return: The number of traces kept by reason and the number of traces dropped.
+        """
+        kept, dropped = self.kept, self.dropped
+        self.kept, self.dropped = {}, 0
+        return kept, dropped
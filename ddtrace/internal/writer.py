@@ -1,20 +1,30 @@
 # stdlib
 import itertools
 import random
+import threading
 import time
+import weakref
 
 from .. import api
 from .. import compat
+from .. import payload
 from .. import _worker
+from ..constants import SAMPLING_PRIORITY_KEY
+from ..ext import priority
 from ..internal.logger import get_logger
+from ..internal.encoding_utils import estimate_size
+from ..internal.tail_sampler import TailSampler
 from ..sampler import BasePrioritySampler
 from ..settings import config
-from ddtrace.vendor.six.moves.queue import Queue, Full, Empty
+from ..utils.formats import asbool, get_env
+from ddtrace.vendor.six.moves.queue import Queue, Empty
 
 log = get_logger(__name__)
 
 
 MAX_TRACES = 1000
+# Budget in bytes for the estimated size of the traces waiting in the queue
+MAX_TRACES_SIZE = int(get_env("trace", "writer_max_buffer_size", default=40 * 1000000))
 
 DEFAULT_TIMEOUT = 5
 LOG_ERR_INTERVAL = 60
@@ -23,6 +33,18 @@ LOG_ERR_INTERVAL = 60
 class AgentWriter(_worker.PeriodicWorkerThread):
 
     QUEUE_PROCESSING_INTERVAL = 1
+    # The interval is doubled after each flush with nothing to send, up to this value
+    QUEUE_PROCESSING_MAX_INTERVAL = 10
+
+    # Flush early, without waiting for the end of the interval, once this many spans or bytes are queued
+    FLUSH_SPANS_THRESHOLD = 10000
+    FLUSH_SIZE_THRESHOLD = payload.Payload.DEFAULT_MAX_PAYLOAD_SIZE
+
+    # Use one buffer per producer thread instead of a queue shared by all threads
+    _per_thread_queue = asbool(get_env("trace", "writer_per_thread_queue", default=False))
+
+    # Decide which traces to send once they are finished, see :class:`ddtrace.internal.tail_sampler.TailSampler`
+    _tail_sampling = asbool(get_env("trace", "writer_tail_sampling", default=False))
 
     def __init__(
         self,
@@ -35,14 +57,21 @@ class AgentWriter(_worker.PeriodicWorkerThread):
         sampler=None,
         priority_sampler=None,
         dogstatsd=None,
+        tail_sampler=None,
     ):
         super(AgentWriter, self).__init__(
             interval=self.QUEUE_PROCESSING_INTERVAL, exit_timeout=shutdown_timeout, name=self.__class__.__name__
         )
-        self._trace_queue = Q(maxsize=MAX_TRACES)
+        if self._per_thread_queue:
+            self._trace_queue = PerThreadQ(maxsize=MAX_TRACES)
+        else:
+            self._trace_queue = Q(maxsize=MAX_TRACES, max_size_bytes=MAX_TRACES_SIZE)
         self._filters = filters
         self._sampler = sampler
         self._priority_sampler = priority_sampler
+        if tail_sampler is None and self._tail_sampling:
+            tail_sampler = TailSampler()
+        self._tail_sampler = tail_sampler
         self._last_error_ts = 0
         self.dogstatsd = dogstatsd
         self.api = api.API(
@@ -51,6 +80,11 @@ class AgentWriter(_worker.PeriodicWorkerThread):
         if hasattr(time, "thread_time"):
             self._last_thread_time = time.thread_time()
         self._started = False
+        # Traces, spans and estimated bytes queued since the last flush
+        # DEV: These are updated without a lock, they are only used to decide when to flush
+        self._pending_traces = 0
+        self._pending_spans = 0
+        self._pending_size = 0
 
     def recreate(self):
         """ Create a new instance of :class:`AgentWriter` using the same settings from this instance
@@ -67,6 +101,8 @@ class AgentWriter(_worker.PeriodicWorkerThread):
             filters=self._filters,
             priority_sampler=self._priority_sampler,
             dogstatsd=self.dogstatsd,
+            # DEV: The buffered traces belong to the parent process which will send them
+            tail_sampler=self._tail_sampler.recreate() if self._tail_sampler is not None else None,
         )
         return writer
 
@@ -83,13 +119,30 @@ class AgentWriter(_worker.PeriodicWorkerThread):
             self.start()
             self._started = True
         if spans:
-            self._trace_queue.put(spans)
+            # DEV: The size is only estimated when the queue enforces a budget in bytes
+            size = self._trace_queue.estimate_size(spans)
+            self._trace_queue.put(spans, size)
+            self._pending_traces += 1
+            self._pending_spans += len(spans)
+            self._pending_size += size
+            if not self._wakeup_requested and (
+                # Wake up an idle writer so it goes back to the default interval
+                self.interval > self.QUEUE_PROCESSING_INTERVAL
+                # Flush before the queue gets full and starts dropping traces
+                or self._pending_traces >= self._trace_queue.maxsize // 2 > 0
+                or self._pending_spans >= self.FLUSH_SPANS_THRESHOLD
+                or self._pending_size >= self.FLUSH_SIZE_THRESHOLD
+            ):
+                self.wakeup()
 
     def flush_queue(self):
         try:
             traces = self._trace_queue.get(block=False)
         except Empty:
-            return
+            # Buffered traces still have to be sent at the end of the tail sampling window
+            if self._tail_sampler is None or not self._tail_sampler.size_bytes:
+                return
+            traces = []
 
         if self._send_stats:
             traces_queue_length = len(traces)
@@ -106,6 +159,17 @@ class AgentWriter(_worker.PeriodicWorkerThread):
         if self._send_stats:
             traces_filtered = len(traces) - traces_queue_length
 
+        if self._tail_sampler is not None:
+            # DEV: The worker is stopped before the last flush, send everything that is buffered
+            traces = self._tail_sampler.process(traces, flush=self._stop.is_set())
+
+        # The agent only computes stats from the traces rejected by priority sampling, skip their deferred tags
+        # DEV: The tail sampler raises the priority of the traces it keeps, this has to be done after it
+        for trace in traces:
+            if get_priority(trace) <= priority.AUTO_REJECT:
+                for span in trace:
+                    span._deferred_tags = None
+
         # If we have data, let's try to send it.
         traces_responses = self.api.send_traces(traces)
         for response in traces_responses:
@@ -133,6 +197,14 @@ class AgentWriter(_worker.PeriodicWorkerThread):
             # Statistics about the filtering
             self._histogram_with_total("datadog.tracer.flush.traces_filtered", traces_filtered)
 
+            # Statistics about the tail sampling
+            if self._tail_sampler is not None:
+                kept, dropped = self._tail_sampler.reset_stats()
+                for reason, count in sorted(kept.items()):
+                    self.dogstatsd.increment("datadog.tracer.tail_sampling.kept", count, tags=["reason:%s" % reason])
+                self.dogstatsd.increment("datadog.tracer.tail_sampling.dropped", dropped)
+                self.dogstatsd.gauge("datadog.tracer.tail_sampling.size_bytes", self._tail_sampler.size_bytes)
+
             # Statistics about API
             self._histogram_with_total("datadog.tracer.api.requests", len(traces_responses))
 
@@ -160,8 +232,18 @@ class AgentWriter(_worker.PeriodicWorkerThread):
         self.dogstatsd.increment("%s.total" % (name,), value, tags=tags)
 
     def run_periodic(self):
+        queue_size_bytes = 0
         if self._send_stats:
             self.dogstatsd.gauge("datadog.tracer.heartbeat", 1)
+            # DEV: The queue is emptied by the flush, so this is the highest usage since the last one
+            queue_size_bytes = self._trace_queue.size_bytes
+
+        pending_traces = self._pending_traces
+        self._pending_traces = self._pending_spans = self._pending_size = 0
+        if pending_traces:
+            self.interval = self.QUEUE_PROCESSING_INTERVAL
+        else:
+            self.interval = min(self.interval * 2, self.QUEUE_PROCESSING_MAX_INTERVAL)
 
         try:
             self.flush_queue()
@@ -172,6 +254,8 @@ class AgentWriter(_worker.PeriodicWorkerThread):
             # Statistics about the rate at which spans are inserted in the queue
             dropped, enqueued, enqueued_lengths = self._trace_queue.reset_stats()
             self.dogstatsd.gauge("datadog.tracer.queue.max_length", self._trace_queue.maxsize)
+            self.dogstatsd.gauge("datadog.tracer.queue.max_size_bytes", self._trace_queue.max_size_bytes)
+            self.dogstatsd.gauge("datadog.tracer.queue.size_bytes", queue_size_bytes)
             self.dogstatsd.increment("datadog.tracer.queue.dropped.traces", dropped)
             self.dogstatsd.increment("datadog.tracer.queue.enqueued.traces", enqueued)
             self.dogstatsd.increment("datadog.tracer.queue.enqueued.spans", enqueued_lengths)
@@ -180,10 +264,11 @@ class AgentWriter(_worker.PeriodicWorkerThread):
         try:
             self.run_periodic()
         finally:
-            if not self._send_stats:
-                return
+            # Close the idle keep-alive connections and stop the upload threads of the API
+            self.api.close()
 
-            self.dogstatsd.increment("datadog.tracer.shutdown")
+            if self._send_stats:
+                self.dogstatsd.increment("datadog.tracer.shutdown")
 
     def _log_error_status(self, response):
         log_level = log.debug
@@ -224,17 +309,38 @@ class AgentWriter(_worker.PeriodicWorkerThread):
         return traces
 
 
+def get_priority(trace):
+    """Get the sampling priority of a trace, ``AUTO_KEEP`` if it has none.
+
+    :param trace: A list of :class:`ddtrace.span.Span`
+    :rtype: int
+    """
+    try:
+        sampling_priority = trace[0].metrics.get(SAMPLING_PRIORITY_KEY)
+    except (AttributeError, IndexError, KeyError, TypeError):
+        return priority.AUTO_KEEP
+    return priority.AUTO_KEEP if sampling_priority is None else sampling_priority
+
+
 class Q(Queue):
     """
     Q is a threadsafe queue that let's you pop everything at once and
-    will randomly overwrite elements when it's over the max size.
+    will drop elements when it's over the max size.
+
+    The queue is limited both by its number of items and by the estimated size in bytes of
+    the traces it holds. When it is full, the item with the lowest sampling priority among a
+    few randomly picked ones is dropped, or the new item if its priority is even lower.
 
     This queue also exposes some statistics about its length, the number of items dropped, etc.
     """
 
-    def __init__(self, maxsize=0):
+    # Number of random items looked at to pick the one to drop
+    DROP_CANDIDATES = 3
+
+    def __init__(self, maxsize=0, max_size_bytes=0):
         # Cannot use super() here because Queue in Python2 is old style class
         Queue.__init__(self, maxsize)
+        self.max_size_bytes = max_size_bytes
         # Number of item dropped (queue full)
         self.dropped = 0
         # Number of items accepted
@@ -242,28 +348,67 @@ class Q(Queue):
         # Cumulative length of accepted items
         self.accepted_lengths = 0
 
-    def put(self, item):
-        try:
-            # Cannot use super() here because Queue in Python2 is old style class
-            Queue.put(self, item, block=False)
-        except Full:
-            # If the queue is full, replace a random item. We need to make sure
-            # the queue is not emptied was emptied in the meantime, so we lock
-            # check qsize value.
-            with self.mutex:
-                qsize = self._qsize()
-                if qsize != 0:
-                    idx = random.randrange(0, qsize)
-                    self.queue[idx] = item
-                    log.warning("Writer queue is full has more than %d traces, some traces will be lost", self.maxsize)
-                    self.dropped += 1
-                    self._update_stats(item)
-                    return
-            # The queue has been emptied, simply retry putting item
-            return self.put(item)
-        else:
-            with self.mutex:
-                self._update_stats(item)
+    def put(self, item, size=None):
+        """Put an item in the queue, dropping items if it is full.
+
+        :param item: The item to add.
+        :param size: The estimated size of the item in bytes, computed with ``estimate_size`` if not given.
+        """
+        # Compute these outside of the lock
+        item_size = self.estimate_size(item) if size is None else size
+        item_priority = get_priority(item)
+
+        with self.mutex:
+            self._update_stats(item)
+            if not self._make_room(item_size, item_priority):
+                self._drop()
+                return
+            self.queue.append(item)
+            self._sizes.append(item_size)
+            self._priorities.append(item_priority)
+            self.size_bytes += item_size
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def estimate_size(self, item):
+        """Estimate the size of an item in bytes, ``0`` if the size in bytes of the queue is not limited.
+
+        :param item: The item to measure.
+        :rtype: int
+        """
+        return estimate_size(item) if self.max_size_bytes > 0 else 0
+
+    def _is_full(self, item_size):
+        return (0 < self.maxsize <= len(self.queue)) or (0 < self.max_size_bytes < self.size_bytes + item_size)
+
+    def _make_room(self, item_size, item_priority):
+        """Drop queued items until the new item fits, preferring items with a low sampling priority.
+
+        self.mutex needs to be locked.
+
+        :return: Whether the new item can be added.
+        """
+        if 0 < self.max_size_bytes < item_size:
+            return False
+
+        while self._is_full(item_size):
+            qsize = len(self.queue)
+            candidates = random.sample(range(qsize), min(qsize, self.DROP_CANDIDATES))
+            idx = min(candidates, key=self._priorities.__getitem__)
+            if item_priority < self._priorities[idx]:
+                return False
+
+            # Swap the dropped item with the last one so it can be removed in constant time
+            self.size_bytes -= self._sizes[idx]
+            for items in (self.queue, self._sizes, self._priorities):
+                items[idx] = items[-1]
+                items.pop()
+            self._drop()
+        return True
+
+    def _drop(self):
+        log.warning("Writer queue is full has more than %d traces, some traces will be lost", self.maxsize)
+        self.dropped += 1
 
     def _update_stats(self, item):
         # self.mutex needs to be locked to make sure we don't lose data when resetting
@@ -284,7 +429,202 @@ class Q(Queue):
             self.dropped, self.accepted, self.accepted_lengths = 0, 0, 0
         return dropped, accepted, accepted_lengths
 
+    def _init(self, maxsize):
+        self.queue = []
+        # Estimated size in bytes and sampling priority of each item of the queue
+        self._sizes = []
+        self._priorities = []
+        self.size_bytes = 0
+
     def _get(self):
         things = self.queue
         self._init(self.maxsize)
         return things
+
+
+class _ThreadBuffer(object):
+    """Items and statistics of a single producer thread of a :class:`PerThreadQ`."""
+
+    __slots__ = ("items", "lock", "thread", "dropped", "accepted", "accepted_lengths")
+
+    def __init__(self, thread):
+        self.items = []
+        # Taken to overwrite or remove items, appending is lock-free
+        self.lock = threading.Lock()
+        self.thread = weakref.ref(thread)
+        # Counters are only ever incremented by the owner thread
+        self.dropped = 0
+        self.accepted = 0
+        self.accepted_lengths = 0
+
+    @property
+    def stats(self):
+        return self.dropped, self.accepted, self.accepted_lengths
+
+    def is_alive(self):
+        thread = self.thread()
+        return thread is not None and thread.is_alive()
+
+
+class PerThreadQ(object):
+    """
+    PerThreadQ is an alternative to :class:`Q` where each producer thread appends to its own
+    buffer, so putting an item never takes a lock shared with the other threads. The consumer
+    drains all the buffers at once with ``get``.
+
+    Like :class:`Q`, a random item is overwritten when the queue holds more than ``maxsize``
+    items and the same statistics are exposed through ``reset_stats``. The item overwritten is
+    taken from the buffer of the thread putting the item when it is not empty.
+
+    Unlike :class:`Q`, this queue is only limited by its number of items: it does not enforce
+    a budget on the size in bytes of the traces it holds.
+
+    DEV: This relies on ``list.append``, slicing and ``del`` being atomic under the GIL. As
+         the size check and the append are not done atomically, concurrent producers can make
+         the queue go over ``maxsize`` by at most one item each.
+         Overwriting an item and draining a buffer are done under the lock of the buffer, so an
+         item put while its buffer is drained cannot be lost. That lock is only shared with the
+         consumer and with producers of a full queue.
+         With gevent, each greenlet gets its own buffer.
+    """
+
+    # The size in bytes of the queue is not limited
+    max_size_bytes = 0
+
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._buffers = []
+        # The `items` list of each buffer, to compute the queue size quickly
+        self._lists = []
+        # Only taken to register or retire buffers, and to compute statistics
+        self._lock = threading.Lock()
+        self._retired_stats = (0, 0, 0)
+        self._reported_stats = (0, 0, 0)
+
+    def _get_buffer(self):
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buf = self._local.buffer = _ThreadBuffer(threading.current_thread())
+            with self._lock:
+                self._buffers = self._buffers + [buf]
+                self._lists = self._lists + [buf.items]
+            return buf
+
+    def qsize(self):
+        return sum(map(len, self._lists))
+
+    @property
+    def size_bytes(self):
+        """The estimated size in bytes of the items of the queue.
+
+        DEV: This is computed on demand by iterating over all the items of the queue.
+        """
+        return sum(estimate_size(item) for items in self._lists for item in items[:])
+
+    @staticmethod
+    def estimate_size(item):
+        """The size in bytes of this queue is not limited, items are not measured.
+
+        :param item: The item to measure.
+        :rtype: int
+        """
+        return 0
+
+    def put(self, item, size=None):
+        """Put an item in the buffer of the current thread, dropping an item if the queue is full.
+
+        :param item: The item to add.
+        :param size: Ignored, the size in bytes of this queue is not limited.
+        """
+        buf = self._get_buffer()
+        if 0 < self.maxsize <= sum(map(len, self._lists)):
+            victim = buf if buf.items else max(self._buffers, key=lambda b: len(b.items))
+            with victim.lock:
+                victims = victim.items
+                if victims:
+                    victims[random.randrange(0, len(victims))] = item
+                else:
+                    # The buffer has been drained in the meantime, simply add the item
+                    victim = None
+            if victim is None:
+                buf.items.append(item)
+            else:
+                log.warning("Writer queue is full has more than %d traces, some traces will be lost", self.maxsize)
+                buf.dropped += 1
+        else:
+            buf.items.append(item)
+
+        buf.accepted += 1
+        if hasattr(item, "__len__"):
+            buf.accepted_lengths += len(item)
+        else:
+            buf.accepted_lengths += 1
+
+    def get(self, block=False):
+        """Get all the items of all the thread buffers.
+
+        :param block: Ignored, this queue never blocks.
+        :raises Empty: If there is no item in the queue.
+        """
+        things = []
+        retired = []
+        for buf in self._buffers:
+            items = buf.items
+            if items:
+                with buf.lock:
+                    # DEV: Producers only append at the end without the lock so the first `count` items are ours to take
+                    count = len(items)
+                    things.extend(items[:count])
+                    del items[:count]
+            elif not buf.is_alive():
+                retired.append(buf)
+
+        if retired:
+            with self._lock:
+                for buf in retired:
+                    # DEV: The thread may have put items between the size check and its end
+                    with buf.lock:
+                        things.extend(buf.items)
+                        del buf.items[:]
+                    self._retired_stats = tuple(a + b for a, b in zip(self._retired_stats, buf.stats))
+                self._buffers = [buf for buf in self._buffers if buf not in retired]
+                self._lists = [buf.items for buf in self._buffers]
+
+        if not things:
+            raise Empty
+        return things
+
+    def _total_stats(self):
+        total = self._retired_stats
+        for buf in self._buffers:
+            total = tuple(a + b for a, b in zip(total, buf.stats))
+        return total
+
+    def _current_stats(self):
+        with self._lock:
+            return tuple(a - b for a, b in zip(self._total_stats(), self._reported_stats))
+
+    @property
+    def dropped(self):
+        return self._current_stats()[0]
+
+    @property
+    def accepted(self):
+        return self._current_stats()[1]
+
+    @property
+    def accepted_lengths(self):
+        return self._current_stats()[2]
+
+    def reset_stats(self):
+        """Reset the stats to 0.
+
+        :return: The current value of dropped, accepted and accepted_lengths.
+        """
+        with self._lock:
+            total = self._total_stats()
+            dropped, accepted, accepted_lengths = (a - b for a, b in zip(total, self._reported_stats))
+            self._reported_stats = total
+        return dropped, accepted, accepted_lengths
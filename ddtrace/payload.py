@@ -1,4 +1,4 @@
-from .encoding import Encoder
+from .encoding import Encoder, MsgpackEncoder
 
 
 class PayloadFull(Exception):
@@ -15,13 +15,21 @@ class Payload(object):
 
     DEV: We encoded and buffer traces so that we can reliable determine the size of
          the payload easily so we can flush based on the payload size.
+
+    DEV: With a msgpack encoder the encoded traces are appended to a single ``bytearray``
+         which starts with a slot reserved for the array header. The header is written in
+         place when the payload is requested, and the payload is returned as a ``memoryview``
+         over the buffer so the body is never copied before being sent.
     """
-    __slots__ = ('traces', 'size', 'encoder', 'max_payload_size')
+    __slots__ = ('traces', 'size', 'encoder', 'max_payload_size', '_buffer', '_count')
 
     # Trace agent limit payload size of 10 MB
     # 5 MB should be a good average efficient size
     DEFAULT_MAX_PAYLOAD_SIZE = 5 * 1000000
 
+    # Size of the largest msgpack array header, reserved at the start of the buffer
+    _HEADER_SIZE = 5
+
     def __init__(self, encoder=None, max_payload_size=DEFAULT_MAX_PAYLOAD_SIZE):
         """
         Constructor for Payload
@@ -35,6 +43,11 @@ class Payload(object):
         self.encoder = encoder or Encoder()
         self.traces = []
         self.size = 0
+        self._count = 0
+        if isinstance(self.encoder, MsgpackEncoder):
+            self._buffer = bytearray(self._HEADER_SIZE)
+        else:
+            self._buffer = None
 
     def add_trace(self, trace):
         """
@@ -51,7 +64,15 @@ class Payload(object):
         encoded = self.encoder.encode_trace(trace)
         if len(encoded) + self.size > self.max_payload_size:
             raise PayloadFull()
-        self.traces.append(encoded)
+        if self._buffer is None:
+            self.traces.append(encoded)
+        else:
+            try:
+                self._buffer += encoded
+            except BufferError:
+                # A view returned by `get_payload` is still alive so the buffer cannot be resized in place
+                self._buffer = self._buffer + encoded
+        self._count += 1
         self.size += len(encoded)
 
     @property
@@ -62,7 +83,7 @@ class Payload(object):
         :returns: The number of traces in the payload
         :rtype: int
         """
-        return len(self.traces)
+        return self._count
 
     @property
     def empty(self):
@@ -79,10 +100,17 @@ class Payload(object):
         Get the fully encoded payload
 
         :returns: The fully encoded payload
-        :rtype: str | bytes
+        :rtype: str | bytes | memoryview
         """
-        # DEV: `self.traces` is an array of encoded traces, `join_encoded` joins them together
-        return self.encoder.join_encoded(self.traces)
+        if self._buffer is None:
+            # DEV: `self.traces` is an array of encoded traces, `join_encoded` joins them together
+            return self.encoder.join_encoded(self.traces)
+
+        # Write the array header right before the encoded traces, at the end of the reserved slot
+        header = self.encoder.array_header(self._count)
+        offset = self._HEADER_SIZE - len(header)
+        self._buffer[offset:self._HEADER_SIZE] = header
+        return memoryview(self._buffer)[offset:]
 
     def __repr__(self):
         """Get the string representation of this payload"""
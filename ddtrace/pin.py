@@ -3,6 +3,7 @@ import ddtrace
 from ddtrace.vendor import debtcollector
 
 from .internal.logger import get_logger
+from .span import SpanTags
 from .vendor import wrapt
 
 
@@ -32,7 +33,8 @@ class Pin(object):
     def __init__(self, service, app=None, app_type=None, tags=None, tracer=None, _config=None):
         tracer = tracer or ddtrace.tracer
         self.app = app
-        self.tags = tags
+        # DEV: The tags are classified once to be set on each span at once
+        self.tags = SpanTags(tags) if tags else tags
         self.tracer = tracer
         self._target = None
         # keep the configuration attribute internal because the
@@ -1,5 +1,4 @@
 import collections
-import itertools
 import operator
 import sys
 
@@ -22,6 +21,10 @@ from ddtrace.profile.exporter import pprof_pb2
 _ITEMGETTER_ZERO = operator.itemgetter(0)
 _ITEMGETTER_ONE = operator.itemgetter(1)
 _ATTRGETTER_ID = operator.attrgetter("id")
+_ATTRGETTER_CPU_TIME_NS = operator.attrgetter("cpu_time_ns")
+_ATTRGETTER_WALL_TIME_NS = operator.attrgetter("wall_time_ns")
+_ATTRGETTER_WAIT_TIME_NS = operator.attrgetter("wait_time_ns")
+_ATTRGETTER_LOCKED_FOR_NS = operator.attrgetter("locked_for_ns")
 
 
 @attr.s
@@ -115,53 +118,53 @@ class _PprofConverter(object):
 
         return tuple(locations)
 
-    def convert_uncaught_exception_event(self, thread_id, thread_name, frames, nframes, exc_type_name, events):
+    def convert_uncaught_exception_event(self, thread_id, thread_name, frames, nframes, exc_type_name, count):
         location_key = (
             self._to_locations(frames, nframes),
             (("thread id", str(thread_id)), ("thread name", thread_name), ("exception type", exc_type_name)),
         )
 
-        self._location_values[location_key]["uncaught-exceptions"] = len(events)
+        self._location_values[location_key]["uncaught-exceptions"] = count
 
-    def convert_stack_event(self, thread_id, thread_name, frames, nframes, samples):
+    def convert_stack_event(self, thread_id, thread_name, frames, nframes, count, cpu_time_ns, wall_time_ns):
         location_key = (
             self._to_locations(frames, nframes),
             (("thread id", str(thread_id)), ("thread name", thread_name),),
         )
 
-        self._location_values[location_key]["cpu-samples"] = len(samples)
-        self._location_values[location_key]["cpu-time"] = sum(s.cpu_time_ns for s in samples)
-        self._location_values[location_key]["wall-time"] = sum(s.wall_time_ns for s in samples)
+        self._location_values[location_key]["cpu-samples"] = count
+        self._location_values[location_key]["cpu-time"] = cpu_time_ns
+        self._location_values[location_key]["wall-time"] = wall_time_ns
 
-    def convert_lock_acquire_event(self, lock_name, thread_id, thread_name, frames, nframes, events, sampling_ratio):
+    def convert_lock_acquire_event(
+        self, lock_name, thread_id, thread_name, frames, nframes, count, wait_time_ns, sampling_ratio
+    ):
         location_key = (
             self._to_locations(frames, nframes),
             (("thread id", str(thread_id)), ("thread name", thread_name), ("lock name", lock_name)),
         )
 
-        self._location_values[location_key]["lock-acquire"] = len(events)
-        self._location_values[location_key]["lock-acquire-wait"] = int(
-            sum(e.wait_time_ns for e in events) / sampling_ratio
-        )
+        self._location_values[location_key]["lock-acquire"] = count
+        self._location_values[location_key]["lock-acquire-wait"] = int(wait_time_ns / sampling_ratio)
 
-    def convert_lock_release_event(self, lock_name, thread_id, thread_name, frames, nframes, events, sampling_ratio):
+    def convert_lock_release_event(
+        self, lock_name, thread_id, thread_name, frames, nframes, count, locked_for_ns, sampling_ratio
+    ):
         location_key = (
             self._to_locations(frames, nframes),
             (("thread id", str(thread_id)), ("thread name", thread_name), ("lock name", lock_name)),
         )
 
-        self._location_values[location_key]["lock-release"] = len(events)
-        self._location_values[location_key]["lock-release-hold"] = int(
-            sum(e.locked_for_ns for e in events) / sampling_ratio
-        )
+        self._location_values[location_key]["lock-release"] = count
+        self._location_values[location_key]["lock-release-hold"] = int(locked_for_ns / sampling_ratio)
 
-    def convert_stack_exception_event(self, thread_id, thread_name, frames, nframes, exc_type_name, events):
+    def convert_stack_exception_event(self, thread_id, thread_name, frames, nframes, exc_type_name, count):
         location_key = (
             self._to_locations(frames, nframes),
             (("thread id", str(thread_id)), ("thread name", thread_name), ("exception type", exc_type_name),),
         )
 
-        self._location_values[location_key]["exception-samples"] = len(events)
+        self._location_values[location_key]["exception-samples"] = count
 
     def convert_memory_event(self, stats, sampling_ratio):
         location = tuple(self._to_Location(frame.filename, frame.lineno).id for frame in reversed(stats.traceback))
@@ -226,24 +229,38 @@ class PprofExporter(exporter.Exporter):
     def _stack_event_group_key(event):
         return (event.thread_id, str(event.thread_name), tuple(event.frames), event.nframes)
 
-    def _group_stack_events(self, events):
-        return itertools.groupby(sorted(events, key=self._stack_event_group_key), key=self._stack_event_group_key,)
-
     @staticmethod
     def _lock_event_group_key(event):
         return (event.lock_name, event.thread_id, str(event.thread_name), tuple(event.frames), event.nframes)
 
-    def _group_lock_events(self, events):
-        return itertools.groupby(sorted(events, key=self._lock_event_group_key), key=self._lock_event_group_key,)
-
     @staticmethod
     def _exception_group_key(event):
         exc_type = event.exc_type
         exc_type_name = exc_type.__module__ + "." + exc_type.__name__
         return (event.thread_id, str(event.thread_name), tuple(event.frames), event.nframes, exc_type_name)
 
-    def _group_exception_events(self, events):
-        return itertools.groupby(sorted(events, key=self._exception_group_key), key=self._exception_group_key,)
+    @staticmethod
+    def _aggregate_events(events, key, *values):
+        """Aggregate events by group in one pass.
+
+        :param events: The events to aggregate.
+        :param key: A function returning the group of an event.
+        :param values: Functions returning the values of an event to sum for its group.
+        :return: A list of (group, [number of events, sum of each value...]) sorted by group.
+        """
+        groups = {}
+        indexed_values = tuple(enumerate(values, 1))
+        for event in events:
+            group_key = key(event)
+            try:
+                group = groups[group_key]
+            except KeyError:
+                group = groups[group_key] = [0] * (len(values) + 1)
+            group[0] += 1
+            for i, value in indexed_values:
+                group[i] += value(event)
+        # DEV: Only the distinct groups are sorted, so ids are generated in a reproducible order
+        return sorted(groups.items(), key=_ITEMGETTER_ZERO)
 
     @staticmethod
     def min_none(a, b):
@@ -279,21 +296,25 @@ class PprofExporter(exporter.Exporter):
         converter = _PprofConverter()
 
         # Handle StackSampleEvent
-        stack_events = []
-        for event in events.get(stack.StackSampleEvent, []):
-            stack_events.append(event)
-            start_time_ns = self.min_none(event.timestamp, start_time_ns)
-            stop_time_ns = self.max_none(event.timestamp, stop_time_ns)
+        stack_events = events.get(stack.StackSampleEvent, [])
+        for event in stack_events:
+            timestamp = event.timestamp
+            if start_time_ns is None or timestamp < start_time_ns:
+                start_time_ns = timestamp
+            if stop_time_ns is None or timestamp > stop_time_ns:
+                stop_time_ns = timestamp
             sum_period += event.sampling_period
-            nb_event += 1
+        nb_event += len(stack_events)
 
-        for (thread_id, thread_name, frames, nframes), stack_events in self._group_stack_events(stack_events):
-            converter.convert_stack_event(thread_id, thread_name, frames, nframes, list(stack_events))
+        for (thread_id, thread_name, frames, nframes), (count, cpu_time_ns, wall_time_ns) in self._aggregate_events(
+            stack_events, self._stack_event_group_key, _ATTRGETTER_CPU_TIME_NS, _ATTRGETTER_WALL_TIME_NS
+        ):
+            converter.convert_stack_event(thread_id, thread_name, frames, nframes, count, cpu_time_ns, wall_time_ns)
 
         # Handle Lock events
-        for event_class, convert_fn in (
-            (threading.LockAcquireEvent, converter.convert_lock_acquire_event),
-            (threading.LockReleaseEvent, converter.convert_lock_release_event),
+        for event_class, convert_fn, value in (
+            (threading.LockAcquireEvent, converter.convert_lock_acquire_event, _ATTRGETTER_WAIT_TIME_NS),
+            (threading.LockReleaseEvent, converter.convert_lock_release_event, _ATTRGETTER_LOCKED_FOR_NS),
         ):
             lock_events = events.get(event_class, [])
             sampling_sum_pct = sum(event.sampling_pct for event in lock_events)
@@ -301,18 +322,16 @@ class PprofExporter(exporter.Exporter):
             if lock_events:
                 sampling_ratio_avg = sampling_sum_pct / (len(lock_events) * 100.0)
 
-                for (lock_name, thread_id, thread_name, frames, nframes), l_events in self._group_lock_events(
-                    lock_events
+                for (lock_name, thread_id, thread_name, frames, nframes), (count, total) in self._aggregate_events(
+                    lock_events, self._lock_event_group_key, value
                 ):
-                    convert_fn(lock_name, thread_id, thread_name, frames, nframes, list(l_events), sampling_ratio_avg)
+                    convert_fn(lock_name, thread_id, thread_name, frames, nframes, count, total, sampling_ratio_avg)
 
         # Handle UncaughtExceptionEvent
-        for ((thread_id, thread_name, frames, nframes, exc_type_name), ue_events,) in self._group_exception_events(
-            events.get(exceptions.UncaughtExceptionEvent, [])
+        for (thread_id, thread_name, frames, nframes, exc_type_name), (count,) in self._aggregate_events(
+            events.get(exceptions.UncaughtExceptionEvent, []), self._exception_group_key
         ):
-            converter.convert_uncaught_exception_event(
-                thread_id, thread_name, frames, nframes, exc_type_name, list(ue_events)
-            )
+            converter.convert_uncaught_exception_event(thread_id, thread_name, frames, nframes, exc_type_name, count)
 
         sample_types = (
             ("cpu-samples", "count"),
@@ -329,12 +348,10 @@ class PprofExporter(exporter.Exporter):
         if stack.FEATURES["stack-exceptions"]:
             sample_types += (("exception-samples", "count"),)
 
-            for (thread_id, thread_name, frames, nframes, exc_type_name), se_events in self._group_exception_events(
-                events.get(stack.StackExceptionSampleEvent, [])
+            for (thread_id, thread_name, frames, nframes, exc_type_name), (count,) in self._aggregate_events(
+                events.get(stack.StackExceptionSampleEvent, []), self._exception_group_key
             ):
-                converter.convert_stack_exception_event(
-                    thread_id, thread_name, frames, nframes, exc_type_name, list(se_events)
-                )
+                converter.convert_stack_exception_event(thread_id, thread_name, frames, nframes, exc_type_name, count)
 
         if tracemalloc:
             sample_types += (
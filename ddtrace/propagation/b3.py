@@ -43,46 +43,56 @@ class B3HTTPPropagator:
         headers[self.SAMPLED_KEY] = sampled
 
     def extract(self, headers):
+        return _context_from_values(
+            headers.get(self.SINGLE_HEADER_KEY),
+            headers.get(self.TRACE_ID_KEY),
+            headers.get(self.SPAN_ID_KEY),
+            headers.get(self.SAMPLED_KEY),
+            headers.get(self.FLAGS_KEY),
+        )
+
+
+def _context_from_values(single_header, trace_id, span_id, sampled, flags):
+    """Build a Context from the values of the b3 headers.
+
+    :raises ValueError: If the trace or span id is not an hexadecimal number.
+    """
+    if single_header:
+        # The b3 spec calls for the sampling state to be
+        # "deferred", which is unspecified. This concept does not
+        # translate to SpanContext, so we set it as recorded.
         trace_id = '0'
         span_id = '0'
-        sampled = '0'
+        sampled = '1'
         flags = None
-
-        single_header = headers.get(self.SINGLE_HEADER_KEY)
-
-        if single_header:
-            # The b3 spec calls for the sampling state to be
-            # "deferred", which is unspecified. This concept does not
-            # translate to SpanContext, so we set it as recorded.
-            sampled = '1'
-            fields = single_header.split('-', 4)
-
-            if len(fields) == 1:
-                sampled = fields[0]
-            elif len(fields) == 2:
-                trace_id, span_id = fields
-            elif len(fields) == 3:
-                trace_id, span_id, sampled = fields
-            elif len(fields) == 4:
-                trace_id, span_id, sampled, _parent_span_id = fields
-            else:
-                return Context()
-        else:
-            trace_id = headers.get(self.TRACE_ID_KEY) or trace_id
-            span_id = headers.get(self.SPAN_ID_KEY) or span_id
-            sampled = headers.get(self.SAMPLED_KEY) or sampled
-            flags = headers.get(self.FLAGS_KEY) or flags
-
-        if sampled in self._SAMPLE_PROPAGATE_VALUES or flags == '1':
-            sampling_priority = priority.AUTO_KEEP
+        fields = single_header.split('-', 4)
+
+        if len(fields) == 1:
+            sampled = fields[0]
+        elif len(fields) == 2:
+            trace_id, span_id = fields
+        elif len(fields) == 3:
+            trace_id, span_id, sampled = fields
+        elif len(fields) == 4:
+            trace_id, span_id, sampled, _parent_span_id = fields
         else:
-            sampling_priority = priority.AUTO_REJECT
-
-        return Context(
-            trace_id=int(trace_id, 16),
-            span_id=int(span_id, 16),
-            sampling_priority=sampling_priority,
-        )
+            return Context()
+    else:
+        trace_id = trace_id or '0'
+        span_id = span_id or '0'
+        sampled = sampled or '0'
+        flags = flags or None
+
+    if sampled in B3HTTPPropagator._SAMPLE_PROPAGATE_VALUES or flags == '1':
+        sampling_priority = priority.AUTO_KEEP
+    else:
+        sampling_priority = priority.AUTO_REJECT
+
+    return Context(
+        trace_id=int(trace_id, 16),
+        span_id=int(span_id, 16),
+        sampling_priority=sampling_priority,
+    )
 
 
 def format_trace_id(trace_id):
@@ -0,0 +1,78 @@
+from ..context import Context
+from ..internal.logger import get_logger
+
+from . import b3
+from . import datadog
+from .b3 import B3HTTPPropagator
+from .datadog import DatadogHTTPPropagator
+from .utils import HTTPHeaderExtractor
+
+log = get_logger(__name__)
+
+# Extract the Datadog and b3 headers in one pass over the request headers
+_HEADER_EXTRACTOR = HTTPHeaderExtractor(
+    [
+        datadog.HTTP_HEADER_TRACE_ID,
+        datadog.HTTP_HEADER_PARENT_ID,
+        datadog.HTTP_HEADER_SAMPLING_PRIORITY,
+        datadog.HTTP_HEADER_ORIGIN,
+        B3HTTPPropagator.SINGLE_HEADER_KEY,
+        B3HTTPPropagator.TRACE_ID_KEY,
+        B3HTTPPropagator.SPAN_ID_KEY,
+        B3HTTPPropagator.SAMPLED_KEY,
+        B3HTTPPropagator.FLAGS_KEY,
+    ]
+)
+
+
+class DatadogB3HTTPPropagator(object):
+    """Propagator supporting both the Datadog and the b3 headers.
+
+    Both sets of headers are injected. When extracting, the Datadog headers are used if
+    they are present, otherwise the b3 ones are used. The headers of both formats are
+    looked up in a single pass over the request headers, which can also be a WSGI environ.
+
+    Here is how to enable it::
+
+        from ddtrace import tracer
+        from ddtrace.propagation.combined import DatadogB3HTTPPropagator
+
+        tracer.configure(http_propagator=DatadogB3HTTPPropagator)
+    """
+
+    def __init__(self):
+        self._datadog = DatadogHTTPPropagator()
+        self._b3 = B3HTTPPropagator()
+
+    def inject(self, span_context, headers):
+        """Inject Context attributes that have to be propagated as HTTP headers.
+
+        :param Context span_context: Span context to propagate.
+        :param dict headers: HTTP headers to extend with tracing attributes.
+        """
+        self._datadog.inject(span_context, headers)
+        self._b3.inject(span_context, headers)
+
+    def extract(self, headers):
+        """Extract a Context from HTTP headers into a new Context.
+
+        :param dict headers: HTTP headers to extract tracing attributes.
+        :return: New `Context` with propagated attributes.
+        """
+        if not headers:
+            return Context()
+
+        values = _HEADER_EXTRACTOR.extract(headers)
+        if values[0] is None and (values[4] or values[5]):
+            try:
+                return b3._context_from_values(*values[4:])
+            # If headers are invalid and cannot be parsed, return a new context and log the issue.
+            except Exception:
+                log.debug(
+                    'invalid b3 headers, b3: %s, trace-id: %s, span-id: %s, sampled: %s, flags: %s',
+                    *values[4:],
+                    exc_info=True
+                )
+                return Context()
+
+        return datadog._context_from_values(*values[:4])
@@ -1,6 +1,7 @@
 from ..context import Context
 from ..internal.logger import get_logger
 
+from .utils import HTTPHeaderExtractor
 from .utils import get_wsgi_header
 
 log = get_logger(__name__)
@@ -28,6 +29,11 @@ POSSIBLE_HTTP_HEADER_ORIGIN = frozenset(
     [HTTP_HEADER_ORIGIN, get_wsgi_header(HTTP_HEADER_ORIGIN)]
 )
 
+# Extract all the headers above in one pass over the request headers
+_HEADER_EXTRACTOR = HTTPHeaderExtractor(
+    [HTTP_HEADER_TRACE_ID, HTTP_HEADER_PARENT_ID, HTTP_HEADER_SAMPLING_PRIORITY, HTTP_HEADER_ORIGIN]
+)
+
 
 def _extract_header_value(possible_header_names, headers, default=None):
     for header, value in headers.items():
@@ -104,29 +110,26 @@ class DatadogHTTPPropagator(object):
         if not headers:
             return Context()
 
-        try:
-            trace_id = DatadogHTTPPropagator.extract_trace_id(headers)
-            parent_span_id = DatadogHTTPPropagator.extract_parent_span_id(headers)
-            sampling_priority = DatadogHTTPPropagator.extract_sampling_priority(headers)
-            origin = DatadogHTTPPropagator.extract_origin(headers)
-
-            if sampling_priority is not None:
-                sampling_priority = int(sampling_priority)
-
-            return Context(
-                trace_id=trace_id,
-                span_id=parent_span_id,
-                sampling_priority=sampling_priority,
-                _dd_origin=origin,
-            )
-        # If headers are invalid and cannot be parsed, return a new context and log the issue.
-        except Exception:
-            log.debug(
-                'invalid x-datadog-* headers, trace-id: %s, parent-id: %s, priority: %s, origin: %s',
-                headers.get(HTTP_HEADER_TRACE_ID, 0),
-                headers.get(HTTP_HEADER_PARENT_ID, 0),
-                headers.get(HTTP_HEADER_SAMPLING_PRIORITY),
-                headers.get(HTTP_HEADER_ORIGIN, ''),
-                exc_info=True,
-            )
-            return Context()
+        return _context_from_values(*_HEADER_EXTRACTOR.extract(headers))
+
+
+def _context_from_values(trace_id, parent_span_id, sampling_priority, origin):
+    """Build a Context from the values of the x-datadog-* headers."""
+    try:
+        return Context(
+            trace_id=int(trace_id) if trace_id is not None else 0,
+            span_id=int(parent_span_id) if parent_span_id is not None else 0,
+            sampling_priority=int(sampling_priority) if sampling_priority is not None else None,
+            _dd_origin=origin,
+        )
+    # If headers are invalid and cannot be parsed, return a new context and log the issue.
+    except Exception:
+        log.debug(
+            'invalid x-datadog-* headers, trace-id: %s, parent-id: %s, priority: %s, origin: %s',
+            trace_id,
+            parent_span_id,
+            sampling_priority,
+            origin,
+            exc_info=True,
+        )
+        return Context()
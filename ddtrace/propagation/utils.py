@@ -4,3 +4,56 @@ def get_wsgi_header(header):
     information from the spec.
     """
     return 'HTTP_{}'.format(header.upper().replace('-', '_'))
+
+
+class HTTPHeaderExtractor(object):
+    """Extract the values of a fixed set of HTTP headers in one pass.
+
+    Header names are matched case-insensitively, either as is or in their WSGI
+    form (``HTTP_X_DATADOG_TRACE_ID``), so the same extractor can be used with
+    plain header dicts and WSGI environs.
+
+    The lookup tables are computed once, so extracting the headers of a request
+    only costs a dict probe per header it contains, without lowercasing the
+    header names that cannot match.
+    """
+    __slots__ = ('header_names', '_fields', '_lengths')
+
+    def __init__(self, header_names):
+        """
+        :param list header_names: The names of the headers to extract.
+        """
+        self.header_names = tuple(header_names)
+        self._fields = {}
+        for idx, name in enumerate(self.header_names):
+            for key in (name, get_wsgi_header(name)):
+                self._fields[key.lower()] = idx
+                # DEV: Allow a direct hit without lowercasing for the most common spellings
+                self._fields.setdefault(key, idx)
+        self._lengths = frozenset(len(key) for key in self._fields)
+
+    def extract(self, headers):
+        """Extract the headers values.
+
+        :param dict headers: HTTP headers or WSGI environ.
+        :return: The value of each header, in the order of ``header_names``, ``None`` when missing.
+            When a header is present multiple times the first value found is used.
+        """
+        values = [None] * len(self.header_names)
+        fields = self._fields
+        lengths = self._lengths
+        missing = len(values)
+        for key, value in headers.items():
+            if len(key) not in lengths:
+                continue
+            idx = fields.get(key)
+            if idx is None:
+                idx = fields.get(key.lower())
+                if idx is None:
+                    continue
+            if values[idx] is None and value is not None:
+                values[idx] = value
+                missing -= 1
+                if not missing:
+                    break
+        return values
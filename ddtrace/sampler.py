@@ -3,14 +3,18 @@
 Any `sampled = False` trace won't be written, and can be ignored by the instrumentation.
 """
 import abc
+import collections
+import re
+import threading
+import warnings
 
 from .compat import iteritems, pattern_type
 from .constants import ENV_KEY
 from .constants import SAMPLING_AGENT_DECISION, SAMPLING_RULE_DECISION, SAMPLING_LIMIT_DECISION
 from .ext.priority import AUTO_KEEP, AUTO_REJECT
 from .internal.logger import get_logger
-from .internal.rate_limiter import RateLimiter
-from .utils.formats import get_env
+from .internal.rate_limiter import RateLimiter, ShardedRateLimiter
+from .utils.formats import asbool, get_env
 from .vendor import six
 
 log = get_logger(__name__)
@@ -73,6 +77,9 @@ class RateByServiceSampler(BaseSampler, BasePrioritySampler):
     The sample rate is kept independently for each service/env tuple.
     """
 
+    # Maximum number of (service, env) pairs to cache the sampler of
+    CACHE_SIZE = 1000
+
     @staticmethod
     def _key(service=None, env=None):
         """Compute a key with the same format used by the Datadog agent API."""
@@ -82,24 +89,61 @@ class RateByServiceSampler(BaseSampler, BasePrioritySampler):
 
     def __init__(self, sample_rate=1):
         self.sample_rate = sample_rate
-        self._by_service_samplers = self._get_new_by_service_sampler()
+        # Serializes the updates of `_snapshot`, it is read without a lock
+        self._lock = threading.Lock()
+        self._set_by_service_samplers(self._get_new_by_service_sampler())
 
     def _get_new_by_service_sampler(self):
         return {
             self._default_key: RateSampler(self.sample_rate)
         }
 
-    def set_sample_rate(self, sample_rate, service='', env=''):
-        self._by_service_samplers[self._key(service, env)] = RateSampler(sample_rate)
+    @property
+    def _by_service_samplers(self):
+        return self._snapshot[0]
 
-    def sample(self, span):
-        tags = span.tracer.tags
-        env = tags[ENV_KEY] if ENV_KEY in tags else None
-        key = self._key(span.service, env)
+    def _set_by_service_samplers(self, by_service_samplers):
+        # DEV: The samplers by agent key and the samplers cached by (service, env) are replaced at once, so that
+        #      `sample` never takes a lock nor uses a cached sampler from previous rates
+        with self._lock:
+            self._snapshot = (by_service_samplers, {})
 
-        sampler = self._by_service_samplers.get(
-            key, self._by_service_samplers[self._default_key]
+    def set_sample_rate(self, sample_rate, service='', env=''):
+        by_service_samplers = dict(self._by_service_samplers)
+        by_service_samplers[self._key(service, env)] = RateSampler(sample_rate)
+        self._set_by_service_samplers(by_service_samplers)
+
+    def _get_sampler(self, service, env):
+        by_service_samplers, cache = self._snapshot
+        key = (service, env)
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # The service or env cannot be hashed, do not cache it
+            return by_service_samplers.get(self._key(service, env), by_service_samplers[self._default_key])
+
+        sampler = by_service_samplers.get(
+            self._key(service, env), by_service_samplers[self._default_key]
         )
+        with self._lock:
+            snapshot = self._snapshot
+            # Do not cache a sampler of rates replaced in the meantime
+            if snapshot[0] is by_service_samplers:
+                # DEV: The cache is copied on write so that it can be read without a lock, and cleared once full
+                #      rather than tracking the least recently used pairs
+                cache = dict(snapshot[1]) if len(snapshot[1]) < self.CACHE_SIZE else {}
+                cache[key] = sampler
+                self._snapshot = (by_service_samplers, cache)
+        return sampler
+
+    def sample(self, span):
+        env = span.tracer.tags.get(ENV_KEY)
+        try:
+            sampler = self._snapshot[1][(span.service, env)]
+        except (KeyError, TypeError):
+            sampler = self._get_sampler(span.service, env)
         span.set_metric(SAMPLING_AGENT_DECISION, sampler.sample_rate)
         return sampler.sample(span)
 
@@ -108,7 +152,7 @@ class RateByServiceSampler(BaseSampler, BasePrioritySampler):
         for key, sample_rate in iteritems(rate_by_service):
             new_by_service_samplers[key] = RateSampler(sample_rate)
 
-        self._by_service_samplers = new_by_service_samplers
+        self._set_by_service_samplers(new_by_service_samplers)
 
 
 # Default key for service with no specific rate
@@ -119,12 +163,15 @@ class DatadogSampler(BaseSampler, BasePrioritySampler):
     """
     This sampler is currently in ALPHA and it's API may change at any time, use at your own risk.
     """
-    __slots__ = ('default_sampler', 'limiter', 'rules')
+    __slots__ = ('default_sampler', 'limiter', '_rules', '_rule_index')
 
     NO_RATE_LIMIT = -1
     DEFAULT_RATE_LIMIT = 100
     DEFAULT_SAMPLE_RATE = None
 
+    # Give each thread its own token bucket to reduce lock contention, see ShardedRateLimiter
+    _sharded_rate_limiter = asbool(get_env('trace', 'rate_limit_sharded', default=False))
+
     def __init__(self, rules=None, default_sample_rate=None, rate_limit=None):
         """
         Constructor for DatadogSampler sampler
@@ -164,13 +211,34 @@ class DatadogSampler(BaseSampler, BasePrioritySampler):
         self.rules = rules
 
         # Configure rate limiter
-        self.limiter = RateLimiter(rate_limit)
+        if self._sharded_rate_limiter:
+            self.limiter = ShardedRateLimiter(rate_limit)
+        else:
+            self.limiter = RateLimiter(rate_limit)
 
         # Default to previous default behavior of RateByServiceSampler
         self.default_sampler = RateByServiceSampler()
         if default_sample_rate is not None:
             self.default_sampler = SamplingRule(sample_rate=default_sample_rate)
 
+    @property
+    def rules(self):
+        return self._rules
+
+    @rules.setter
+    def rules(self, rules):
+        # DEV: Keep a list so that changes made in place can be compared with the rules of the index
+        self._rules = rules if isinstance(rules, list) else list(rules)
+        self._rule_index = _SamplingRuleIndex(self._rules)
+
+    def _get_rule_index(self):
+        """Return the index of the rules, rebuilt if they have been changed in place, e.g. with ``rules.append``"""
+        rule_index = self._rule_index
+        # DEV: Comparing the lists is cheap as the rules of the index are the same objects
+        if rule_index._rules != self._rules:
+            rule_index = self._rule_index = _SamplingRuleIndex(self._rules)
+        return rule_index
+
     def update_rate_by_service_sample_rates(self, sample_rates):
         # Pass through the call to our RateByServiceSampler
         if isinstance(self.default_sampler, RateByServiceSampler):
@@ -192,15 +260,10 @@ class DatadogSampler(BaseSampler, BasePrioritySampler):
         :returns: Whether the span was sampled or not
         :rtype: :obj:`bool`
         """
-        # If there are rules defined, then iterate through them and find one that wants to sample
-        matching_rule = None
-        # Go through all rules and grab the first one that matched
+        # Find the first rule that matches
         # DEV: This means rules should be ordered by the user from most specific to least specific
-        for rule in self.rules:
-            if rule.matches(span):
-                matching_rule = rule
-                break
-        else:
+        matching_rule = self._get_rule_index().first_match(span)
+        if matching_rule is None:
             # If this is the old sampler, sample and return
             if isinstance(self.default_sampler, RateByServiceSampler):
                 if self.default_sampler.sample(span):
@@ -365,3 +428,177 @@ class SamplingRule(BaseSampler):
         )
 
     __str__ = __repr__
+
+
+_BACK_REFERENCE = re.compile(r'\\[1-9]')
+
+
+class _SamplingRuleIndex(object):
+    """
+    Find the first :class:`SamplingRule` matching a span without going through all the rules for every span
+
+    The rules matching ``span.service`` and ``span.name`` exactly are looked up in a dictionary, the ones using regular
+    expressions are filtered with a single alternation of all of them, and the result is memoized per
+    ``(service, name)`` pair in a bounded LRU cache.
+
+    Rules using functions, and sub-classes of :class:`SamplingRule` which may override ``matches``, can depend on
+    more than the values of the span: they are still called for every span, in order.
+    """
+    __slots__ = ('_rules', '_exact', '_patterns', '_dynamic', '_service_filter', '_name_filter', '_cache')
+
+    # Maximum number of (service, name) pairs to memoize the first matching rule of
+    CACHE_SIZE = 1024
+
+    # Key of the exact match index for rules not matching on a span attribute
+    _ANY = SamplingRule.NO_RULE
+
+    def __init__(self, rules):
+        self._rules = list(rules)
+        # Index of the first rule matching exact (service, name) values, see `_ANY`
+        self._exact = {}
+        # Rules using regular expressions, with their index
+        self._patterns = []
+        # Rules which have to be evaluated for every span, with their index
+        self._dynamic = []
+
+        service_patterns = []
+        name_patterns = []
+        for index, rule in enumerate(self._rules):
+            if type(rule) is not SamplingRule or callable(rule.service) or callable(rule.name):
+                self._dynamic.append((index, rule))
+                continue
+
+            service_pattern = isinstance(rule.service, pattern_type)
+            name_pattern = isinstance(rule.name, pattern_type)
+            if service_pattern or name_pattern:
+                self._patterns.append((index, rule))
+                if service_pattern:
+                    service_patterns.append(rule.service)
+                if name_pattern:
+                    name_patterns.append(rule.name)
+                continue
+
+            try:
+                self._exact.setdefault((rule.service, rule.name), index)
+            except TypeError:
+                # Values that cannot be hashed are compared with the other rules
+                self._patterns.append((index, rule))
+
+        self._service_filter = self._compile_filter(service_patterns)
+        self._name_filter = self._compile_filter(name_patterns)
+        self._cache = _LRUCache(self.CACHE_SIZE)
+
+    @staticmethod
+    def _compile_filter(patterns):
+        """
+        Combine regular expressions into a single one matching when any of them matches
+
+        :returns: The combined regular expression, or ``None`` if the patterns cannot be combined
+        """
+        if not patterns:
+            return None
+        flags = patterns[0].flags
+        for p in patterns:
+            if p.flags != flags or not isinstance(p.pattern, six.string_types):
+                return None
+            # Numbered back references would refer to the groups of other patterns once combined
+            if _BACK_REFERENCE.search(p.pattern):
+                return None
+        try:
+            # DEV: Inline flags are not allowed inside a group, turn the warning into an error
+            with warnings.catch_warnings():
+                warnings.simplefilter('error')
+                return re.compile('|'.join('(?:%s)' % p.pattern for p in patterns), flags)
+        except (re.error, DeprecationWarning, FutureWarning, OverflowError):
+            # e.g. the same group name is used by several patterns
+            return None
+
+    def first_match(self, span):
+        """
+        Return the first rule matching the span
+
+        :param span: The span to match against
+        :type span: :class:`ddtrace.span.Span`
+        :returns: The first matching rule, or ``None`` if no rule matches
+        :rtype: :class:`SamplingRule`
+        """
+        service = span.service
+        name = span.name
+        try:
+            key = (service, name)
+            index = self._cache.get(key)
+            if index is None:
+                index = self._first_static_match(service, name)
+                self._cache.set(key, index)
+        except TypeError:
+            # The service or name cannot be hashed
+            index = self._first_static_match(service, name)
+
+        for dynamic_index, rule in self._dynamic:
+            if dynamic_index >= index:
+                break
+            if rule.matches(span):
+                return rule
+
+        if index < len(self._rules):
+            return self._rules[index]
+        return None
+
+    def _first_static_match(self, service, name):
+        """Return the index of the first rule, not evaluated for every span, matching the service and name"""
+        index = len(self._rules)
+        if self._exact:
+            any_ = self._ANY
+            for key in ((service, name), (service, any_), (any_, name), (any_, any_)):
+                try:
+                    exact_index = self._exact.get(key)
+                except TypeError:
+                    continue
+                if exact_index is not None and exact_index < index:
+                    index = exact_index
+
+        if self._patterns:
+            service_filtered = name_filtered = False
+            if self._service_filter is not None:
+                service_filtered = not self._service_filter.match(str(service))
+            if self._name_filter is not None:
+                name_filtered = not self._name_filter.match(str(name))
+
+            for pattern_index, rule in self._patterns:
+                if pattern_index >= index:
+                    break
+                # Skip the rules with a regular expression that the combined one already ruled out
+                if service_filtered and isinstance(rule.service, pattern_type):
+                    continue
+                if name_filtered and isinstance(rule.name, pattern_type):
+                    continue
+                if rule._pattern_matches(service, rule.service) and rule._pattern_matches(name, rule.name):
+                    return pattern_index
+
+        return index
+
+
+class _LRUCache(object):
+    """A thread-safe mapping keeping only the most recently used items"""
+    __slots__ = ('maxsize', '_data', '_lock')
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return None
+            # Move the item to the end of the most recently used ones
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
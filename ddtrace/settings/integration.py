@@ -58,6 +58,11 @@ class IntegrationConfig(AttrDict):
             return self.http.trace_query_string
         return self.global_config._http.trace_query_string
 
+    @property
+    def is_header_tracing_configured(self):
+        """Returns whether any header is traced, either for this integration or globally."""
+        return self.http.is_header_tracing_configured or self.global_config._http.is_header_tracing_configured
+
     def header_is_traced(self, header_name):
         """
         Returns whether or not the current header should be traced.
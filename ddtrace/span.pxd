@@ -0,0 +1,28 @@
+# Declarations used when ``ddtrace/span.py`` is compiled with Cython: ``Span`` becomes an
+# extension type with its attributes stored in a C struct. The pure-Python module is used
+# as-is when the extension is not built.
+
+cdef class Span:
+    # Public span attributes
+    cdef public object service
+    cdef public object name
+    cdef public object resource
+    cdef public object span_id
+    cdef public object trace_id
+    cdef public object parent_id
+    cdef public object error
+    cdef public object metrics
+    cdef public object span_type
+    cdef public object start_ns
+    cdef public object duration_ns
+    cdef public object tracer
+    # Sampler attributes
+    cdef public object sampled
+    # Internal attributes
+    cdef public object _meta
+    cdef public object _base_meta
+    cdef public object _deferred_tags
+    cdef public object _context
+    cdef public object finished
+    cdef public object _parent
+    cdef object __weakref__
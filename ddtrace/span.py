@@ -33,7 +33,6 @@ class Span(object):
         "span_id",
         "trace_id",
         "parent_id",
-        "meta",
         "error",
         "metrics",
         "span_type",
@@ -43,6 +42,9 @@ class Span(object):
         # Sampler attributes
         "sampled",
         # Internal attributes
+        "_meta",
+        "_base_meta",
+        "_deferred_tags",
         "_context",
         "finished",
         "_parent",
@@ -87,7 +89,11 @@ class Span(object):
         self.span_type = span_type.value if isinstance(span_type, SpanTypes) else span_type
 
         # tags / metatdata
-        self.meta = {}
+        self._meta = {}
+        # Read-only meta shared with other spans, overridden by `_meta`
+        self._base_meta = None
+        # Functions computing tags only once they are read, see `_defer_tags`
+        self._deferred_tags = None
         self.error = 0
         self.metrics = {}
 
@@ -110,6 +116,53 @@ class Span(object):
         # state
         self.finished = False
 
+    @property
+    def meta(self):
+        """The string tags of the span.
+
+        Accessing it copies the tags shared with other spans into the span, use :meth:`get_tag` to read a tag.
+        """
+        if self._deferred_tags is not None:
+            self._set_deferred_tags()
+        if self._base_meta is not None:
+            self._copy_base_meta()
+        return self._meta
+
+    @meta.setter
+    def meta(self, value):
+        self._meta = value
+        self._base_meta = None
+
+    def _copy_base_meta(self):
+        meta = dict(self._base_meta)
+        meta.update(self._meta)
+        self._meta = meta
+        self._base_meta = None
+
+    def _get_meta(self):
+        """Return the string tags of the span, without copying the ones shared with other spans into it.
+
+        The returned dictionary must not be modified.
+        """
+        base_meta, meta = self._get_meta_layers()
+        if base_meta is None:
+            return meta
+        if not meta:
+            return base_meta
+        merged = dict(base_meta)
+        merged.update(meta)
+        return merged
+
+    def _get_meta_layers(self):
+        """Return the string tags shared with other spans, or ``None``, and the ones of the span which take
+        precedence over them, without merging them.
+
+        The returned dictionaries must not be modified.
+        """
+        if self._deferred_tags is not None:
+            self._set_deferred_tags()
+        return self._base_meta, self._meta
+
     @property
     def start(self):
         """The start timestamp in Unix epoch seconds."""
@@ -216,29 +269,110 @@ class Span(object):
             self.set_metric(key, value)
             return
 
+        if self._deferred_tags is not None:
+            self._deferred_tags.append((None, key))
+
         try:
-            self.meta[key] = stringify(value)
+            self._meta[key] = stringify(value)
             if key in self.metrics:
                 del self.metrics[key]
         except Exception:
             log.debug("error setting tag %s, ignoring it", key, exc_info=True)
 
+    def _defer_tags(self, func, *args):
+        """Set the tags returned by ``func(*args)`` once the tags of the span are read.
+
+        This is meant for the tags that are costly to compute, like the ones parsed from a URL: they
+        are only computed when the span is encoded, and not at all if its trace is dropped. As with
+        :meth:`set_tag`, the last value set for a tag wins, whether it was deferred or not.
+
+        :param func: The function returning a dictionary of tags.
+        """
+        if self._deferred_tags is None:
+            self._deferred_tags = []
+        self._deferred_tags.append((func, args))
+
+    def _set_deferred_tags(self):
+        deferred_tags = self._deferred_tags
+        self._deferred_tags = None
+        # DEV: The tags set after a deferral are recorded as `(None, key)`, going backwards lets the last value win
+        tags = {}
+        seen = set()
+        for func, args in reversed(deferred_tags):
+            if func is None:
+                seen.add(args)
+                continue
+            try:
+                computed = func(*args)
+            except Exception:
+                log.debug("error computing deferred tags, ignoring them", exc_info=True)
+                continue
+            for key, value in iteritems(computed):
+                if key not in seen:
+                    seen.add(key)
+                    tags[key] = value
+        for key, value in iteritems(tags):
+            self.set_tag(key, value)
+
     def _remove_tag(self, key):
-        if key in self.meta:
-            del self.meta[key]
+        if self._base_meta is not None and key in self._base_meta:
+            self._copy_base_meta()
+        if key in self._meta:
+            del self._meta[key]
 
     def get_tag(self, key):
         """ Return the given tag or None if it doesn't exist.
         """
-        return self.meta.get(key, None)
+        if self._deferred_tags is not None:
+            self._set_deferred_tags()
+        value = self._meta.get(key)
+        if value is None and self._base_meta is not None:
+            return self._base_meta.get(key)
+        return value
 
     def set_tags(self, tags):
         """ Set a dictionary of tags on the given span. Keys and values
             must be strings (or stringable)
         """
-        if tags:
-            for k, v in iter(tags.items()):
-                self.set_tag(k, v)
+        if not tags:
+            return
+
+        if isinstance(tags, SpanTags):
+            self._set_span_tags(tags)
+            return
+
+        for k, v in iter(tags.items()):
+            self.set_tag(k, v)
+
+    def _set_span_tags(self, tags):
+        """Set tags that have already been classified into meta and metrics.
+
+        This has the same effect as calling :meth:`set_tag` for each tag.
+        """
+        meta, metrics, other = tags.classified()
+
+        # A tag is either in `meta` or in `metrics`, remove the previous values which end up in the other one
+        # DEV: Spans have few tags when they are started, so go through the span tags rather than the new ones
+        if meta and self.metrics:
+            for key in [key for key in self.metrics if key in meta]:
+                del self.metrics[key]
+        if metrics:
+            if self._base_meta is not None and any(key in self._base_meta for key in metrics):
+                self._copy_base_meta()
+            if self._meta:
+                for key in [key for key in self._meta if key in metrics]:
+                    del self._meta[key]
+
+        if not self._meta and self._base_meta is None:
+            # Share the meta with the other spans until they are accessed with `meta`
+            # DEV: The tags of the span take precedence, so this only works if the span has none yet
+            self._base_meta = meta
+        else:
+            self._meta.update(meta)
+        self.metrics.update(metrics)
+
+        for k, v in iter(other.items()):
+            self.set_tag(k, v)
 
     def set_meta(self, k, v):
         self.set_tag(k, v)
@@ -274,8 +408,10 @@ class Span(object):
             log.debug("ignoring not real metric %s:%s", key, value)
             return
 
-        if key in self.meta:
-            del self.meta[key]
+        if self._deferred_tags is not None:
+            self._deferred_tags.append((None, key))
+
+        self._remove_tag(key)
         self.metrics[key] = value
 
     def set_metrics(self, metrics):
@@ -284,6 +420,8 @@ class Span(object):
                 self.set_metric(k, v)
 
     def get_metric(self, key):
+        if self._deferred_tags is not None:
+            self._set_deferred_tags()
         return self.metrics.get(key)
 
     def to_dict(self):
@@ -314,8 +452,9 @@ class Span(object):
         if self.duration_ns:
             d["duration"] = self.duration_ns
 
-        if self.meta:
-            d["meta"] = self.meta
+        meta = self._get_meta()
+        if meta:
+            d["meta"] = meta
 
         if self.metrics:
             d["metrics"] = self.metrics
@@ -334,7 +473,12 @@ class Span(object):
         if exc_type and exc_val and exc_tb:
             self.set_exc_info(exc_type, exc_val, exc_tb)
         else:
-            tb = "".join(traceback.format_stack(limit=limit + 1)[:-1])
+            stack = traceback.extract_stack(limit=limit + 1)
+            # Skip the frame of this method
+            # DEV: There is no such frame when this module is compiled with Cython
+            if stack and stack[-1][2] == "set_traceback":
+                stack = stack[:-1]
+            tb = "".join(traceback.format_list(stack[-limit:]))
             self.set_tag(errors.ERROR_STACK, tb)  # FIXME[gabin] Want to replace 'error.stack' tag with 'python.stack'
 
     def set_exc_info(self, exc_type, exc_val, exc_tb):
@@ -380,7 +524,7 @@ class Span(object):
             ("tags", ""),
         ]
 
-        lines.extend((" ", "%s:%s" % kv) for kv in sorted(self.meta.items()))
+        lines.extend((" ", "%s:%s" % kv) for kv in sorted(self._get_meta().items()))
         return "\n".join("%10s %s" % line for line in lines)
 
     @property
@@ -412,6 +556,85 @@ class Span(object):
         )
 
 
+class SpanTags(dict):
+    """A dictionary of tags set on many spans, e.g. the tags of the tracer or of a :class:`ddtrace.pin.Pin`.
+
+    The tags are classified into meta and metrics once and the result is cached until the dictionary is
+    mutated, so :meth:`Span.set_tags` can set them all at once.
+    """
+
+    __slots__ = ("_version", "_classified")
+
+    # Tags which change the sampling priority of the context of the span, they are always set one by one
+    _CONTEXT_TAGS = frozenset([MANUAL_KEEP_KEY, MANUAL_DROP_KEY])
+
+    def __init__(self, *args, **kwargs):
+        super(SpanTags, self).__init__(*args, **kwargs)
+        self._version = 0
+        self._classified = None
+
+    def _mutated(self):
+        self._version += 1
+
+    def __setitem__(self, key, value):
+        super(SpanTags, self).__setitem__(key, value)
+        self._mutated()
+
+    def __delitem__(self, key):
+        super(SpanTags, self).__delitem__(key)
+        self._mutated()
+
+    def clear(self):
+        super(SpanTags, self).clear()
+        self._mutated()
+
+    def pop(self, *args):
+        try:
+            return super(SpanTags, self).pop(*args)
+        finally:
+            self._mutated()
+
+    def popitem(self):
+        try:
+            return super(SpanTags, self).popitem()
+        finally:
+            self._mutated()
+
+    def setdefault(self, key, default=None):
+        try:
+            return super(SpanTags, self).setdefault(key, default)
+        finally:
+            self._mutated()
+
+    def update(self, *args, **kwargs):
+        super(SpanTags, self).update(*args, **kwargs)
+        self._mutated()
+
+    def classified(self):
+        """Return the tags classified the way :meth:`Span.set_tag` would.
+
+        :returns: A tuple of the meta, the metrics and the other tags that must be set one by one.
+        """
+        version = self._version
+        classified = self._classified
+        if classified is not None and classified[0] == version:
+            return classified[1:]
+
+        # DEV: Use a span without context to get exactly the meta and metrics `set_tag` would set
+        span = Span(None, None)
+        other = {}
+        for k, v in iter(self.items()):
+            if k in self._CONTEXT_TAGS:
+                other[k] = v
+            else:
+                span.set_tag(k, v)
+
+        # DEV: If the tags were mutated in the meantime, the version does not match anymore and
+        #      the tags will be classified again the next time
+        self._classified = (version, span.meta, span.metrics, other)
+        return span.meta, span.metrics, other
+
+
 def _new_id():
     """Generate a random trace_id or span_id"""
     return _getrandbits(64)
@@ -16,7 +16,7 @@ from .propagation.http import set_http_propagator_factory
 from .provider import DefaultContextProvider
 from .context import Context
 from .sampler import DatadogSampler, RateSampler, RateByServiceSampler
-from .span import Span
+from .span import Span, SpanTags
 from .utils.formats import get_env
 from .utils.deprecation import deprecated, RemovedInDDTrace10Warning
 from .vendor.dogstatsd import DogStatsd
@@ -126,7 +126,8 @@ class Tracer(object):
         )
 
         # globally set tags
-        self.tags = {}
+        # DEV: They are classified once to be set on each span at once, until they are changed
+        self.tags = SpanTags()
 
         # a buffer for service info so we don't perpetually send the same things
         self._services = set()
@@ -218,6 +218,18 @@ def get_exts_for(name):
         return []
 
 
+def get_span_exts():
+    # Compile `ddtrace/span.py` with the declarations of `ddtrace/span.pxd`, the pure-Python module is used otherwise
+    try:
+        return cythonize(
+            [Cython.Distutils.Extension("ddtrace.span", sources=["ddtrace/span.py"], language="c")],
+            compiler_directives={"language_level": 2},
+        )
+    except Exception as e:
+        print("WARNING: Failed to cythonize ddtrace.span, skipping: %s" % e)
+        return []
+
+
 # Try to build with C extensions first, fallback to only pure-Python if building fails
 try:
     all_exts = []
@@ -225,6 +237,7 @@ try:
         exts = get_exts_for(extname)
         if exts:
             all_exts.extend(exts)
+    all_exts.extend(get_span_exts())
 
     kwargs = copy.deepcopy(setup_kwargs)
     kwargs["ext_modules"] += all_exts
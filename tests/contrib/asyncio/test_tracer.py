@@ -5,6 +5,8 @@ import time
 
 from ddtrace.context import Context
 from ddtrace.internal.context_manager import CONTEXTVARS_IS_AVAILABLE
+if CONTEXTVARS_IS_AVAILABLE:
+    from ddtrace.internal.context_manager import _ContextParent, _DD_CONTEXTVAR
 from ddtrace.provider import DefaultContextProvider
 from ddtrace.contrib.asyncio.patch import patch, unpatch
 from ddtrace.contrib.asyncio.helpers import set_call_context
@@ -247,6 +249,44 @@ class TestAsyncioPropagation(AsyncioTestCase):
         assert spawn_task.trace_id == main_task.trace_id
         assert spawn_task.parent_id == main_task.span_id
 
+    @pytest.mark.skipif(
+        not CONTEXTVARS_IS_AVAILABLE,
+        reason='only applicable to contextvars provider'
+    )
+    @mark_asyncio
+    def test_tasks_parent_reference(self):
+        # ensures that new tasks only get their own Context when they trace something
+        contexts = []
+
+        @asyncio.coroutine
+        def untraced():
+            assert isinstance(_DD_CONTEXTVAR.get(), _ContextParent)
+            yield from asyncio.sleep(0.01)
+
+        @asyncio.coroutine
+        def traced():
+            contexts.append(self.tracer.get_call_context())
+            with self.tracer.trace('child'):
+                yield from asyncio.sleep(0.01)
+
+        with self.tracer.trace('main_task') as main_task:
+            ctx = self.tracer.get_call_context()
+            yield from asyncio.gather(untraced(), traced(), traced())
+            assert self.tracer.get_call_context() is ctx
+            assert self.tracer.current_span() is main_task
+
+        assert len(contexts) == 2
+        assert contexts[0] is not contexts[1]
+        assert ctx not in contexts
+
+        traces = self.tracer.writer.pop_traces()
+        assert len(traces) == 3
+        main_trace = traces.pop()
+        assert main_trace == [main_task]
+        for (child,) in traces:
+            assert child.trace_id == main_task.trace_id
+            assert child.parent_id == main_task.span_id
+
     @mark_asyncio
     def test_concurrent_chaining(self):
         # ensures that the context is correctly propagated when
@@ -1,8 +1,10 @@
 import django
 from django.test import modify_settings, override_settings
+import mock
 import os
 import pytest
 
+from ddtrace.contrib.django.compat import get_resolver
 from ddtrace.constants import ANALYTICS_SAMPLE_RATE_KEY, SAMPLING_PRIORITY_KEY
 from ddtrace.ext import http, errors
 from ddtrace.ext.priority import USER_KEEP
@@ -62,6 +64,61 @@ def test_django_v2XX_request_root_span(client, test_spans):
     )
 
 
+def test_django_request_resolved_once(client, test_spans):
+    """
+    When making a request to a Django app
+        We reuse the URL resolution done by Django to compute the resource name
+    """
+    resolver_class = type(get_resolver(None))
+    with mock.patch.object(resolver_class, "resolve", autospec=True, side_effect=resolver_class.resolve) as resolve:
+        assert client.get("/fn-view/").status_code == 200
+        assert resolve.call_count == 1
+
+    # A 404 request does not reach the URL dispatcher so the URL is resolved again
+    assert client.get("/unknown-view/").status_code == 404
+
+    resources = [span.resource for span in test_spans.spans if span.name == "django.request"]
+    if django.VERSION >= (2, 2, 0):
+        assert resources == ["GET ^fn-view/$", "GET 404"]
+    else:
+        assert resources == ["GET tests.contrib.django.views.function_view", "GET 404"]
+
+
+def test_middleware_span_threshold(client, test_spans):
+    """
+    When a middleware span threshold is configured
+        We measure the fast middleware hooks on the request span instead of tracing them
+        We still trace the middleware handlers as they call the next middleware and the view
+    """
+    with BaseTestCase.override_config("django", dict(middleware_span_threshold=1000)):
+        resp = client.get("/")
+        assert resp.status_code == 200
+
+    root = test_spans.get_root_span()
+    root.assert_matches(name="django.request")
+    metric = "django.middleware.duration.django.contrib.sessions.middleware.SessionMiddleware.process_request"
+    assert root.get_metric(metric) > 0
+
+    middleware_spans = list(test_spans.filter_spans(name="django.middleware"))
+    view_span = list(test_spans.filter_spans(name="django.view"))[0]
+    if django.VERSION >= (2, 0, 0):
+        # Only the handlers are traced, each one is the child of the previous one
+        assert middleware_spans
+        assert not any(".process_" in span.resource for span in middleware_spans)
+        assert not any(
+            root.get_metric("django.middleware.duration.{0}".format(span.resource)) for span in middleware_spans
+        )
+        parent = root
+        for span in sorted(middleware_spans, key=lambda span: span.start_ns):
+            assert span.parent_id == parent.span_id
+            parent = span
+        assert view_span.parent_id == parent.span_id
+    else:
+        assert middleware_spans == []
+        # The spans of the view are attached to the request span
+        assert view_span.parent_id == root.span_id
+
+
 @pytest.mark.skipif(django.VERSION >= (2, 0, 0), reason="")
 def test_v1XX_middleware(client, test_spans):
     resp = client.get("/")
@@ -50,6 +50,27 @@ class FlaskHookTestCase(BaseFlaskTestCase):
         # Assert correct parent span
         self.assertEqual(parent.name, 'flask.preprocess_request')
 
+    def test_before_request_span_threshold(self):
+        """
+        When Flask before_request hook is registered
+            When a hook span threshold is configured
+                We measure the hook on the request span instead of tracing it
+        """
+        @self.app.before_request
+        def before_request():
+            pass
+
+        with self.override_config('flask', dict(hook_span_threshold=1000)):
+            req = self.client.get('/')
+        self.assertEqual(req.status_code, 200)
+
+        spans = self.get_spans()
+        self.assertEqual(len(spans), 8)
+        self.assertNotIn('tests.contrib.flask.test_hooks.before_request', [s.name for s in spans])
+
+        req_span = self.find_span_by_name(spans, 'flask.request')
+        self.assertGreater(req_span.get_metric('flask.hook.duration.tests.contrib.flask.test_hooks.before_request'), 0)
+
     def test_before_request_return(self):
         """
         When Flask before_request hook is registered
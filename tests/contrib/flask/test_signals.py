@@ -112,6 +112,23 @@ class FlaskSignalsTestCase(BaseFlaskTestCase):
             self.assertEqual(set(span.meta.keys()), set(['flask.signal']))
             self.assertEqual(span.meta['flask.signal'], signal_name)
 
+    def test_signals_span_threshold(self):
+        """
+        When a signal is connected
+            When a hook span threshold is configured
+                We measure the signal receiver on the active span instead of tracing it
+        """
+        with self.override_config('flask', dict(hook_span_threshold=1000)):
+            with self.tracer.trace('flask.request') as span:
+                func = self.call_signal('request_started', self.app)
+
+        func.assert_called_once_with(self.app)
+
+        spans = self.get_spans()
+        self.assertEqual(spans, [span])
+        metric = 'flask.signal.duration.request_started.tests.contrib.flask.request_started'
+        self.assertGreater(span.get_metric(metric), 0)
+
     def test_signals_multiple(self):
         """
         When a signal is connected
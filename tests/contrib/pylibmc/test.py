@@ -137,6 +137,8 @@ class PylibmcCore(object):
         expected_resources = sorted(['get_multi', 'set_multi', 'delete_multi'])
         resources = sorted(s.resource for s in spans)
         assert expected_resources == resources
+        for s in spans:
+            assert s.get_metric('memcached.keys_length') == 2
 
     def test_get_set_multi_prefix(self):
         client, tracer = self.get_client()
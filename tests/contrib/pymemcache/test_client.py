@@ -14,6 +14,7 @@ from ddtrace.vendor import wrapt
 # project
 from ddtrace import Pin
 from ddtrace.contrib.pymemcache.patch import patch, unpatch
+from ddtrace.ext import memcached as memcachedx
 from .utils import MockSocket, _str
 from .test_client_mixin import PymemcacheClientTestCaseMixin, TEST_HOST, TEST_PORT
 
@@ -271,6 +272,19 @@ class PymemcacheHashClientTestCase(PymemcacheClientTestCaseMixin):
 
         self.check_spans(2, ['add', 'delete'], ['add key', 'delete key'])
 
+    def test_set_many_summarized(self):
+        """
+        set_many internally calls client.set for each key so there is nothing
+        to summarize.
+        """
+        client = self.make_client([b'STORED\r\n', b'STORED\r\n'])
+        client.set_many({b'key1': b'value', b'key2': b'other value'})
+
+        spans = self.get_spans()
+        self.assertEqual(sorted(span.resource for span in spans), ['set', 'set'])
+        for span in spans:
+            self.assertIsNone(span.get_metric(memcachedx.KEYS_LEN))
+
 
 class PymemcacheClientConfiguration(unittest.TestCase):
     """Ensure that pymemache can be configured properly."""
@@ -126,6 +126,29 @@ class PymemcacheClientTestCaseMixin(unittest.TestCase):
 
         self.check_spans(2, ['add', 'delete_many'], ['add key', 'delete_many key'])
 
+    def test_get_many_summarized(self):
+        client = self.make_client([b'END\r\n'])
+        keys = [('key-%d' % i).encode() for i in range(1000)]
+        result = client.get_many(keys)
+        assert result == {}
+
+        spans = self.get_spans()
+        self.assertEqual(len(spans), 1)
+        query = spans[0].get_tag(memcachedx.QUERY)
+        self.assertTrue(query.startswith('get_many key-0 key-1 '))
+        self.assertTrue(query.endswith('...'))
+        self.assertLess(len(query), 1100)
+        self.assertEqual(spans[0].get_metric(memcachedx.KEYS_LEN), 1000)
+
+    def test_set_many_summarized(self):
+        client = self.make_client([b'STORED\r\n', b'STORED\r\n'])
+        client.set_many({b'key1': b'value', b'key2': b'other value'})
+
+        spans = self.get_spans()
+        self.assertEqual(len(spans), 1)
+        self.assertEqual(spans[0].get_metric(memcachedx.KEYS_LEN), 2)
+        self.assertEqual(spans[0].get_metric(memcachedx.VALUES_SIZE), 16)
+
     def test_set_many_success(self):
         client = self.make_client([b'STORED\r\n'])
         result = client.set_many({b'key': b'value'}, noreply=False)
@@ -2,9 +2,15 @@
 tests for parsing specs.
 """
 
+import re
+import struct
+
+import bson
 from bson.son import SON
+import pytest
 
-from ddtrace.contrib.pymongo.parse import parse_spec
+from ddtrace.contrib.pymongo.parse import parse_document, parse_msg, parse_spec
+from ddtrace.ext import net as netx
 
 
 def test_empty():
@@ -50,3 +56,99 @@ def test_update():
     assert cmd.name == 'update'
     assert cmd.coll == 'songs'
     assert cmd.query == {'artist': 'Neil'}
+
+
+def _op_query(ns, spec):
+    body = struct.pack('<i', 0) + ns + b'\x00' + struct.pack('<ii', 0, -1) + bson.BSON.encode(spec)
+    return struct.pack('<iiii', 16 + len(body), 1, 0, 2004) + body
+
+
+def _op_msg(spec, documents=None):
+    body = struct.pack('<i', 0) + b'\x00' + bson.BSON.encode(spec)
+    if documents is not None:
+        sequence = b'documents\x00' + b''.join(bson.BSON.encode(doc) for doc in documents)
+        body += b'\x01' + struct.pack('<i', 4 + len(sequence)) + sequence
+    return struct.pack('<iiii', 16 + len(body), 1, 0, 2013) + body
+
+
+@pytest.mark.parametrize('spec', [
+    SON([('create', 'foo')]),
+    SON([('insert', 'bla'), ('ordered', True), ('documents', [{'a': 1}, {'b': 2}])]),
+    SON([
+        ('update', u'songs'),
+        ('ordered', False),
+        ('updates', [SON([('q', {'artist': 'Neil'}), ('u', {'$set': {'artist': 'Shakey'}})])]),
+        ('$db', 'testdb'),
+    ]),
+    SON([('delete', 'songs'), ('deletes', [SON([('q', {'artist': 'Neil'}), ('limit', 0)])])]),
+    SON([('find', 'songs'), ('filter', {'artist': 'Neil'}), ('limit', 10), ('$db', 'testdb')]),
+    SON([('ismaster', 1)]),
+])
+def test_parse_document(spec):
+    expected = parse_spec(spec, 'db' if '$db' not in spec else None)
+    cmd = parse_document(bson.BSON.encode(spec), 0, 'db' if '$db' not in spec else None)
+    assert (cmd.name, cmd.db, cmd.coll, cmd.query, cmd.tags, cmd.metrics) == (
+        expected.name, expected.db, expected.coll, expected.query, expected.tags, expected.metrics
+    )
+
+
+def test_parse_document_skip_values():
+    # All the BSON types can be skipped to find the fields after them
+    spec = SON([
+        ('insert', 'songs'),
+        ('double', 1.5),
+        ('document', {'a': [1, 2]}),
+        ('binary', bson.Binary(b'\x00\x01', 4)),
+        ('objectid', bson.ObjectId()),
+        ('bool', False),
+        ('none', None),
+        ('regex', bson.Regex('^a.*', 'i')),
+        ('code', bson.Code('function() {}')),
+        ('code_with_scope', bson.Code('function() {}', {'a': 1})),
+        ('int32', 1),
+        ('timestamp', bson.Timestamp(1, 1)),
+        ('int64', bson.Int64(1)),
+        ('decimal', bson.Decimal128('1.5')),
+        ('min', bson.MinKey()),
+        ('max', bson.MaxKey()),
+        ('pattern', re.compile('b')),
+        ('ordered', True),
+        ('$db', 'testdb'),
+    ])
+    cmd = parse_document(bson.BSON.encode(spec), 0)
+    assert cmd.name == 'insert'
+    assert cmd.coll == 'songs'
+    assert cmd.db == 'testdb'
+    assert cmd.tags == {'mongodb.ordered': True}
+
+
+def test_parse_msg_query():
+    msg = _op_query(b'testdb.$cmd', SON([('insert', 'songs'), ('documents', [{'i': i} for i in range(1000)])]))
+    cmd = parse_msg(msg)
+    assert cmd.name == 'insert'
+    assert cmd.db == 'testdb'
+    assert cmd.coll == 'songs'
+    assert cmd.metrics == {'mongodb.documents': 1000, netx.BYTES_OUT: len(msg)}
+
+
+def test_parse_msg_sequence():
+    msg = _op_msg(
+        SON([('insert', 'songs'), ('ordered', True), ('$db', 'testdb')]),
+        documents=[{'i': i} for i in range(1000)],
+    )
+    cmd = parse_msg(msg)
+    assert cmd.name == 'insert'
+    assert cmd.db == 'testdb'
+    assert cmd.coll == 'songs'
+    assert cmd.tags == {'mongodb.ordered': True}
+    assert cmd.metrics == {'mongodb.documents': 1000, netx.BYTES_OUT: len(msg)}
+
+
+def test_parse_msg_large():
+    # Large messages are parsed without decoding their documents
+    msg = _op_msg(SON([('insert', 'songs'), ('$db', 'testdb')]), documents=[{'s': 'x' * 1024}] * 2048)
+    assert len(msg) > 2 * 1024 * 1024
+    cmd = parse_msg(msg)
+    assert cmd.name == 'insert'
+    assert cmd.coll == 'songs'
+    assert cmd.metrics['mongodb.documents'] == 2048
@@ -5,6 +5,7 @@ from ddtrace import Pin, compat
 from ddtrace.constants import ANALYTICS_SAMPLE_RATE_KEY
 from ddtrace.contrib.redis import get_traced_redis
 from ddtrace.contrib.redis.patch import patch, unpatch
+from ddtrace.contrib.redis.util import CMD_MAX_LEN, format_pipeline
 
 from tests.opentracer.utils import init_tracer
 from ..config import REDIS_CONFIG
@@ -24,6 +25,26 @@ def test_redis_legacy():
     assert not tracer.writer.pop()
 
 
+def test_format_pipeline():
+    resource, metrics = format_pipeline([('SET', 'blah', 32), ('SET', 'x' * 200, 'y'), ('GET', 'blah')])
+    assert resource == 'SET blah 32\nSET {}... y\nGET blah'.format('x' * 100)
+    assert metrics == {
+        'redis.args_length': 8,
+        'redis.args_size': 218,
+        'redis.pipeline_commands.SET': 2,
+        'redis.pipeline_commands.GET': 1,
+    }
+
+
+def test_format_pipeline_truncated():
+    resource, metrics = format_pipeline(('SET', 'key-%d' % i, 'value') for i in range(10000))
+    assert len(resource) == CMD_MAX_LEN + len('...')
+    assert resource.endswith('...')
+    assert resource.startswith('SET key-0 value\nSET key-1 value\n')
+    assert metrics['redis.pipeline_commands.SET'] == 10000
+    assert metrics['redis.args_length'] == 30000
+
+
 class TestRedisPatch(BaseTracerTestCase):
 
     TEST_SERVICE = 'redis-patch'
@@ -130,7 +151,11 @@ class TestRedisPatch(BaseTracerTestCase):
         assert span.get_tag('out.host') == 'localhost'
         assert span.get_tag('redis.raw_command') == u'SET blah 32\nRPUSH foo éé\nHGETALL xxx'
         assert span.get_metric('redis.pipeline_length') == 3
-        assert span.get_metric('redis.pipeline_length') == 3
+        assert span.get_metric('redis.args_length') == 7
+        assert span.get_metric('redis.args_size') == 27
+        assert span.get_metric('redis.pipeline_commands.SET') == 1
+        assert span.get_metric('redis.pipeline_commands.RPUSH') == 1
+        assert span.get_metric('redis.pipeline_commands.HGETALL') == 1
         assert span.get_metric(ANALYTICS_SAMPLE_RATE_KEY) is None
 
     def test_pipeline_immediate(self):
@@ -0,0 +1,76 @@
+import mock
+import pytest
+
+from ddtrace.contrib.trace_utils import trace_coalesced
+
+from ..utils.tracer import DummyTracer
+
+
+@pytest.fixture
+def tracer():
+    return DummyTracer()
+
+
+def _call(tracer, threshold, func=lambda: "result", tags=None):
+    return trace_coalesced(tracer, threshold, "hook.duration", "hook", func, (), {}, service="svc", tags=tags)
+
+
+def test_trace_coalesced_no_threshold(tracer):
+    with tracer.trace("request"):
+        assert _call(tracer, None, tags={"key": "value"}) == "result"
+
+    root, span = tracer.writer.pop()
+    assert span.name == "hook"
+    assert span.service == "svc"
+    assert span.parent_id == root.span_id
+    assert span.get_tag("key") == "value"
+    assert root.get_metric("hook.duration") is None
+
+
+def test_trace_coalesced_fast(tracer):
+    with tracer.trace("request"):
+        with tracer.trace("child"):
+            with mock.patch("ddtrace.contrib.trace_utils.time_ns", side_effect=[0, 2000000, 5000000, 6000000]):
+                assert _call(tracer, 10) == "result"
+                assert _call(tracer, 10) == "result"
+
+    root, child = tracer.writer.pop()
+    # The durations are summed on the local root span
+    assert root.get_metric("hook.duration") == 0.003
+    assert child.get_metric("hook.duration") is None
+
+
+def test_trace_coalesced_slow(tracer):
+    with tracer.trace("request"):
+        with mock.patch("ddtrace.contrib.trace_utils.time_ns", side_effect=[1000000000, 1010000000]):
+            assert _call(tracer, 10, tags={"key": "value"}) == "result"
+
+    root, span = tracer.writer.pop()
+    assert span.name == "hook"
+    assert span.service == "svc"
+    assert span.parent_id == root.span_id
+    assert span.start_ns == 1000000000
+    assert span.duration_ns == 10000000
+    assert span.get_tag("key") == "value"
+    assert root.get_metric("hook.duration") is None
+
+
+def test_trace_coalesced_error(tracer):
+    def func():
+        raise ValueError("boom")
+
+    with tracer.trace("request"):
+        with pytest.raises(ValueError):
+            _call(tracer, 10, func)
+
+    root, span = tracer.writer.pop()
+    assert span.name == "hook"
+    assert span.error == 1
+    assert span.get_tag("error.msg") == "boom"
+
+
+def test_trace_coalesced_no_parent(tracer):
+    assert _call(tracer, 10) == "result"
+
+    (span,) = tracer.writer.pop()
+    assert span.name == "hook"
@@ -1,11 +1,18 @@
 import threading
 
+import pytest
+
 from ddtrace.context import Context
-from ddtrace.internal.context_manager import DefaultContextManager
+from ddtrace.internal.context_manager import CONTEXTVARS_IS_AVAILABLE, DefaultContextManager
 from ddtrace.span import Span
 
 from ..base import BaseTestCase
 
+if CONTEXTVARS_IS_AVAILABLE:
+    import contextvars
+
+    from ddtrace.internal.context_manager import ContextVarContextManager
+
 
 class TestDefaultContextManager(BaseTestCase):
     """
@@ -58,3 +65,25 @@ class TestDefaultContextManager(BaseTestCase):
         # new context manager should not share same context
         ctxm = DefaultContextManager()
         assert ctxm.get() is not ctx
+
+    @pytest.mark.skipif(not CONTEXTVARS_IS_AVAILABLE, reason='only applicable to contextvars')
+    def test_fork(self):
+        # the Context of a forked scope is created from the active span the first time it is needed
+        ctxm = ContextVarContextManager()
+        ctx = ctxm.get()
+        span = Span(tracer=None, name='fake_span', trace_id=1, span_id=2)
+        ctx.add_span(span)
+
+        token = ctxm.fork()
+        try:
+            assert ctxm._has_active_context()
+            forked = contextvars.copy_context().run(ctxm.get)
+        finally:
+            ctxm.unfork(token)
+
+        assert ctxm.get() is ctx
+        assert forked is not ctx
+        assert forked.trace_id == 1
+        assert forked.span_id == 2
+        assert forked.get_current_span() is span
+        assert forked._trace == []
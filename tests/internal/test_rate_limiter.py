@@ -1,10 +1,12 @@
 from __future__ import division
+import threading
+
 import mock
 
 import pytest
 
 from ddtrace import compat
-from ddtrace.internal.rate_limiter import RateLimiter
+from ddtrace.internal.rate_limiter import RateLimiter, ShardedRateLimiter
 
 
 def test_rate_limiter_init():
@@ -189,3 +191,102 @@ def test_rate_liimter_effective_rate_starting_rate():
         assert limiter.effective_rate == 0.75
         assert limiter.current_window == (now + 100.0)
         assert limiter.prev_window_rate == 0.5
+
+
+@pytest.mark.parametrize('rate_limit,expected', [(0, False), (-1, True)])
+def test_sharded_rate_limiter_rate_limit_0_or_negative(rate_limit, expected):
+    limiter = ShardedRateLimiter(rate_limit=rate_limit)
+
+    now = compat.monotonic()
+    with mock.patch('ddtrace.compat.monotonic') as mock_time:
+        for i in range(10000):
+            mock_time.return_value = now + i
+            assert limiter.is_allowed() is expected
+
+
+@pytest.mark.parametrize('rate_limit', [1, 10, 50, 100, 500, 1000])
+def test_sharded_rate_limiter_is_allowed(rate_limit):
+    limiter = ShardedRateLimiter(rate_limit=rate_limit)
+
+    now = compat.monotonic()
+    # Check the limit for 5 time frames
+    for i in range(5):
+        with mock.patch('ddtrace.compat.monotonic') as mock_time:
+            mock_time.return_value = now + i
+
+            # Up to the allowed limit is allowed, any over the limit is disallowed
+            allowed = sum(limiter.is_allowed() for _ in range(rate_limit + 1000))
+            assert allowed == rate_limit
+
+
+def test_sharded_rate_limiter_lease_expired():
+    limiter = ShardedRateLimiter(rate_limit=1000)
+    assert limiter.batch_size == 10
+
+    now = compat.monotonic()
+    with mock.patch('ddtrace.compat.monotonic') as mock_time:
+        mock_time.return_value = now
+        for _ in range(5):
+            assert limiter.is_allowed() is True
+        assert limiter.tokens == 990
+        assert limiter._get_shard().tokens == 5
+
+        # The tokens borrowed and not used are discarded once the lease expired
+        mock_time.return_value = now + 2 * limiter.LEASE_DURATION
+        assert limiter.is_allowed() is True
+        assert limiter.tokens == 990
+        assert limiter._get_shard().tokens == 9
+
+
+def test_sharded_rate_limiter_effective_rate():
+    limiter = ShardedRateLimiter(rate_limit=100)
+    assert limiter.effective_rate == 1.0
+
+    now = compat.monotonic()
+    with mock.patch('ddtrace.compat.monotonic') as mock_time:
+        mock_time.return_value = now
+        for _ in range(200):
+            limiter.is_allowed()
+        assert limiter.effective_rate == 0.5
+
+    def other_thread():
+        # Counters of all the threads are aggregated
+        with mock.patch('ddtrace.compat.monotonic') as mock_time:
+            mock_time.return_value = now + 1.0
+            for _ in range(100):
+                assert limiter.is_allowed() is True
+
+    t = threading.Thread(target=other_thread)
+    t.start()
+    t.join()
+    assert limiter.effective_rate == 0.75
+
+
+@pytest.mark.parametrize('limiter_class', [RateLimiter, ShardedRateLimiter])
+def test_rate_limiter_accuracy(limiter_class):
+    # Many threads asking for tokens as fast as they can
+    rate_limit = 1000
+    duration = 0.5
+    nthreads = 8
+    limiter = limiter_class(rate_limit=rate_limit)
+    start = compat.monotonic()
+    allowed = []
+
+    def run():
+        count = 0
+        while compat.monotonic() - start < duration:
+            count += limiter.is_allowed()
+        allowed.append(count)
+
+    threads = [threading.Thread(target=run) for _ in range(nthreads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = compat.monotonic() - start
+
+    # The burst of `rate_limit` tokens plus the ones replenished in the meantime, never more
+    assert sum(allowed) <= rate_limit + rate_limit * elapsed
+    # Up to a batch per thread may be left unused, allow 5% more for the threads still running after `duration`
+    unused = nthreads * getattr(limiter, 'batch_size', 0)
+    assert sum(allowed) >= (rate_limit + rate_limit * duration) * 0.95 - unused
@@ -0,0 +1,111 @@
+import mock
+
+from ddtrace import compat
+from ddtrace.constants import SAMPLING_PRIORITY_KEY
+from ddtrace.ext import priority
+from ddtrace.internal.tail_sampler import TailSampler
+from ddtrace.internal.encoding_utils import estimate_size
+from ddtrace.span import Span
+
+
+def _trace(resource="resource", duration=0.1, error=0, spans=2):
+    root = Span(tracer=None, name="root", resource=resource)
+    root.duration = duration
+    root.error = error
+    trace = [root]
+    for _ in range(spans - 1):
+        child = Span(tracer=None, name="child", parent_id=root.span_id)
+        child._parent = root
+        child.duration = duration
+        trace.append(child)
+    return trace
+
+
+def test_tail_sampler_keep_interesting():
+    sampler = TailSampler(rate_limit=0, latency_threshold=1.0, latency_thresholds={"slow": 5.0})
+
+    errored = _trace()
+    errored[1].error = 1
+    slow = _trace(duration=2.0)
+    slow_resource = _trace(resource="slow", duration=2.0)
+    kept = _trace()
+    kept[0].set_metric(SAMPLING_PRIORITY_KEY, priority.USER_KEEP)
+    incomplete = _trace()[1:]
+
+    assert sampler.process([errored, slow, slow_resource, kept, incomplete]) == [errored, slow, kept, incomplete]
+    assert sampler.reset_stats() == ({"error": 1, "latency": 1, "priority": 1, "incomplete": 1}, 1)
+    assert sampler.reset_stats() == ({}, 0)
+
+
+def test_tail_sampler_keep_priority():
+    sampler = TailSampler(window=60, rate_limit=1)
+    traces = []
+    for sampling_priority in (priority.AUTO_REJECT, priority.USER_REJECT, priority.USER_KEEP, None):
+        trace = _trace(error=1)
+        if sampling_priority is not None:
+            trace[0].set_metric(SAMPLING_PRIORITY_KEY, sampling_priority)
+        traces.append(trace)
+    buffered = _trace()
+    buffered[0].set_metric(SAMPLING_PRIORITY_KEY, priority.AUTO_REJECT)
+
+    # The kept traces are not rejected by priority sampling anymore
+    assert sampler.process(traces + [buffered], flush=True) == traces + [buffered]
+    assert [trace[0].get_metric(SAMPLING_PRIORITY_KEY) for trace in traces + [buffered]] == [
+        priority.AUTO_KEEP,
+        priority.AUTO_KEEP,
+        priority.USER_KEEP,
+        None,
+        priority.AUTO_KEEP,
+    ]
+
+
+def test_tail_sampler_window():
+    now = compat.monotonic()
+    sampler = TailSampler(window=5, rate_limit=2)
+    with mock.patch("ddtrace.compat.monotonic") as mock_time:
+        mock_time.return_value = now
+        traces = [_trace() for _ in range(100)]
+        # Boring traces are buffered until the end of the window
+        assert sampler.process(traces) == []
+        assert sampler.size_bytes == sum(map(estimate_size, traces[:10]))
+
+        mock_time.return_value = now + 4.9
+        assert sampler.process([]) == []
+
+        mock_time.return_value = now + 5
+        sent = sampler.process([])
+        assert len(sent) == 10
+        assert all(trace in traces for trace in sent)
+        assert sampler.size_bytes == 0
+        assert sampler.reset_stats() == ({"sampled": 10}, 90)
+
+
+def test_tail_sampler_uniform():
+    # Each trace of the window has the same chance to be kept
+    counts = [0] * 10
+    for _ in range(1000):
+        sampler = TailSampler(window=1, rate_limit=1)
+        traces = [_trace() for _ in range(10)]
+        (sent,) = sampler.process(traces, flush=True)
+        counts[traces.index(sent)] += 1
+    assert all(50 < count < 150 for count in counts)
+
+
+def test_tail_sampler_max_size_bytes():
+    size = estimate_size(_trace())
+    sampler = TailSampler(rate_limit=100, max_size_bytes=size * 3)
+    sampler.process([_trace() for _ in range(10)])
+    assert sampler.size_bytes == size * 3
+    assert len(sampler.process([], flush=True)) == 3
+    assert sampler.reset_stats() == ({"sampled": 3}, 7)
+
+
+def test_tail_sampler_recreate():
+    sampler = TailSampler(window=60, rate_limit=1, latency_thresholds={"slow": 5.0}, max_size_bytes=1000)
+    sampler.process([_trace() for _ in range(3)])
+    recreated = sampler.recreate()
+    assert recreated is not sampler
+    assert repr(recreated) == repr(sampler)
+    assert recreated.latency_thresholds == {"slow": 5.0}
+    assert recreated.size_bytes == 0
+    assert recreated.process([], flush=True) == []
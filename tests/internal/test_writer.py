@@ -1,12 +1,22 @@
+import sys
+import threading
 import time
 
 import pytest
 
 import mock
 
-from ddtrace.span import Span
+from ddtrace.vendor.six.moves import BaseHTTPServer
+from ddtrace.vendor.six.moves import socketserver
+
+from ddtrace.span import Span, SpanTags
 from ddtrace.api import API
-from ddtrace.internal.writer import AgentWriter, Q, Empty
+from ddtrace.constants import SAMPLING_PRIORITY_KEY
+from ddtrace.ext import priority
+from ddtrace.internal.tail_sampler import TailSampler
+from ddtrace.internal.writer import AgentWriter, Q, PerThreadQ, Empty
+from ddtrace.internal.encoding_utils import SPAN_SIZE_ESTIMATE, TAG_SIZE_ESTIMATE, estimate_size
+from ddtrace.internal.writer import MAX_TRACES_SIZE, get_priority
 from ..base import BaseTestCase
 
 
@@ -62,6 +72,10 @@ class FailingAPI(object):
     def send_traces(traces):
         return [Exception("oops")]
 
+    @staticmethod
+    def close():
+        pass
+
 
 class AgentWriterTests(BaseTestCase):
     N_TRACES = 11
@@ -132,6 +146,8 @@ class AgentWriterTests(BaseTestCase):
         assert [
             mock.call("datadog.tracer.heartbeat", 1),
             mock.call("datadog.tracer.queue.max_length", 1000),
+            mock.call("datadog.tracer.queue.max_size_bytes", MAX_TRACES_SIZE),
+            mock.call("datadog.tracer.queue.size_bytes", 11 * 7 * SPAN_SIZE_ESTIMATE),
         ] == self.dogstatsd.gauge.mock_calls
 
         assert [
@@ -166,6 +182,8 @@ class AgentWriterTests(BaseTestCase):
         assert [
             mock.call("datadog.tracer.heartbeat", 1),
             mock.call("datadog.tracer.queue.max_length", 1000),
+            mock.call("datadog.tracer.queue.max_size_bytes", MAX_TRACES_SIZE),
+            mock.call("datadog.tracer.queue.size_bytes", 11 * 7 * SPAN_SIZE_ESTIMATE),
         ] == self.dogstatsd.gauge.mock_calls
 
         assert [
@@ -200,7 +218,9 @@ def test_queue_full():
     q.put(2)
     q.put([3])
     q.put([4, 4])
-    assert list(q.queue) == [[1], 2, [4, 4]] or list(q.queue) == [[1], [4, 4], [3]] or list(q.queue) == [[4, 4], 2, [3]]
+    assert len(q.queue) == 3
+    assert [4, 4] in q.queue
+    assert len([item for item in ([1], 2, [3]) if item in q.queue]) == 2
     assert q.dropped == 1
     assert q.accepted == 4
     assert q.accepted_lengths == 5
@@ -210,6 +230,78 @@ def test_queue_full():
     assert accepted_lengths == 5
 
 
+def _trace(sampling_priority=None, spans=1):
+    trace = [Span(tracer=None, name="name") for _ in range(spans)]
+    if sampling_priority is not None:
+        trace[0].set_metric(SAMPLING_PRIORITY_KEY, sampling_priority)
+    return trace
+
+
+def test_estimate_size():
+    span = Span(tracer=None, name="name")
+    span.set_tag("component", "test")
+    span.set_tag("num", 1)
+    assert estimate_size([span, Span(tracer=None, name="name")]) == 2 * SPAN_SIZE_ESTIMATE + 2 * TAG_SIZE_ESTIMATE + 4
+    assert estimate_size(1) == 0
+
+
+def test_queue_full_priority():
+    q = Q(maxsize=3)
+    keep = _trace(priority.USER_KEEP)
+    q.put(keep)
+    q.put(_trace(priority.AUTO_REJECT))
+    q.put(_trace(priority.AUTO_REJECT))
+
+    # Traces with a lower priority than all the queued ones are dropped
+    q.put(_trace(priority.USER_REJECT))
+    assert q.dropped == 1
+    assert [get_priority(t) for t in q.queue].count(priority.AUTO_REJECT) == 2
+
+    # Rejected traces are dropped before kept ones
+    for _ in range(2):
+        q.put(_trace(priority.AUTO_KEEP))
+    assert q.dropped == 3
+    assert keep in q.queue
+    assert sorted(get_priority(t) for t in q.queue) == [priority.AUTO_KEEP, priority.AUTO_KEEP, priority.USER_KEEP]
+
+
+def test_queue_max_size_bytes():
+    q = Q(max_size_bytes=3 * SPAN_SIZE_ESTIMATE)
+    q.put(_trace())
+    q.put(_trace(spans=2))
+    assert q.size_bytes == 3 * SPAN_SIZE_ESTIMATE
+
+    # Make room for a new trace
+    q.put(_trace())
+    assert q.dropped == 1
+    assert q.size_bytes <= 3 * SPAN_SIZE_ESTIMATE
+    assert q.size_bytes == sum(estimate_size(t) for t in q.queue)
+
+    # A trace bigger than the budget is dropped
+    q.put(_trace(spans=4))
+    assert q.dropped == 2
+    assert q.accepted == 4
+
+    assert len(q.get()) in (1, 2)
+    assert q.size_bytes == 0
+
+
+def test_queue_estimate_size():
+    trace = _trace(spans=2)
+    assert Q(max_size_bytes=MAX_TRACES_SIZE).estimate_size(trace) == estimate_size(trace)
+    # The traces are not measured when the size in bytes of the queue is not limited
+    assert Q().estimate_size(trace) == 0
+    assert PerThreadQ().estimate_size(trace) == 0
+
+    with mock.patch.object(AgentWriter, "_per_thread_queue", True):
+        writer = AgentWriter(dogstatsd=mock.Mock())
+    writer._started = True
+    with mock.patch("ddtrace.internal.writer.estimate_size") as mock_estimate_size:
+        writer.write(trace)
+        mock_estimate_size.assert_not_called()
+    assert writer._trace_queue.get() == [trace]
+
+
 def test_queue_get():
     q = Q(maxsize=3)
     q.put(1)
@@ -217,3 +309,321 @@ def test_queue_get():
     assert list(q.get()) == [1, 2]
     with pytest.raises(Empty):
         q.get(block=False)
+
+
+def test_per_thread_queue_full():
+    q = PerThreadQ(maxsize=3)
+    q.put([1])
+    q.put(2)
+    q.put([3])
+    q.put([4, 4])
+    assert q.get() in ([[1], 2, [4, 4]], [[1], [4, 4], [3]], [[4, 4], 2, [3]])
+    assert q.dropped == 1
+    assert q.accepted == 4
+    assert q.accepted_lengths == 5
+    dropped, accepted, accepted_lengths = q.reset_stats()
+    assert dropped == 1
+    assert accepted == 4
+    assert accepted_lengths == 5
+    assert q.reset_stats() == (0, 0, 0)
+
+
+def test_per_thread_queue_get():
+    q = PerThreadQ(maxsize=3)
+    q.put(1)
+    q.put(2)
+    assert q.get() == [1, 2]
+    with pytest.raises(Empty):
+        q.get(block=False)
+
+
+def test_per_thread_queue_threads():
+    q = PerThreadQ(maxsize=100)
+
+    def produce():
+        for i in range(50):
+            q.put([i])
+
+    threads = [threading.Thread(target=produce) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert q.qsize() == 100
+    assert len(q.get()) == 100
+    assert q.reset_stats() == (100, 200, 200)
+
+    # Buffers of threads that are gone are retired once drained, keeping their statistics
+    with pytest.raises(Empty):
+        q.get()
+    assert q._buffers == []
+    produce()
+    assert q.reset_stats() == (0, 50, 50)
+
+
+def test_per_thread_queue_concurrent_get():
+    # Every item accepted is either returned by `get` or counted as dropped
+    q = PerThreadQ(maxsize=10)
+    received = []
+    done = threading.Event()
+
+    def produce(n):
+        for i in range(2000):
+            q.put((n, i))
+
+    def consume():
+        while not done.is_set():
+            try:
+                received.extend(q.get())
+            except Empty:
+                pass
+
+    # DEV: Switch threads as often as possible to interleave `put` and `get`
+    interval = sys.getswitchinterval() if hasattr(sys, "getswitchinterval") else None
+    if interval is not None:
+        sys.setswitchinterval(1e-6)
+    try:
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        producers = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+        for t in producers:
+            t.start()
+        for t in producers:
+            t.join()
+        done.set()
+        consumer.join()
+    finally:
+        if interval is not None:
+            sys.setswitchinterval(interval)
+    try:
+        received.extend(q.get())
+    except Empty:
+        pass
+
+    dropped, accepted, _ = q.reset_stats()
+    assert accepted == 8000
+    assert len(set(received)) == len(received)
+    assert len(received) == accepted - dropped
+
+
+def test_per_thread_queue_writer():
+    with mock.patch.object(AgentWriter, "_per_thread_queue", True):
+        writer = AgentWriter()
+    assert isinstance(writer._trace_queue, PerThreadQ)
+    assert isinstance(AgentWriter()._trace_queue, Q)
+
+
+def test_recreate_connection_pool():
+    writer = AgentWriter()
+    writer.api._connections.append(mock.Mock())
+    new_writer = writer.recreate()
+    assert new_writer.api is not writer.api
+    assert new_writer.api._connections == []
+
+
+def test_writer_early_flush():
+    writer = AgentWriter()
+    writer.FLUSH_SPANS_THRESHOLD = 10
+    writer._started = True
+    with mock.patch.object(writer, "wakeup") as wakeup:
+        writer.write([Span(tracer=None, name="name") for _ in range(9)])
+        wakeup.assert_not_called()
+        writer.write([Span(tracer=None, name="name")])
+        wakeup.assert_called_once()
+
+
+def test_writer_adaptive_interval():
+    writer = AgentWriter()
+    writer.api = DummyAPI()
+    writer._started = True
+
+    # The interval grows while there is nothing to flush
+    for interval in (2, 4, 8, 10, 10):
+        writer.run_periodic()
+        assert writer.interval == interval
+
+    # A write wakes the idle writer up, which goes back to the default interval
+    with mock.patch.object(writer, "wakeup") as wakeup:
+        writer.write([Span(tracer=None, name="name")])
+        wakeup.assert_called_once()
+    writer.run_periodic()
+    assert writer.interval == AgentWriter.QUEUE_PROCESSING_INTERVAL
+    assert len(writer.api.traces) == 1
+
+
+def test_writer_tail_sampling():
+    with mock.patch.object(AgentWriter, "_tail_sampling", True):
+        assert isinstance(AgentWriter()._tail_sampler, TailSampler)
+    assert AgentWriter()._tail_sampler is None
+
+    dogstatsd = mock.Mock()
+    writer = AgentWriter(dogstatsd=dogstatsd, tail_sampler=TailSampler(window=60, rate_limit=1))
+    recreated = writer.recreate()._tail_sampler
+    assert recreated is not writer._tail_sampler
+    assert repr(recreated) == repr(writer._tail_sampler)
+    writer.api = DummyAPI()
+    writer._started = True
+    errored = Span(tracer=None, name="name")
+    errored.error = 1
+    traces = [[errored]] + [[Span(tracer=None, name="name")] for _ in range(100)]
+    for trace in traces:
+        writer.write(trace)
+
+    with BaseTestCase.override_global_config(dict(health_metrics_enabled=True)):
+        # Errored traces are sent right away, the others are buffered until the end of the window
+        writer.run_periodic()
+        assert writer.api.traces == [[errored]]
+        dogstatsd.increment.assert_any_call("datadog.tracer.tail_sampling.kept", 1, tags=["reason:error"])
+        dogstatsd.increment.assert_any_call("datadog.tracer.tail_sampling.dropped", 40)
+
+        # Buffered traces are sent on shutdown
+        writer.stop()
+        writer.on_shutdown()
+        assert len(writer.api.traces) == 61
+        dogstatsd.increment.assert_any_call("datadog.tracer.tail_sampling.kept", 60, tags=["reason:sampled"])
+
+
+def test_estimate_size_shared_meta():
+    tags = SpanTags({"env": "prod", "version": "1.0"})
+    span = Span(tracer=None, name="name")
+    span.set_tags(tags)
+    span.set_tag("version", "2.0")
+    span.set_tag("component", "web")
+    expected = Span(tracer=None, name="name")
+    expected.set_tags({"env": "prod", "version": "2.0", "component": "web"})
+    assert estimate_size([span]) == estimate_size([expected])
+    assert span._base_meta is not None
+
+
+def test_writer_deferred_tags():
+    writer = AgentWriter(dogstatsd=mock.Mock())
+    writer.api = DummyAPI()
+    writer._started = True
+    func = mock.Mock(return_value={"http.url": "http://localhost/"})
+    traces = []
+    for sampling_priority in (priority.AUTO_REJECT, priority.AUTO_KEEP):
+        span = Span(tracer=None, name="name")
+        span.set_metric(SAMPLING_PRIORITY_KEY, sampling_priority)
+        span._defer_tags(func)
+        traces.append([span])
+        writer.write([span])
+
+    # The deferred tags are only computed for the traces that are kept
+    writer.flush_queue()
+    assert writer.api.traces == traces
+    assert traces[0][0].get_tag("http.url") is None
+    assert traces[1][0].get_tag("http.url") == "http://localhost/"
+    func.assert_called_once_with()
+
+
+def test_writer_tail_sampling_rejected():
+    writer = AgentWriter(dogstatsd=mock.Mock(), tail_sampler=TailSampler(window=60, rate_limit=1))
+    writer.api = DummyAPI()
+    writer._started = True
+    func = mock.Mock(return_value={"http.url": "http://localhost/"})
+    errored = Span(tracer=None, name="name")
+    errored.error = 1
+    rejected = Span(tracer=None, name="name")
+    for span in (errored, rejected):
+        span.set_metric(SAMPLING_PRIORITY_KEY, priority.AUTO_REJECT)
+        span._defer_tags(func)
+        writer.write([span])
+
+    # The errored trace kept by the tail sampler is not dropped by the agent, and keeps its deferred tags
+    writer.flush_queue()
+    assert writer.api.traces == [[errored]]
+    assert get_priority([errored]) > 0
+    assert errored.get_tag("http.url") == "http://localhost/"
+    assert rejected._deferred_tags is not None
+
+
+class _AgentRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Unbuffered writes would split responses and stall on delayed ACKs
+    wbufsize = -1
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.traces += int(self.headers["X-Datadog-Trace-Count"])
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def log_message(format, *args):  # noqa: A002
+        pass
+
+
+class _AgentServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    # The writer keeps connections alive, serve each of them on its own thread
+    daemon_threads = True
+
+
+@pytest.fixture
+def agent():
+    server = _AgentServer(("127.0.0.1", 0), _AgentRequestHandler)
+    server.traces = 0
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        t.join()
+
+
+def test_writer_burst_drop_rate(agent):
+    # A burst of 3 times the queue size, written faster than the flush interval
+    writer = AgentWriter(*agent.server_address)
+    burst = 3 * writer._trace_queue.maxsize
+    for i in range(burst):
+        writer.write([Span(tracer=None, name="name", trace_id=i, span_id=j) for j in range(5)])
+        if i % 100 == 0:
+            # Give the writer thread a chance to run
+            time.sleep(0.01)
+    writer.stop()
+    writer.join()
+    writer.api.close()
+
+    # Early flushes keep the queue from overflowing
+    drop_rate = 1 - agent.traces / float(burst)
+    assert drop_rate < 0.1, drop_rate
+
+
+def test_writer_shutdown_closes_api(agent):
+    writer = AgentWriter(*agent.server_address)
+    # DEV: Flush from the test, the writer thread is only started to be stopped
+    writer._started = True
+    writer.write([Span(tracer=None, name="name")])
+    writer.flush_queue()
+    assert agent.traces == 1
+    assert writer.api._connections
+
+    # The idle connections are closed once the writer is stopped
+    writer.start()
+    writer.stop()
+    writer.join()
+    assert writer.api._connections == []
+
+
+def test_writer_shutdown_stops_upload_threads(agent):
+    writer = AgentWriter(*agent.server_address)
+    writer.api.max_concurrent_uploads = 2
+    writer._started = True
+    writer.write([Span(tracer=None, name="name")])
+    writer.flush_queue()
+    assert agent.traces == 1
+    threads = writer.api._upload_pool._threads
+    assert len(threads) == 2
+
+    # The upload threads exit once the writer is stopped
+    writer.start()
+    writer.stop()
+    writer.join()
+    for t in threads:
+        t.join(1)
+        assert not t.is_alive()
@@ -408,6 +408,41 @@ def test_ppprof_exporter():
         assert f.read() == str(exports), filename
 
 
+def test_pprof_exporter_stack_aggregation():
+    frames = [("foobar.py", 23, "func1"), ("foobar.py", 44, "func2")]
+    events = {
+        stack.StackSampleEvent: [
+            stack.StackSampleEvent(
+                timestamp=timestamp,
+                thread_id=thread_id,
+                thread_name="MainThread",
+                frames=frames,
+                wall_time_ns=wall_time_ns,
+                cpu_time_ns=cpu_time_ns,
+                sampling_period=1000,
+                nframes=2,
+            )
+            for timestamp, thread_id, wall_time_ns, cpu_time_ns in ((3, 1, 10, 1), (1, 2, 20, 2), (5, 1, 30, 3),)
+        ],
+    }
+    exp = pprof.PprofExporter()
+    export = exp.export(events)
+    assert export.time_nanos == 1
+    assert export.duration_nanos == 4
+    assert export.period == 1000
+    # Samples are ordered by location and thread id: cpu-samples, cpu-time and wall-time are summed per thread
+    assert [list(sample.value[:3]) for sample in export.sample] == [[2, 4, 40], [1, 2, 20]]
+
+
+def test_aggregate_events():
+    events = [(1, "a"), (2, "b"), (3, "a")]
+    assert pprof.PprofExporter._aggregate_events(events, lambda e: e[1]) == [("a", [2]), ("b", [1])]
+    assert pprof.PprofExporter._aggregate_events(events, lambda e: e[1], lambda e: e[0], lambda e: -e[0]) == [
+        ("a", [2, 4, -4]),
+        ("b", [1, 2, -2]),
+    ]
+
+
 def test_pprof_exporter_empty():
     exp = pprof.PprofExporter()
     export = exp.export({})
@@ -71,3 +71,15 @@ class TestHttpPropagation(TestCase):
             assert span.parent_id == 5678
             assert span.context.sampling_priority == 1
             assert span.context._dd_origin == "synthetics"
+
+    def test_extract_invalid(self):
+        headers = {
+            "x-datadog-trace-id": "1234",
+            "x-datadog-parent-id": "not-an-id",
+            "x-datadog-sampling-priority": "1",
+        }
+
+        context = HTTPPropagator().extract(headers)
+        assert context.trace_id is None
+        assert context.span_id is None
+        assert context.sampling_priority is None
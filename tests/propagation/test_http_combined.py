@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+from ddtrace.context import Context
+from ddtrace.ext.priority import AUTO_KEEP, AUTO_REJECT, USER_KEEP
+from ddtrace.propagation.b3 import B3HTTPPropagator
+from ddtrace.propagation.combined import DatadogB3HTTPPropagator
+from ddtrace.propagation.datadog import HTTP_HEADER_TRACE_ID, HTTP_HEADER_PARENT_ID, HTTP_HEADER_SAMPLING_PRIORITY
+
+
+class TestDatadogB3HttpPropagation(TestCase):
+    def test_inject(self):
+        context = Context(trace_id=1234, span_id=5678, sampling_priority=USER_KEEP)
+        headers = {}
+        DatadogB3HTTPPropagator().inject(context, headers)
+
+        assert headers[HTTP_HEADER_TRACE_ID] == "1234"
+        assert headers[HTTP_HEADER_PARENT_ID] == "5678"
+        assert headers[HTTP_HEADER_SAMPLING_PRIORITY] == "2"
+        assert headers[B3HTTPPropagator.TRACE_ID_KEY] == "00000000000004d2"
+        assert headers[B3HTTPPropagator.SPAN_ID_KEY] == "000000000000162e"
+        assert headers[B3HTTPPropagator.SAMPLED_KEY] == "1"
+
+    def test_extract_datadog(self):
+        headers = {
+            "HTTP_X_DATADOG_TRACE_ID": "1234",
+            "HTTP_X_DATADOG_PARENT_ID": "5678",
+            "HTTP_X_DATADOG_SAMPLING_PRIORITY": "2",
+            "HTTP_X_DATADOG_ORIGIN": "synthetics",
+            # The Datadog headers have precedence
+            "HTTP_X_B3_TRACEID": "1",
+            "HTTP_X_B3_SPANID": "1",
+        }
+
+        context = DatadogB3HTTPPropagator().extract(headers)
+        assert context.trace_id == 1234
+        assert context.span_id == 5678
+        assert context.sampling_priority == USER_KEEP
+        assert context._dd_origin == "synthetics"
+
+    def test_extract_b3(self):
+        propagator = DatadogB3HTTPPropagator()
+
+        context = propagator.extract({"X-B3-TraceId": "4d2", "X-B3-SpanId": "162e", "X-B3-Sampled": "1"})
+        assert context.trace_id == 1234
+        assert context.span_id == 5678
+        assert context.sampling_priority == AUTO_KEEP
+
+        context = propagator.extract({"HTTP_B3": "4d2-162e-0"})
+        assert context.trace_id == 1234
+        assert context.span_id == 5678
+        assert context.sampling_priority == AUTO_REJECT
+
+    def test_extract_invalid(self):
+        propagator = DatadogB3HTTPPropagator()
+
+        for headers in ({}, {"x-b3-traceid": "not-an-id"}, {"x-datadog-trace-id": "not-an-id"}):
+            context = propagator.extract(headers)
+            assert context.trace_id is None
+            assert context.span_id is None
+            assert context.sampling_priority is None
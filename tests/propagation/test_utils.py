@@ -1,6 +1,19 @@
+from ddtrace.propagation.utils import HTTPHeaderExtractor
 from ddtrace.propagation.utils import get_wsgi_header
 
 
 class TestPropagationUtils(object):
     def test_get_wsgi_header(self):
         assert get_wsgi_header('x-datadog-trace-id') == 'HTTP_X_DATADOG_TRACE_ID'
+
+    def test_header_extractor(self):
+        extractor = HTTPHeaderExtractor(['x-datadog-trace-id', 'x-datadog-origin', 'b3'])
+        assert extractor.extract({}) == [None, None, None]
+        assert extractor.extract({'x-datadog-trace-id': '1234', 'B3': '1'}) == ['1234', None, '1']
+        assert extractor.extract({
+            'HTTP_X_DATADOG_TRACE_ID': '1234',
+            'http_x_datadog_origin': 'synthetics',
+            'HTTP_ACCEPT': 'text/html',
+            'wsgi.version': (1, 0),
+        }) == ['1234', 'synthetics', None]
+        assert extractor.extract({'X-Datadog-Trace-Id': '1234', 'x-datadog-traceid': '5678'}) == ['1234', None, None]
@@ -13,6 +13,7 @@ import pytest
 from ddtrace.api import API, Response
 from ddtrace.compat import iteritems, httplib, PY3
 from ddtrace.internal.runtime.container import CGroupInfo
+from ddtrace.span import Span
 from ddtrace.vendor.six.moves import BaseHTTPServer, socketserver
 
 
@@ -28,6 +29,8 @@ class _BaseHTTPRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
 class _APIEndpointRequestHandlerTest(_BaseHTTPRequestHandler):
 
     def do_PUT(self):
+        # Read the whole request before closing the connection, or the client may not be done sending it
+        self.rfile.read(int(self.headers['Content-Length']))
         self.send_error(200, 'OK')
 
 
@@ -122,6 +125,7 @@ class APITests(TestCase):
     def setUp(self):
         # DEV: Mock here instead of in tests, before we have patched `httplib.HTTPConnection`
         self.conn = mock.MagicMock(spec=httplib.HTTPConnection)
+        self.conn.getresponse.return_value.will_close = False
         self.api = API('localhost', 8126)
 
     def tearDown(self):
@@ -180,21 +184,111 @@ class APITests(TestCase):
                 assert re.match(v['log'], msg), msg
 
     @mock.patch('ddtrace.compat.httplib.HTTPConnection')
-    def test_put_connection_close(self, HTTPConnection):
+    def test_put_connection_keep_alive(self, HTTPConnection):
         """
         When calling API._put
-            we close the HTTPConnection we create
+            we keep the HTTPConnection we create open and reuse it
         """
         HTTPConnection.return_value = self.conn
 
         with warnings.catch_warnings(record=True) as w:
             self.api._put('/test', '<test data>', 1)
+            self.api._put('/test', '<test data>', 1)
 
             self.assertEqual(len(w), 0, 'Test raised unexpected warnings: {0!r}'.format(w))
 
+        HTTPConnection.assert_called_once()
+        self.assertEqual(self.conn.request.call_count, 2)
+        self.conn.close.assert_not_called()
+
+        # Closing the API closes the idle connections
+        self.api.close()
+        self.conn.close.assert_called_once()
+
+    @mock.patch('ddtrace.compat.httplib.HTTPConnection')
+    def test_put_connection_reconnect(self, HTTPConnection):
+        """
+        When calling API._put fails on a reused connection
+            we close it and retry once with a new connection
+        """
+        stale_conn = mock.MagicMock()
+        stale_conn.getresponse.return_value.will_close = False
+        HTTPConnection.side_effect = [stale_conn, self.conn]
+
+        self.api._put('/test', '<test data>', 1)
+        stale_conn.request.side_effect = httplib.BadStatusLine('')
+        self.api._put('/test', '<test data>', 1)
+
+        self.assertEqual(stale_conn.request.call_count, 2)
+        stale_conn.close.assert_called_once()
+        self.conn.request.assert_called_once()
+        self.conn.close.assert_not_called()
+
+    @mock.patch('ddtrace.compat.httplib.HTTPConnection')
+    def test_put_connection_reconnect_no_response(self, HTTPConnection):
+        """
+        When a reused connection is closed by the agent without a response
+            we retry once with a new connection
+        """
+        stale_conn = mock.MagicMock()
+        stale_conn.getresponse.return_value.will_close = False
+        HTTPConnection.side_effect = [stale_conn, self.conn]
+
+        self.api._put('/test', '<test data>', 1)
+        stale_conn.getresponse.side_effect = httplib.BadStatusLine('')
+        self.api._put('/test', '<test data>', 1)
+
+        self.assertEqual(stale_conn.request.call_count, 2)
+        stale_conn.close.assert_called_once()
         self.conn.request.assert_called_once()
+
+    @mock.patch('ddtrace.compat.httplib.HTTPConnection')
+    def test_put_connection_no_retry_after_sent(self, HTTPConnection):
+        """
+        When a reused connection fails after the request was sent
+            we do not send the request again as the agent may have received it
+        """
+        HTTPConnection.return_value = self.conn
+        self.api._put('/test', '<test data>', 1)
+        self.conn.getresponse.side_effect = socket.error(errno.ECONNRESET, 'reset')
+
+        with self.assertRaises(socket.error):
+            self.api._put('/test', '<test data>', 1)
+
+        HTTPConnection.assert_called_once()
+        self.assertEqual(self.conn.request.call_count, 2)
         self.conn.close.assert_called_once()
 
+    @mock.patch('ddtrace.compat.httplib.HTTPConnection')
+    def test_put_connection_will_close(self, HTTPConnection):
+        """
+        When the agent closes the connection after its response
+            we do not keep the connection for reuse
+        """
+        HTTPConnection.return_value = self.conn
+        self.conn.getresponse.return_value.will_close = True
+
+        self.api._put('/test', '<test data>', 1)
+        self.api._put('/test', '<test data>', 1)
+
+        self.assertEqual(HTTPConnection.call_count, 2)
+        self.assertEqual(self.conn.close.call_count, 2)
+        assert self.api._connections == []
+
+    @mock.patch('ddtrace.compat.httplib.HTTPConnection')
+    def test_put_connection_fork(self, HTTPConnection):
+        """
+        When calling API._put in a forked process
+            we do not reuse the connections of the parent process
+        """
+        HTTPConnection.return_value = self.conn
+        self.api._put('/test', '<test data>', 1)
+
+        with mock.patch('os.getpid', return_value=self.api._connections_pid + 1):
+            self.api._put('/test', '<test data>', 1)
+
+        self.assertEqual(HTTPConnection.call_count, 2)
+
     @mock.patch('ddtrace.compat.httplib.HTTPConnection')
     def test_put_connection_close_exception(self, HTTPConnection):
         """
@@ -217,12 +311,13 @@ class APITests(TestCase):
 
 def test_https():
     conn = mock.MagicMock(spec=httplib.HTTPSConnection)
+    conn.getresponse.return_value.will_close = False
     api = API('localhost', 8126, https=True)
     with mock.patch('ddtrace.compat.httplib.HTTPSConnection') as HTTPSConnection:
         HTTPSConnection.return_value = conn
         api._put('/test', '<test data>', 1)
     conn.request.assert_called_once()
-    conn.close.assert_called_once()
+    conn.close.assert_not_called()
 
 
 def test_flush_connection_timeout_connect():
@@ -268,6 +363,83 @@ def test_flush_connection_uds(endpoint_uds_server):
     assert response.status == 200
 
 
+def test_send_payloads_pipelined():
+    api = API(_HOST, 8126, max_concurrent_uploads=3)
+    lock = threading.Lock()
+    in_flight = set()
+    max_in_flight = []
+
+    def flush(payload):
+        with lock:
+            in_flight.add(payload)
+            max_in_flight.append(len(in_flight))
+        # The first payloads are the slowest to upload so they complete out of order
+        time.sleep(0.01 * (10 - payload))
+        with lock:
+            in_flight.remove(payload)
+        return payload
+
+    threads = threading.active_count()
+    with mock.patch.object(api, '_upload', side_effect=flush):
+        responses = api._send_payloads_pipelined(iter(range(10)))
+
+        # Responses are returned in the order of the payloads, whatever the order the uploads completed in
+        assert responses == list(range(10))
+        assert 1 < max(max_in_flight) <= 3
+
+        # The upload threads are reused
+        assert threading.active_count() == threads + 3
+        assert api._send_payloads_pipelined(iter(range(3))) == list(range(3))
+        assert threading.active_count() == threads + 3
+
+    api.close()
+
+
+def test_send_payloads_pipelined_exception():
+    api = API(_HOST, 8126, max_concurrent_uploads=2)
+    error = ValueError()
+
+    with mock.patch.object(api, '_upload', side_effect=[error, 'response']):
+        responses = api._send_payloads_pipelined(['payload', 'payload'])
+
+    assert responses == [error, 'response']
+    api.close()
+
+
+def test_send_payloads_pipelined_downgrade():
+    api = API(_HOST, 8126, max_concurrent_uploads=2)
+    assert api._traces == '/v0.3/traces'
+    upload_threads = set()
+
+    def upload(payload):
+        if api._traces == '/v0.3/traces':
+            upload_threads.add(threading.current_thread())
+            return Response(status=404)
+        return Response(status=200, body=payload)
+
+    # The payloads sent to an unavailable endpoint are sent again once the API has been downgraded, only once
+    with mock.patch.object(api, '_upload', side_effect=upload):
+        with mock.patch.object(api, '_downgrade', wraps=api._downgrade) as downgrade:
+            responses = api._send_payloads_pipelined(['a', 'b', 'c'])
+
+    assert [response.body for response in responses] == ['a', 'b', 'c']
+    assert api._traces == '/v0.2/traces'
+    downgrade.assert_called_once_with()
+    assert threading.current_thread() not in upload_threads
+    api.close()
+
+
+def test_send_traces_pipelined():
+    api = API(_HOST, 8126, max_concurrent_uploads=2)
+    traces = [[Span(None, 'name')], [Span(None, 'name')]]
+
+    with mock.patch.object(api, '_upload', return_value='response') as flush:
+        assert api.send_traces(traces) == ['response']
+
+    (payload,), _ = flush.call_args
+    assert payload.length == 2
+
+
 @mock.patch('ddtrace.internal.runtime.container.get_container_info')
 def test_api_container_info(get_container_info):
     # When we have container information
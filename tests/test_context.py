@@ -10,8 +10,9 @@ import pytest
 
 from ddtrace.span import Span
 from ddtrace.context import Context
-from ddtrace.constants import HOSTNAME_KEY
+from ddtrace.constants import HOSTNAME_KEY, ORIGIN_KEY, SAMPLING_PRIORITY_KEY
 from ddtrace.ext.priority import USER_REJECT, AUTO_REJECT, AUTO_KEEP, USER_KEEP
+from ddtrace.internal.encoding_utils import estimate_size
 
 
 @pytest.fixture
@@ -58,18 +59,21 @@ class TestTracingContext(BaseTestCase):
     current execution flow.
     """
     @contextlib.contextmanager
-    def override_partial_flush(self, ctx, enabled, min_spans):
+    def override_partial_flush(self, ctx, enabled, min_spans, min_size=0):
         original_enabled = ctx._partial_flush_enabled
         original_min_spans = ctx._partial_flush_min_spans
+        original_min_size = ctx._partial_flush_min_size
 
         ctx._partial_flush_enabled = enabled
         ctx._partial_flush_min_spans = min_spans
+        ctx._partial_flush_min_size = min_size
 
         try:
             yield
         finally:
             ctx._partial_flush_enabled = original_enabled
             ctx._partial_flush_min_spans = original_min_spans
+            ctx._partial_flush_min_size = original_min_size
 
     def test_add_span(self):
         # it should add multiple spans
@@ -365,6 +369,102 @@ class TestTracingContext(BaseTestCase):
             set([span.name for span in ctx._trace]),
         )
 
+    def test_partial_flush_many_unfinished(self):
+        """
+        When calling `Context.get`
+        When partial flushing is enabled
+        When most spans are still open
+        We return each finished span once, and the remaining spans once the trace is finished
+        """
+        tracer = get_dummy_tracer()
+        ctx = Context()
+
+        root = Span(tracer=tracer, name='root')
+        ctx.add_span(root)
+        children = []
+        for i in range(100):
+            child = Span(tracer=tracer, name='child_{}'.format(i), trace_id=root.trace_id, parent_id=root.span_id)
+            child._parent = root
+            ctx.add_span(child)
+            children.append(child)
+
+        flushed = []
+        with self.override_partial_flush(ctx, enabled=True, min_spans=5):
+            for child in children[:10]:
+                child.finished = True
+                ctx.close_span(child)
+                trace, _ = ctx.get()
+                if trace:
+                    flushed.extend(trace)
+        self.assertEqual(flushed, children[:10])
+
+        for span in children[10:] + [root]:
+            span.finished = True
+            ctx.close_span(span)
+        trace, _ = ctx.get()
+        self.assertEqual(trace, [root] + children[10:])
+        self.assertEqual(ctx._trace, [])
+
+    def test_enable_streaming(self):
+        """
+        When streaming is enabled on a context
+        We send the finished spans as they are finished, with the tags of the trace on each chunk
+        """
+        tracer = get_dummy_tracer()
+        with tracer.trace('root') as root:
+            ctx = root.context
+            ctx._dd_origin = 'synthetics'
+            ctx.sampling_priority = USER_KEEP
+            ctx.enable_streaming(min_spans=2)
+            for i in range(10):
+                with tracer.trace('child_{}'.format(i)):
+                    with tracer.trace('grandchild_{}'.format(i)):
+                        pass
+                # Only the root span and the chunk waiting to be sent are kept in memory
+                self.assertEqual(ctx._trace, [root])
+
+            chunks = tracer.writer.pop_traces()
+            self.assertEqual(len(chunks), 10)
+            for i, chunk in enumerate(chunks):
+                grandchild, child = chunk
+                self.assertEqual((grandchild.name, child.name), ('grandchild_{}'.format(i), 'child_{}'.format(i)))
+                self.assertEqual(child.get_metric(SAMPLING_PRIORITY_KEY), USER_KEEP)
+                self.assertEqual(child.get_tag(ORIGIN_KEY), 'synthetics')
+                self.assertIsNone(grandchild.get_metric(SAMPLING_PRIORITY_KEY))
+
+        self.assertEqual(tracer.writer.pop_traces(), [[root]])
+        self.assertEqual(root.get_metric(SAMPLING_PRIORITY_KEY), USER_KEEP)
+        # Streaming stops with the trace
+        self.assertIsNone(ctx._streaming_min_spans)
+
+    def test_partial_flush_min_size(self):
+        """
+        When calling `Context.get`
+        When partial flushing is enabled with a minimum size
+        When the finished spans reach the minimum size before the minimum number of spans
+        We return the finished spans
+        """
+        tracer = get_dummy_tracer()
+        ctx = Context()
+
+        root = Span(tracer=tracer, name='root')
+        ctx.add_span(root)
+        size = estimate_size([Span(tracer=tracer, name='child_0')])
+        with self.override_partial_flush(ctx, enabled=True, min_spans=100, min_size=size * 3):
+            for i in range(3):
+                self.assertEqual(ctx.get(), (None, None))
+                child = Span(tracer=tracer, name='child_{}'.format(i), trace_id=root.trace_id, parent_id=root.span_id)
+                child._parent = root
+                child.finished = True
+                ctx.add_span(child)
+                ctx.close_span(child)
+
+            trace, sampled = ctx.get()
+
+        self.assertEqual(['child_0', 'child_1', 'child_2'], [span.name for span in trace])
+        self.assertEqual(ctx._trace, [root])
+        self.assertEqual(ctx._finished_size, 0)
+
     def test_finished(self):
         # a Context is finished if all spans inside are finished
         ctx = Context()
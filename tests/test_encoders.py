@@ -2,9 +2,9 @@ import json
 
 from unittest import TestCase
 
-from ddtrace.span import Span
+from ddtrace.span import Span, SpanTags
 from ddtrace.compat import msgpack_type, string_type
-from ddtrace.encoding import JSONEncoder, MsgpackEncoder
+from ddtrace.encoding import JSONEncoder, MsgpackEncoder, StreamingMsgpackEncoder
 
 
 class TestEncoders(TestCase):
@@ -133,3 +133,39 @@ class TestEncoders(TestCase):
         for i in range(2):
             for j in range(2):
                 assert b'client.testing' == items[i][j][b'name']
+
+    def test_encode_streaming_msgpack(self):
+        # the streaming encoder must produce the same payload as the msgpack encoder
+        finished = Span(name='client.testing', service='svc', resource='res', span_type='web', tracer=None)
+        finished.set_tag('component', 'test')
+        finished.set_metric('num', 42)
+        finished.error = True
+        finished.finish()
+        unfinished = Span(name='client.testing', tracer=None, trace_id=2 ** 127 + 12, parent_id=finished.span_id)
+        traces = [[finished, unfinished], [Span(name='client.testing', tracer=None, start=0)]]
+
+        encoder = StreamingMsgpackEncoder()
+        expected = MsgpackEncoder()
+        assert encoder.encode_traces(traces) == expected.encode_traces(traces)
+        for trace in traces:
+            assert encoder.encode_trace(trace) == expected.encode_trace(trace)
+
+        items = encoder.decode(encoder.encode_trace(traces[0]))
+        assert items[0][b'error'] == 1
+        assert items[1][b'trace_id'] == 12
+
+    def test_encode_streaming_msgpack_shared_meta(self):
+        # the tags shared with other spans are packed without merging them with the ones of the span
+        tags = SpanTags({'env': 'prod', 'version': '1.0'})
+        shared = Span(name='client.testing', tracer=None)
+        shared.set_tags(tags)
+        overridden = Span(name='client.testing', tracer=None)
+        overridden.set_tags(tags)
+        overridden.set_tag('component', 'test')
+        overridden.set_tag('version', '2.0')
+        assert shared._base_meta is overridden._base_meta
+        traces = [[shared, overridden]]
+
+        encoder = StreamingMsgpackEncoder()
+        assert encoder.encode_traces(traces) == MsgpackEncoder().encode_traces(traces)
+        assert overridden._base_meta is tags.classified()[0]
@@ -84,6 +84,36 @@ class PayloadTestCase(BaseTracerTestCase):
             self.assertEqual(trace[0][b'name'], b'root.span')
             self.assertEqual(trace[1][b'name'], b'child.span')
 
+    def test_get_payload_buffer(self):
+        """
+        When calling `Payload.get_payload`
+            With a msgpack encoder
+                We return a view over the buffer with the array header written in place
+            With a JSON encoder
+                We return the joined encoded traces
+        """
+        trace = [Span(self.tracer, name='root.span'), Span(self.tracer, name='child.span')]
+
+        # DEV: 20 traces need a 3 bytes array header
+        for encoder in (Encoder(), JSONEncoder()):
+            payload = Payload(encoder=encoder)
+            for _ in range(20):
+                payload.add_trace(trace)
+
+            encoded_data = payload.get_payload()
+            expected = encoder.join_encoded([encoder.encode_trace(trace) for _ in range(20)])
+            if isinstance(encoded_data, memoryview):
+                encoded_data = encoded_data.tobytes()
+            self.assertEqual(encoded_data, expected)
+
+        # Traces can still be added while a previous view is alive
+        payload = Payload()
+        payload.add_trace(trace)
+        view = payload.get_payload()
+        payload.add_trace(trace)
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(len(payload.encoder.decode(payload.get_payload())), 2)
+
     def test_full(self):
         payload = Payload()
 
@@ -3,6 +3,7 @@ from unittest import TestCase
 import pytest
 
 from ddtrace import Pin
+from ddtrace.span import Span, SpanTags
 
 
 class PinTestCase(TestCase):
@@ -89,6 +90,21 @@ class PinTestCase(TestCase):
         # of almost everything
         assert p1.tracer is p2.tracer
 
+    def test_tags(self):
+        # ensure the tags of the pin are classified once to be set on spans
+        pin = Pin(service='metrics', tags={'a': 'b', 'c': 1})
+        assert isinstance(pin.tags, SpanTags)
+        assert pin.tags == {'a': 'b', 'c': 1}
+
+        span = Span(tracer=None, name='test.span')
+        span.set_tags(pin.tags)
+        assert span.meta == {'a': 'b'}
+        assert span.metrics == {'c': 1}
+
+        # cloned pins get their own tags
+        assert isinstance(pin.clone().tags, SpanTags)
+        assert Pin(service='metrics').tags is None
+
     def test_none(self):
         # ensure get_from returns None if a Pin is not available
         assert Pin.get_from(None) is None
@@ -11,7 +11,7 @@ from ddtrace.constants import SAMPLING_PRIORITY_KEY, SAMPLE_RATE_METRIC_KEY
 from ddtrace.constants import SAMPLING_AGENT_DECISION, SAMPLING_RULE_DECISION, SAMPLING_LIMIT_DECISION
 from ddtrace.ext.priority import AUTO_KEEP, AUTO_REJECT
 from ddtrace.internal.rate_limiter import RateLimiter
-from ddtrace.sampler import DatadogSampler, SamplingRule
+from ddtrace.sampler import DatadogSampler, SamplingRule, _SamplingRuleIndex
 from ddtrace.sampler import RateSampler, AllSampler, RateByServiceSampler
 from ddtrace.span import Span
 
@@ -189,6 +189,65 @@ class RateByServiceSamplerTest(unittest.TestCase):
             assert case == rates, '%s != %s' % (case, rates)
 
 
+def test_rate_by_service_sampler_cache(dummy_tracer):
+    dummy_tracer.set_tags({'env': 'dev'})
+    sampler = RateByServiceSampler()
+    sampler.update_rate_by_service_sample_rates({'service:db,env:dev': 0.5})
+    span = create_span(tracer=dummy_tracer, service='db')
+
+    assert sampler._get_sampler('db', 'dev').sample_rate == 0.5
+    # The sampler is cached per (service, env), no key is computed anymore
+    with mock.patch.object(RateByServiceSampler, '_key') as _key:
+        sampler.sample(span)
+        _key.assert_not_called()
+    assert span.get_metric(SAMPLING_AGENT_DECISION) == 0.5
+
+    # New rates replace the cache
+    sampler.update_rate_by_service_sample_rates({'service:db,env:dev': 0.25})
+    sampler.sample(span)
+    assert span.get_metric(SAMPLING_AGENT_DECISION) == 0.25
+    sampler.set_sample_rate(0.75, service='db', env='dev')
+    sampler.sample(span)
+    assert span.get_metric(SAMPLING_AGENT_DECISION) == 0.75
+
+    # The default rate applies to unknown services
+    assert sampler._get_sampler('unknown', 'dev') is sampler._by_service_samplers[sampler._default_key]
+
+
+def test_rate_by_service_sampler_cache_size():
+    sampler = RateByServiceSampler()
+    sampler.CACHE_SIZE = 3
+    sampler.update_rate_by_service_sample_rates({'service:a,env:': 0.5})
+
+    for service in ('a', 'b', 'c'):
+        sampler._get_sampler(service, None)
+    cache = sampler._snapshot[1]
+    assert sorted(cache) == [('a', None), ('b', None), ('c', None)]
+
+    # The cache is copied on write, and cleared once full
+    assert sampler._get_sampler('d', None) is sampler._by_service_samplers[sampler._default_key]
+    assert sampler._snapshot[1] == {('d', None): sampler._by_service_samplers[sampler._default_key]}
+    assert len(cache) == 3
+    assert sampler._get_sampler('a', None).sample_rate == 0.5
+    assert sorted(sampler._snapshot[1]) == [('a', None), ('d', None)]
+
+
+def test_rate_by_service_sampler_cache_replaced_rates():
+    sampler = RateByServiceSampler()
+    sampler.update_rate_by_service_sample_rates({'service:db,env:': 0.5})
+
+    def _key(service, env):
+        # New rates are received while the sampler of a pair is looked up
+        sampler.update_rate_by_service_sample_rates({'service:db,env:': 0.25})
+        return 'service:db,env:'
+
+    with mock.patch.object(sampler, '_key', side_effect=_key):
+        assert sampler._get_sampler('db', None).sample_rate == 0.5
+    # The sampler of the previous rates is not cached
+    assert sampler._snapshot[1] == {}
+    assert sampler._get_sampler('db', None).sample_rate == 0.25
+
+
 @pytest.mark.parametrize(
     'sample_rate,allowed',
     [
@@ -877,3 +936,106 @@ def test_datadog_sampler_update_rate_by_service_sample_rates(dummy_tracer):
         for k, v in iteritems(sampler.default_sampler._by_service_samplers):
             rates[k] = v.sample_rate
         assert case == rates, '%s != %s' % (case, rates)
+
+
+def test_sampling_rule_index_first_match():
+    rules = [
+        SamplingRule(sample_rate=0.1, service='db', name='db.query'),
+        SamplingRule(sample_rate=0.2, service=re.compile('^cache-')),
+        SamplingRule(sample_rate=0.3, name='web.request'),
+        SamplingRule(sample_rate=0.4, service=lambda service: service.endswith('-db')),
+        SamplingRule(sample_rate=0.5, service='db'),
+        SamplingRule(sample_rate=0.6, service=re.compile('web'), name=re.compile(r'.*\.request$')),
+        SamplingRule(sample_rate=0.7, service=re.compile(r'(w)\1')),
+        SamplingRule(sample_rate=0.8, service=None),
+        SamplingRule(sample_rate=0.9, service='db', name='db.query'),
+    ]
+    index = _SamplingRuleIndex(rules)
+
+    services = ['db', 'cache-1', 'web', 'ww', 'users-db', 'other', None]
+    names = ['db.query', 'web.request', 'redis.command', None]
+    # Go through the pairs twice to get the memoized results
+    for _ in range(2):
+        for service in services:
+            for name in names:
+                span = create_span(service=service, name=name)
+                expected = next((rule for rule in rules if rule.matches(span)), None)
+                assert index.first_match(span) is expected, (service, name)
+
+
+def test_sampling_rule_index_no_rules():
+    index = _SamplingRuleIndex([])
+    assert index.first_match(create_span()) is None
+
+
+def test_sampling_rule_index_callable():
+    # Functions are called for every span, their result is not memoized
+    service = mock.Mock(return_value=False)
+    rule = SamplingRule(sample_rate=0.5, service=service)
+    index = _SamplingRuleIndex([rule])
+    span = create_span(service='db')
+
+    assert index.first_match(span) is None
+    service.return_value = True
+    assert index.first_match(span) is rule
+    assert service.call_count == 2
+
+
+def test_sampling_rule_index_cache_size():
+    index = _SamplingRuleIndex([SamplingRule(sample_rate=0.5, service='db')])
+    for i in range(index.CACHE_SIZE + 10):
+        index.first_match(create_span(service='service-%d' % i))
+    assert len(index._cache._data) == index.CACHE_SIZE
+
+
+@pytest.mark.parametrize(
+    'patterns,combined',
+    [
+        ([], False),
+        ([re.compile('^a'), re.compile('b$')], True),
+        ([re.compile('(a|b)'), re.compile('(?P<c>c)')], True),
+        ([re.compile('a', re.I), re.compile('b')], False),
+        ([re.compile(r'(a)\1'), re.compile('b')], False),
+        ([re.compile('(?P<a>a)'), re.compile('(?P<a>b)')], False),
+    ],
+)
+def test_sampling_rule_index_compile_filter(patterns, combined):
+    assert (_SamplingRuleIndex._compile_filter(patterns) is not None) is combined
+
+
+def test_datadog_sampler_set_rules():
+    rule = SamplingRule(sample_rate=0.5, service='db')
+    sampler = DatadogSampler()
+    assert sampler._rule_index.first_match(create_span(service='db')) is None
+
+    # Setting the rules updates the index
+    sampler.rules = [rule]
+    assert sampler.rules == [rule]
+    assert sampler._rule_index.first_match(create_span(service='db')) is rule
+
+
+def test_datadog_sampler_rules_changed_in_place():
+    db_rule = SamplingRule(sample_rate=0.5, service='db')
+    web_rule = SamplingRule(sample_rate=0.25, service='web')
+    rules = [web_rule]
+    sampler = DatadogSampler(rules=rules)
+    span = create_span(service='db')
+    assert sampler._get_rule_index().first_match(span) is None
+
+    # The index is rebuilt when the rules are changed in place
+    sampler.rules.append(db_rule)
+    assert sampler._get_rule_index().first_match(span) is db_rule
+    rules[1] = web_rule
+    assert sampler._get_rule_index().first_match(span) is None
+    rules.insert(0, db_rule)
+    sampler.sample(span)
+    assert span.get_metric(SAMPLING_RULE_DECISION) == 0.5
+
+    # The index is only built again when the rules change
+    rule_index = sampler._get_rule_index()
+    assert sampler._get_rule_index() is rule_index
+
+    # Rules which are not a list are copied to one
+    sampler.rules = (web_rule,)
+    assert sampler.rules == [web_rule]
+    assert sampler._get_rule_index().first_match(span) is None
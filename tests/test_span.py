@@ -6,7 +6,7 @@ from unittest.case import SkipTest
 
 from ddtrace.context import Context
 from ddtrace.constants import ANALYTICS_SAMPLE_RATE_KEY, SPAN_MEASURED_KEY
-from ddtrace.span import Span
+from ddtrace.span import Span, SpanTags
 from ddtrace.ext import SpanTypes, errors, priority
 from .base import BaseTracerTestCase
 from .utils import assert_is_measured, assert_is_not_measured
@@ -469,3 +469,122 @@ def test_set_tag_measured_change_value():
 
     s.set_tag(SPAN_MEASURED_KEY)
     assert_is_measured(s)
+
+
+def test_set_tags_span_tags():
+    tags = {
+        'str': 'value',
+        'int': 42,
+        'float': 1.5,
+        'big': 2 ** 60,
+        'http.status_code': 200,
+        'out.port': '8080',
+        SPAN_MEASURED_KEY: True,
+        'manual.keep': None,
+    }
+    s = Span(tracer=None, name='test.span', context=Context())
+    # Tags already set on the span end up in meta or metrics like with `set_tag`
+    s.set_tag('str', 1)
+    s.set_tag('int', 'value')
+    expected = Span(tracer=None, name='test.span', context=Context())
+    expected.set_tag('str', 1)
+    expected.set_tag('int', 'value')
+
+    s.set_tags(SpanTags(tags))
+    expected.set_tags(tags)
+
+    assert s.meta == expected.meta
+    assert s.metrics == expected.metrics
+    assert s.context.sampling_priority == priority.USER_KEEP
+
+
+def test_span_tags_classified():
+    tags = SpanTags(a='b')
+    classified = tags.classified()
+    assert classified == ({'a': 'b'}, {}, {})
+    # The classification is cached
+    assert tags.classified()[0] is classified[0]
+
+    # Any mutation invalidates the cache
+    mutations = [
+        lambda: tags.__setitem__('a', 1),
+        lambda: tags.update(a='c'),
+        lambda: tags.setdefault('b', 2),
+        lambda: tags.pop('b'),
+        lambda: tags.__delitem__('a'),
+        lambda: tags.update(a='d'),
+        lambda: tags.popitem(),
+        lambda: tags.clear(),
+    ]
+    for mutation in mutations:
+        mutation()
+        expected = Span(tracer=None, name='test.span')
+        expected.set_tags(dict(tags))
+        assert tags.classified() == (expected.meta, expected.metrics, {})
+
+
+def test_span_tags_shared_meta():
+    tags = SpanTags({'env': 'prod', 'version': '1.0'})
+    s1 = Span(tracer=None, name='test.span')
+    s2 = Span(tracer=None, name='test.span')
+    s1.set_tags(tags)
+    s2.set_tags(tags)
+
+    # The spans share the meta of the tags until they need their own copy
+    assert s1._base_meta is s2._base_meta
+    s1.set_tag('component', 'web')
+    s1.set_tag('version', '2.0')
+    assert s1.get_tag('env') == 'prod'
+    assert s1.get_tag('version') == '2.0'
+    assert s2.get_tag('version') == '1.0'
+    assert s1.to_dict()['meta'] == {'env': 'prod', 'version': '2.0', 'component': 'web'}
+    assert s2.to_dict()['meta'] == {'env': 'prod', 'version': '1.0'}
+    assert s1._base_meta is s2._base_meta
+
+    # Replacing a shared tag by a metric gives the span its own copy
+    s1.set_metric('env', 1)
+    assert s1._base_meta is None
+    assert s1.get_tag('env') is None
+    assert s1.meta == {'version': '2.0', 'component': 'web'}
+    assert s2.get_tag('env') == 'prod'
+
+    # So does accessing the meta directly
+    s2.meta['env'] = 'staging'
+    assert s2._base_meta is None
+    assert s2.get_tag('env') == 'staging'
+    assert tags.classified()[0] == {'env': 'prod', 'version': '1.0'}
+
+
+def test_span_deferred_tags():
+    func = mock.Mock(return_value={'url': 'http://localhost/', 'count': 2, 'component': 'deferred'})
+    s = Span(tracer=None, name='test.span')
+    s._defer_tags(func, 'arg')
+    s.set_tag('component', 'web')
+    s.set_metric('count', 3)
+    func.assert_not_called()
+
+    # The tags are computed once they are read, the ones set after the deferral take precedence
+    assert s.get_tag('url') == 'http://localhost/'
+    func.assert_called_once_with('arg')
+    assert s.get_metric('count') == 3
+    assert s.to_dict()['meta'] == {'url': 'http://localhost/', 'component': 'web'}
+    assert s._deferred_tags is None
+
+
+def test_span_deferred_tags_last_wins():
+    s = Span(tracer=None, name='test.span')
+    s.set_tag('component', 'web')
+    s.set_tag('a', 'eager')
+    s._defer_tags(dict, [('component', 'deferred'), ('a', 'first'), ('b', 'first')])
+    s._defer_tags(dict, [('a', 'second')])
+    s.set_tag('b', 'eager')
+    assert s.get_tag('component') == 'deferred'
+    assert s.get_tag('a') == 'second'
+    assert s.get_tag('b') == 'eager'
+
+
+def test_span_deferred_tags_error():
+    s = Span(tracer=None, name='test.span')
+    s._defer_tags(mock.Mock(side_effect=ValueError))
+    s._defer_tags(dict, [('url', 'http://localhost/')])
+    assert s.meta == {'url': 'http://localhost/'}
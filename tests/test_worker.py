@@ -1,3 +1,5 @@
+import threading
+
 import pytest
 
 from ddtrace import _worker
@@ -30,6 +32,27 @@ def test_periodic():
     assert results
 
 
+def test_wakeup():
+    results = []
+    ran = threading.Event()
+
+    class MyWorker(_worker.PeriodicWorkerThread):
+        @staticmethod
+        def run_periodic():
+            results.append(object())
+            ran.set()
+
+    w = MyWorker(interval=60)
+    w.start()
+    w.wakeup()
+    # the worker runs right away instead of waiting for the interval
+    assert ran.wait(10)
+    w.stop()
+    w.join(10)
+    assert not w.is_alive()
+    assert len(results) == 1
+
+
 def test_on_shutdown():
     results = []
 
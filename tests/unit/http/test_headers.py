@@ -1,7 +1,7 @@
 import pytest
 
 from ddtrace import tracer, Span
-from ddtrace.http import store_request_headers, store_response_headers
+from ddtrace.http import defer_request_headers, defer_response_headers, store_request_headers, store_response_headers
 from ddtrace.settings import Config, IntegrationConfig
 
 
@@ -168,3 +168,44 @@ class TestHeaders(object):
             'cOnTeNt-TyPe': 'some;value',
         }, span, integration_config)
         assert span.get_tag('http.response.headers.content-type') == 'some;value'
+
+    def test_deferred_headers(self, span, integration_config):
+        """
+        :type span: Span
+        :type integration_config: IntegrationConfig
+        """
+        integration_config.http.trace_headers(['Content-Type', 'Max-Age'])
+        defer_request_headers([('Content-Type', 'some;value;content-type')], span, integration_config)
+        defer_response_headers({'Max-Age': 'some;value;max_age', 'Other': 'value'}, span, integration_config)
+        assert span.get_tag('http.request.headers.content-type') == 'some;value;content-type'
+        assert span.get_tag('http.response.headers.max-age') == 'some;value;max_age'
+        assert span.get_tag('http.response.headers.other') is None
+
+    def test_deferred_headers_copied(self, span, integration_config):
+        """
+        :type span: Span
+        :type integration_config: IntegrationConfig
+        """
+        integration_config.http.trace_headers(['X-A'])
+        headers = {'X-A': '1'}
+        defer_request_headers(headers, span, integration_config)
+        headers['X-A'] = '2'
+        assert span.get_tag('http.request.headers.x-a') == '1'
+
+    def test_deferred_headers_duplicate(self, span, integration_config):
+        """
+        :type span: Span
+        :type integration_config: IntegrationConfig
+        """
+        integration_config.http.trace_headers(['X-A'])
+        defer_request_headers({'X-A': '1'}, span, integration_config)
+        defer_request_headers({'X-A': '2'}, span, integration_config)
+        assert span.get_tag('http.request.headers.x-a') == '2'
+
+    def test_deferred_headers_not_traced(self, span, integration_config):
+        """
+        :type span: Span
+        :type integration_config: IntegrationConfig
+        """
+        defer_request_headers({'X-A': '1'}, span, integration_config)
+        assert span._deferred_tags is None
@@ -0,0 +1,27 @@
+import pytest
+
+from ddtrace import tracer, Span
+from ddtrace.http import defer_url, strip_query_string
+from ddtrace.settings import Config, IntegrationConfig
+
+
+@pytest.mark.parametrize('url,expected', [
+    ('http://localhost:8080/path', ('http://localhost:8080/path', '')),
+    ('http://localhost/path;params?foo=bar&baz#fragment', ('http://localhost/path;params#fragment', 'foo=bar&baz')),
+    ('/path?foo=bar', ('/path', 'foo=bar')),
+])
+def test_strip_query_string(url, expected):
+    assert strip_query_string(url) == expected
+
+
+@pytest.mark.parametrize('trace_query_string', [True, False])
+def test_defer_url(trace_query_string):
+    span = Span(tracer, 'some_span')
+    integration_config = IntegrationConfig(Config(), 'test')
+    integration_config.http.trace_query_string = trace_query_string
+    defer_url('http://localhost/path?foo=bar', span, integration_config)
+
+    # Whether the query string is traced is decided when the URL is deferred
+    integration_config.http.trace_query_string = not trace_query_string
+    assert span.get_tag('http.url') == 'http://localhost/path'
+    assert span.get_tag('http.query.string') == ('foo=bar' if trace_query_string else None)
@@ -0,0 +1,27 @@
+from ddtrace import tracer, Span
+from ddtrace.ext import aws
+
+ARGS_NAME = ('action', 'params', 'path', 'verb')
+TRACED_ARGS = ['params', 'path', 'verb']
+
+
+def test_defer_span_arg_tags():
+    params = {'Bucket': 'bucket', 'Key': 'key', 'Body': b'x' * 2048, 'Metadata': {'owner': 'me'}}
+    args = ('PutObject', params)
+    span = Span(tracer, 'some_span')
+    expected = Span(tracer, 'some_span')
+    aws.add_span_arg_tags(expected, 's3', args, ARGS_NAME, TRACED_ARGS)
+    aws.defer_span_arg_tags(span, 's3', args, ARGS_NAME, TRACED_ARGS)
+
+    # The parameters updated during the call are traced as they were, without keeping the blacklisted ones
+    params['ContentMD5'] = 'md5'
+    assert 'Body' not in span._deferred_tags[0][1][1]['params']
+    assert span.meta == expected.meta == {
+        'params.Bucket': 'bucket', 'params.Key': 'key', 'params.Metadata.owner': 'me',
+    }
+
+
+def test_defer_span_arg_tags_blacklisted_endpoint():
+    span = Span(tracer, 'some_span')
+    aws.defer_span_arg_tags(span, 'kms', ('Decrypt', {'CiphertextBlob': 'secret'}), ARGS_NAME, TRACED_ARGS)
+    assert span._deferred_tags is None
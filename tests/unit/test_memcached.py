@@ -0,0 +1,9 @@
+from ddtrace.ext import memcached
+
+
+def test_get_multi_metrics():
+    assert memcached.get_multi_metrics([b'a', b'b']) == {memcached.KEYS_LEN: 2}
+    assert memcached.get_multi_metrics({b'a': b'value', 'b': u'other', 'c': 1}) == {
+        memcached.KEYS_LEN: 3,
+        memcached.VALUES_SIZE: 10,
+    }
@@ -118,6 +118,15 @@ class TestIntegrationConfig(BaseTestCase):
         assert self.integration_config.setting == 'value'
         assert self.integration_config['setting'] == 'value'
 
+    def test_is_header_tracing_configured(self):
+        assert not self.integration_config.is_header_tracing_configured
+        self.config.trace_headers('some_header')
+        assert self.integration_config.is_header_tracing_configured
+
+        integration_config = IntegrationConfig(Config(), 'test')
+        integration_config.http.trace_headers('some_header')
+        assert integration_config.is_header_tracing_configured
+
     def test_allow_attr_access(self):
         self.integration_config.setting = 'value'
 
@@ -31,14 +31,21 @@ class TestSpan(Span):
         # DEV: Use `object.__setattr__` to by-pass this class's `__setattr__`
         object.__setattr__(self, '_span', span)
 
-    def __getattr__(self, key):
+    def __getattribute__(self, key):
         """
-        First look for property on the base :class:`ddtrace.span.Span` otherwise return this object's attribute
+        First look for property on this class otherwise return the base :class:`ddtrace.span.Span` attribute
+
+        DEV: Attributes and methods of :class:`ddtrace.span.Span` are always looked up on the wrapped span, when
+             ``ddtrace.span`` is compiled they are stored in a C struct that is never set on this object
         """
-        if hasattr(self._span, key):
-            return getattr(self._span, key)
+        if key.startswith('__') or key in object.__getattribute__(self, '__dict__'):
+            return object.__getattribute__(self, key)
+
+        for cls in type(self).__mro__:
+            if cls not in Span.__mro__ and key in cls.__dict__:
+                return object.__getattribute__(self, key)
 
-        return self.__getattribute__(key)
+        return getattr(object.__getattribute__(self, '_span'), key)
 
     def __setattr__(self, key, value):
         """Pass through all assignment to the base :class:`ddtrace.span.Span`"""